@@ -0,0 +1,142 @@
+"""Conditional GET helpers shared by the read endpoints"""
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import Header, HTTPException, Response, status
+
+from app.core.etag import Validator, gzip_etag
+
+# Clients may keep responses but must revalidate them before reuse
+CACHE_CONTROL = "no-cache"
+
+
+def validator_headers(validator: Validator) -> dict:
+    """ETag, Last-Modified and Cache-Control headers of a validator"""
+    headers = {"ETag": validator.etag, "Cache-Control": CACHE_CONTROL}
+    if validator.last_modified is not None:
+        last_modified = validator.last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def set_validator(response: Response, validator: Validator) -> None:
+    """Attach a validator to a response"""
+    response.headers.update(validator_headers(validator))
+
+
+class ConditionalRequest:
+    """The If-None-Match and If-Modified-Since headers of a request"""
+    
+    def __init__(
+        self,
+        if_none_match: Optional[str] = Header(None),
+        if_modified_since: Optional[str] = Header(None)
+    ):
+        self.if_none_match = if_none_match
+        self.if_modified_since = if_modified_since
+    
+    def is_fresh(self, validator: Validator) -> bool:
+        """Whether the client's copy still matches the validator
+        
+        If-Modified-Since is only consulted when there is no If-None-Match,
+        as RFC 9110 requires. A stored gzip copy of the same representation
+        is as current as the plain one, so either ETag matches.
+        """
+        if self.if_none_match is not None:
+            if self.if_none_match.strip() == "*":
+                return True
+            current = {validator.etag, gzip_etag(validator.etag)}
+            for tag in self.if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"):
+                    tag = tag[2:]
+                if tag in current:
+                    return True
+            return False
+        
+        if self.if_modified_since is not None and validator.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(self.if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                return False
+            # HTTP dates have whole-second precision
+            last_modified = validator.last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+            return last_modified <= since
+        return False
+    
+    def not_modified(self, validator: Validator, headers: Optional[dict] = None) -> Optional[Response]:
+        """A 304 response if the client's copy is current, else None"""
+        if not self.is_fresh(validator):
+            return None
+        return Response(status_code=304, headers={**validator_headers(validator), **(headers or {})})
+
+
+class RangeRequest:
+    """The Range and If-Range headers of a request
+    
+    Only single byte ranges are served; a request for several ranges, or
+    a Range header that does not parse, gets the whole representation, as
+    RFC 9110 allows.
+    """
+    
+    def __init__(
+        self,
+        range: Optional[str] = Header(None),
+        if_range: Optional[str] = Header(None)
+    ):
+        self.range = range
+        self.if_range = if_range
+    
+    def byte_range(self, size: int, validator: Validator) -> Optional[Tuple[int, int]]:
+        """The (first, last) byte positions to send, or None for all of it
+        
+        Raises 416 when the range lies beyond the end of the representation.
+        """
+        if self.range is None or not self._if_range_matches(validator):
+            return None
+        unit, _, spec = self.range.partition("=")
+        if unit.strip().lower() != "bytes" or "," in spec:
+            return None
+        first, dash, last = spec.strip().partition("-")
+        if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+            return None
+        
+        if not first:
+            # The final N bytes
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                raise self._not_satisfiable(size)
+            return max(size - suffix, 0), size - 1
+        
+        first = int(first)
+        if last and int(last) < first:
+            return None
+        if first >= size:
+            raise self._not_satisfiable(size)
+        return first, min(int(last), size - 1) if last else size - 1
+    
+    def _if_range_matches(self, validator: Validator) -> bool:
+        """Whether a Range still applies; If-Range needs an exact, strong match"""
+        if self.if_range is None:
+            return True
+        if_range = self.if_range.strip()
+        if if_range.startswith(('"', "W/")):
+            return if_range == validator.etag
+        if validator.last_modified is None:
+            return False
+        try:
+            date = parsedate_to_datetime(if_range)
+        except (TypeError, ValueError):
+            return False
+        last_modified = validator.last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return date.tzinfo is not None and date == last_modified
+    
+    @staticmethod
+    def _not_satisfiable(size: int) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
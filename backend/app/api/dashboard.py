@@ -2,7 +2,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
+from app.api.conditional import ConditionalRequest, set_validator
+from app.api.responses import SchemaResponse
+from app.database.connection import get_read_db
 from app.services.dashboard_service import DashboardService
 from app.schemas.dashboard import DashboardResponse
 
@@ -11,9 +13,17 @@ router = APIRouter()
 
 @router.get("", response_model=DashboardResponse)
 async def get_dashboard(
-    db: AsyncSession = Depends(get_db)
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get dashboard statistics and recent data"""
     service = DashboardService(db)
-    return await service.get_dashboard_stats()
+    not_modified = conditional.not_modified(await service.get_dashboard_validator())
+    if not_modified:
+        return not_modified
+    
+    snapshot = await service.get_dashboard_snapshot()
+    response = SchemaResponse(snapshot.dashboard)
+    set_validator(response, snapshot.validator)
+    return response
 
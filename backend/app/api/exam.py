@@ -1,19 +1,36 @@
 """Exam endpoints"""
-from typing import List, Union
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
+from app.database.connection import get_db, get_read_db
+from app.api.conditional import ConditionalRequest, set_validator, validator_headers
+from app.api.pagination import CursorQuery, set_next_cursor
+from app.api.responses import SchemaListResponse
+from app.core.etag import gzip_etag
+from app.services.attempt_export import EXPORT_MEDIA_TYPES
 from app.services.exam_service import ExamService
 from app.schemas.exam import (
     ExamCreate, ExamUpdate, ExamResponse, ExamResponsePublic, ExamListResponse,
     QuestionCreate, QuestionUpdate, QuestionResponse,
-    ExamAttemptCreate, ExamAttemptSubmit, ExamAttemptResponse, ExamAttemptListResponse
+    ExamAttemptCreate, ExamAttemptSubmit, ExamAttemptResponse, ExamAttemptListResponse,
+    ImportReport
 )
 
 router = APIRouter()
 
 
+def paper_response(paper, accept_encoding: Optional[str], headers: dict) -> Response:
+    """Send stored paper bytes as-is, gzip-compressed if the client accepts it"""
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if paper.content_gzip is not None and "gzip" in (accept_encoding or ""):
+        headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = gzip_etag(headers["ETag"])
+        return Response(paper.content_gzip, media_type="application/json", headers=headers)
+    return Response(paper.content, media_type="application/json", headers=headers)
+
+
 # Exam endpoints
 @router.post("", response_model=ExamResponse, status_code=201)
 async def create_exam(
@@ -25,26 +42,83 @@ async def create_exam(
     return await service.create_exam(exam_data)
 
 
+@router.post("/import", response_model=ImportReport)
+async def import_questions(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    folder_id: Optional[int] = Query(None, description="Folder for the exams the import creates"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Import a question bank streamed as the raw request body
+    
+    Each row is a question plus either ``exam_id`` (an existing exam) or
+    ``exam_title`` (a new draft exam). Invalid rows are reported by line
+    number without stopping the import.
+    """
+    service = ExamService(db)
+    return await service.import_questions(request.stream(), format, folder_id)
+
+
 @router.get("", response_model=List[ExamListResponse])
 async def get_exams(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    folder_id: Optional[int] = Query(None),
+    is_published: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None, min_length=1, max_length=255, description="Filter by title"),
+    sort_by: str = Query("created_at", pattern="^(created_at|updated_at|title|question_count|attempt_count)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = CursorQuery,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all exams"""
     service = ExamService(db)
-    return await service.get_all_exams(skip, limit)
+    validator = await service.get_exams_validator(folder_id, is_published, search)
+    not_modified = conditional.not_modified(validator)
+    if not_modified:
+        return not_modified
+    
+    exams, next_cursor = await service.get_all_exams(
+        skip, limit,
+        folder_id=folder_id,
+        is_published=is_published,
+        search=search,
+        sort_by=sort_by,
+        order=order,
+        cursor=cursor,
+    )
+    response = SchemaListResponse(ExamListResponse, exams)
+    set_next_cursor(response, next_cursor)
+    set_validator(response, validator)
+    return response
 
 
 @router.get("/{exam_id}", response_model=Union[ExamResponse, ExamResponsePublic])
 async def get_exam(
     exam_id: int,
+    response: Response,
     include_answers: bool = Query(False, description="Include correct answers (for admin)"),
-    db: AsyncSession = Depends(get_db)
+    accept_encoding: Optional[str] = Header(None),
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get exam by ID"""
     service = ExamService(db)
-    return await service.get_exam(exam_id, include_answers)
+    validator = await service.get_exam_validator(exam_id, include_answers)
+    not_modified = conditional.not_modified(validator, {"Vary": "Accept-Encoding"})
+    if not_modified:
+        return not_modified
+    
+    if not include_answers:
+        # Published exams are served from their pre-rendered paper
+        paper = await service.get_exam_paper(exam_id)
+        if paper is not None:
+            return paper_response(paper, accept_encoding, validator_headers(validator))
+    exam = await service.get_exam(exam_id, include_answers)
+    set_validator(response, validator)
+    return exam
+
 
 
 @router.put("/{exam_id}", response_model=ExamResponse)
@@ -110,7 +184,7 @@ async def delete_question(
 async def start_attempt(
     exam_id: int,
     attempt_data: ExamAttemptCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Start an exam attempt"""
     service = ExamService(db)
@@ -121,7 +195,7 @@ async def start_attempt(
 async def submit_attempt(
     attempt_id: int,
     submission: ExamAttemptSubmit,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Submit an exam attempt"""
     service = ExamService(db)
@@ -131,7 +205,7 @@ async def submit_attempt(
 @router.get("/attempts/{attempt_id}", response_model=ExamAttemptResponse)
 async def get_attempt(
     attempt_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get exam attempt by ID"""
     service = ExamService(db)
@@ -143,8 +217,28 @@ async def get_exam_attempts(
     exam_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = CursorQuery,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all attempts for an exam"""
     service = ExamService(db)
-    return await service.get_exam_attempts(exam_id, skip, limit)
\ No newline at end of file
+    attempts, next_cursor = await service.get_exam_attempts(exam_id, skip, limit, cursor)
+    response = SchemaListResponse(ExamAttemptListResponse, attempts)
+    set_next_cursor(response, next_cursor)
+    return response
+
+
+@router.get("/{exam_id}/attempts/export")
+async def export_exam_attempts(
+    exam_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Export all attempts of an exam with their answers, streamed"""
+    service = ExamService(db)
+    chunks = await service.export_attempts(exam_id, format)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="exam-{exam_id}-attempts.{format}"'}
+    )
@@ -1,9 +1,12 @@
 """Folder endpoints"""
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
+from app.database.connection import get_db, get_read_db
+from app.api.conditional import ConditionalRequest, set_validator
+from app.api.pagination import CursorQuery, set_next_cursor
+from app.api.responses import SchemaListResponse
 from app.services.folder_service import FolderService
 from app.schemas.folder import FolderCreate, FolderUpdate, FolderResponse
 
@@ -24,21 +27,41 @@ async def create_folder(
 async def get_folders(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = CursorQuery,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all folders"""
     service = FolderService(db)
-    return await service.get_all_folders(skip, limit)
+    validator = await service.get_folders_validator()
+    not_modified = conditional.not_modified(validator)
+    if not_modified:
+        return not_modified
+    
+    folders, next_cursor = await service.get_all_folders(skip, limit, cursor)
+    response = SchemaListResponse(FolderResponse, folders)
+    set_next_cursor(response, next_cursor)
+    set_validator(response, validator)
+    return response
 
 
 @router.get("/{folder_id}", response_model=FolderResponse)
 async def get_folder(
     folder_id: int,
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get folder by ID"""
     service = FolderService(db)
-    return await service.get_folder(folder_id)
+    validator = await service.get_folder_validator(folder_id)
+    not_modified = conditional.not_modified(validator)
+    if not_modified:
+        return not_modified
+    
+    folder = await service.get_folder(folder_id)
+    set_validator(response, validator)
+    return folder
 
 
 @router.put("/{folder_id}", response_model=FolderResponse)
@@ -2,6 +2,13 @@
 from fastapi import APIRouter
 from datetime import datetime
 
+from app.database.write_queue import write_scheduler
+from app.services.answer_key import answer_key_cache
+from app.services.dashboard_service import dashboard_cache
+from app.services.exam_cache import exam_cache
+from app.services.image_derivatives import derivative_queue
+from app.services.text_extraction import extraction_queue
+
 router = APIRouter()
 
 
@@ -14,3 +21,16 @@ async def health_check():
         "service": "Exam Hub API"
     }
 
+
+
+@router.get("/health/metrics")
+async def metrics():
+    """Runtime counters of in-process queues and caches"""
+    return {
+        "write_queue": write_scheduler.stats(),
+        "answer_key_cache": answer_key_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "exam_cache": exam_cache.stats(),
+        "text_extraction": extraction_queue.stats(),
+        "image_derivatives": derivative_queue.stats(),
+    }
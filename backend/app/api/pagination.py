@@ -0,0 +1,16 @@
+"""Cursor pagination helpers shared by the list endpoints"""
+from typing import Optional
+from fastapi import Query, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CursorQuery = Query(
+    None,
+    description=f"Cursor from the {NEXT_CURSOR_HEADER} response header (overrides skip)"
+)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the cursor of the next page, if any, as a response header"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,121 @@
+"""Responses for bodies the services have already validated, and for files"""
+import asyncio
+import os
+from typing import Optional, Sequence, Type
+from urllib.parse import quote
+from fastapi import Response
+from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
+
+from app.core.serialization import dump_list_json
+
+
+class SchemaResponse(Response):
+    """JSON body of a validated schema instance
+    
+    Routes return this instead of the instance itself, so FastAPI does not
+    dump and re-validate it against the response_model, which is kept on
+    the route for the OpenAPI docs.
+    """
+    media_type = "application/json"
+    
+    def __init__(self, content: BaseModel, status_code: int = 200, headers: Optional[dict] = None):
+        super().__init__(content.model_dump_json(), status_code=status_code, headers=headers)
+
+
+class SchemaListResponse(Response):
+    """JSON array of validated schema instances; see SchemaResponse"""
+    media_type = "application/json"
+    
+    def __init__(
+        self,
+        schema: Type[BaseModel],
+        items: Sequence[BaseModel],
+        status_code: int = 200,
+        headers: Optional[dict] = None
+    ):
+        super().__init__(dump_list_json(schema, items), status_code=status_code, headers=headers)
+
+
+class FileRangeResponse(Response):
+    """A file on disk, or one byte range of it
+    
+    Handed to the server for zero-copy sending (sendfile) when it offers
+    the ASGI ``http.response.zerocopysend`` or ``pathsend`` extension.
+    Otherwise the file is read in blocks from a worker thread, the next
+    block while the current one is being sent, so the event loop never
+    waits on the disk.
+    """
+    chunk_size = 256 * 1024
+    
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        length: int,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None
+    ):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers({**(headers or {}), "Content-Length": str(length)})
+        if filename is not None:
+            self.headers.setdefault("Content-Disposition", f"inline; filename*=utf-8''{quote(filename)}")
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        extensions = scope.get("extensions") or {}
+        whole_file = self.offset == 0 and self.status_code == 200
+        if whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+        
+        file = await asyncio.to_thread(open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.length,
+                })
+            else:
+                await self._send_blocks(file.fileno(), send)
+        finally:
+            await asyncio.to_thread(file.close)
+    
+    async def _send_blocks(self, fd: int, send: Send):
+        position, end = self.offset, self.offset + self.length
+        block = asyncio.create_task(self._read(fd, position, end))
+        try:
+            while True:
+                data = await block
+                position += len(data)
+                more_body = position < end
+                if more_body:
+                    block = asyncio.create_task(self._read(fd, position, end))
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                if not more_body:
+                    return
+        finally:
+            # A read still in flight must finish before the file is closed
+            await asyncio.gather(block, return_exceptions=True)
+    
+    async def _read(self, fd: int, position: int, end: int) -> bytes:
+        size = min(self.chunk_size, end - position)
+        data = await asyncio.to_thread(os.pread, fd, size, position)
+        if len(data) < size:
+            # The file shrank after Content-Length was sent: fail, so the
+            # server aborts the connection, rather than end the body short
+            raise OSError(f"{self.path} ended at byte {position + len(data)}, expected {end}")
+        return data
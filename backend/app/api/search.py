@@ -0,0 +1,25 @@
+"""Search endpoints"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import get_read_db
+from app.api.responses import SchemaResponse
+from app.services.search_service import SearchService
+from app.schemas.search import SearchResponse
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=255, description="Words to find, all of them"),
+    type: Optional[str] = Query(None, pattern="^(exam|question)$", description="Only exams or only questions"),
+    skip: int = Query(0, ge=0, le=settings.SEARCH_MAX_RESULTS),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search exams and questions, best matches first"""
+    service = SearchService(db)
+    return SchemaResponse(await service.search(q, type, skip, limit))
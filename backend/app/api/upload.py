@@ -1,52 +1,294 @@
 """Upload endpoints"""
 from typing import List, Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Query
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
+from app.database.connection import get_db, get_read_db
+from app.api.conditional import ConditionalRequest, RangeRequest, set_validator, validator_headers
+from app.api.pagination import CursorQuery, set_next_cursor
+from app.api.responses import FileRangeResponse, SchemaListResponse
 from app.services.upload_service import UploadService
-from app.schemas.file import FileResponse, FileUploadResponse
+from app.services.upload_session_service import UploadSessionService
+from app.schemas.file import (
+    BatchUploadResponse, FileResponse, FileTextResponse, FileUploadResponse, StorageReport,
+    UploadSessionCreate, UploadSessionResponse
+)
 
 router = APIRouter()
 
+# The body is streamed by the service rather than parsed by FastAPI, so
+# the form is described here for the API docs
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
 
-@router.post("", response_model=FileUploadResponse, status_code=201)
+@router.post("", response_model=FileUploadResponse, status_code=201, openapi_extra=UPLOAD_FORM)
 async def upload_file(
-    file: UploadFile = File(...),
+    request: Request,
     folder_id: Optional[int] = Query(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """Upload a file"""
+    """Upload a file, streamed to disk as it arrives"""
     service = UploadService(db)
-    file_response = await service.upload_file(file, folder_id)
+    file_response = await service.upload_file(request, folder_id)
     return FileUploadResponse(
         message="File uploaded successfully",
         file=file_response
     )
 
 
+BATCH_UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["files"],
+                    "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                }
+            }
+        },
+    }
+}
+
+
+@router.post("/batch", response_model=BatchUploadResponse, status_code=201, openapi_extra=BATCH_UPLOAD_FORM)
+async def upload_files(
+    request: Request,
+    response: Response,
+    folder_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload up to MAX_BATCH_UPLOAD_FILES files in one request, with a result per file
+    
+    Answers 400 with the results if every file was rejected.
+    """
+    service = UploadService(db)
+    batch = await service.upload_files(request, folder_id)
+    if not batch.uploaded:
+        response.status_code = 400
+    return batch
+
+
 @router.get("", response_model=List[FileResponse])
 async def get_files(
     folder_id: Optional[int] = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = CursorQuery,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get files by folder"""
     service = UploadService(db)
-    return await service.get_files_by_folder(folder_id, skip, limit)
+    validator = await service.get_files_validator(folder_id)
+    not_modified = conditional.not_modified(validator)
+    if not_modified:
+        return not_modified
+    
+    files, next_cursor = await service.get_files_by_folder(folder_id, skip, limit, cursor)
+    response = SchemaListResponse(FileResponse, files)
+    set_next_cursor(response, next_cursor)
+    set_validator(response, validator)
+    return response
+
+
+@router.get("/storage", response_model=StorageReport)
+async def get_storage_report(
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Disk usage of uploads and the space saved by storing identical files once"""
+    service = UploadService(db)
+    return await service.get_storage_report()
+
+
+@router.post("/sessions", response_model=UploadSessionResponse, status_code=201)
+async def create_upload_session(
+    data: UploadSessionCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Start a resumable upload of a file of up to MAX_RESUMABLE_UPLOAD_SIZE bytes"""
+    service = UploadSessionService(db)
+    session = await service.create_session(data)
+    response.headers["Location"] = f"/api/upload/sessions/{session.id}"
+    response.headers["Upload-Offset"] = str(session.offset)
+    return session
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the offset a resumable upload has reached, to resume from"""
+    service = UploadSessionService(db)
+    session = await service.get_session(session_id)
+    response.headers["Upload-Offset"] = str(session.offset)
+    response.headers["Cache-Control"] = "no-store"
+    return session
+
+
+@router.patch(
+    "/sessions/{session_id}",
+    response_model=UploadSessionResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/offset+octet-stream": {}}}}
+)
+async def upload_chunk(
+    session_id: int,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """Send the next chunk of a resumable upload, starting at Upload-Offset"""
+    service = UploadSessionService(db)
+    session = await service.upload_chunk(session_id, upload_offset, request)
+    response.headers["Upload-Offset"] = str(session.offset)
+    return session
+
+
+@router.post("/sessions/{session_id}/complete", response_model=FileUploadResponse, status_code=201)
+async def complete_upload_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Finish a resumable upload once all of its data has been sent"""
+    service = UploadSessionService(db)
+    file_response = await service.complete_session(session_id)
+    return FileUploadResponse(
+        message="File uploaded successfully",
+        file=file_response
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_upload_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Abandon a resumable upload"""
+    service = UploadSessionService(db)
+    await service.delete_session(session_id)
+    return None
 
 
 @router.get("/{file_id}", response_model=FileResponse)
 async def get_file(
     file_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get file by ID"""
     service = UploadService(db)
     return await service.get_file(file_id)
 
 
+@router.head("/{file_id}/content", response_class=FileRangeResponse, include_in_schema=False)
+@router.get(
+    "/{file_id}/content",
+    response_class=FileRangeResponse,
+    responses={200: {"content": {"application/octet-stream": {}}}, 206: {"description": "Partial Content"}}
+)
+async def get_file_content(
+    file_id: int,
+    conditional: ConditionalRequest = Depends(),
+    range_request: RangeRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download a file's contents, whole or one byte range
+    
+    The validator comes from the database, so a matching If-None-Match
+    is answered with 304 without touching the disk.
+    """
+    service = UploadService(db)
+    content = await service.get_file_content(file_id)
+    validator = service.get_content_validator(content)
+    headers = {
+        **validator_headers(validator),
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    not_modified = conditional.not_modified(validator, headers)
+    if not_modified:
+        return not_modified
+    
+    size = await service.get_content_size(content)
+    byte_range = range_request.byte_range(size, validator)
+    if byte_range is None:
+        offset, length, status_code = 0, size, 200
+    else:
+        first, last = byte_range
+        offset, length, status_code = first, last - first + 1, 206
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    
+    return FileRangeResponse(
+        content.file_path, offset, length,
+        status_code=status_code,
+        headers=headers,
+        media_type=service.get_content_type(content),
+        filename=content.original_filename
+    )
+
+
+@router.get(
+    "/{file_id}/images/{variant}",
+    response_class=FileRangeResponse,
+    responses={200: {"content": {"image/webp": {}}}}
+)
+async def get_file_image(
+    file_id: int,
+    variant: str,
+    conditional: ConditionalRequest = Depends(),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a WebP copy of an uploaded image shrunk to a variant's size
+    
+    Copies are made in the background after upload and cached by content
+    hash; one not ready yet is made before answering.
+    """
+    service = UploadService(db)
+    content = await service.get_file_content(file_id)
+    validator = service.get_image_validator(content, variant)
+    headers = {
+        **validator_headers(validator),
+        "X-Content-Type-Options": "nosniff",
+    }
+    not_modified = conditional.not_modified(validator, headers)
+    if not_modified:
+        return not_modified
+    
+    path, size = await service.get_image(content, variant)
+    return FileRangeResponse(
+        path, 0, size,
+        headers=headers,
+        media_type="image/webp",
+        filename=f"{content.original_filename.rsplit('.', 1)[0]}-{variant}.webp"
+    )
+
+
+@router.get("/{file_id}/text", response_model=FileTextResponse)
+async def get_file_text(
+    file_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the text extracted from a file in the background, with its page count"""
+    service = UploadService(db)
+    return await service.get_file_text(file_id)
+
+
 @router.delete("/{file_id}", status_code=204)
 async def delete_file(
     file_id: int,
@@ -0,0 +1,118 @@
+"""In-process caches"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss/eviction counters
+    
+    Not thread-safe; it is meant to be used from the event loop only.
+    """
+    
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value and mark it most recently used"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used one if full"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def pop(self, key: Hashable) -> None:
+        """Drop a value if present"""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every value"""
+        self._data.clear()
+    
+    def stats(self) -> dict:
+        """Size and hit/miss/eviction counters"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SnapshotCache:
+    """A single computed value that is reused until it expires
+    
+    Concurrent readers of an expired snapshot wait for one recompute
+    instead of each running their own. ``invalidate`` expires the value
+    immediately, and a recompute that was already running when it was
+    called is returned to its waiters but not stored.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recomputes = 0
+    
+    def _fresh(self) -> bool:
+        return time.monotonic() < self._expires_at
+    
+    async def get(self, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Get the snapshot, recomputing it with ``compute`` if expired"""
+        if self._fresh():
+            self.hits += 1
+            return self._value
+        
+        async with self._lock:
+            # Another request may have recomputed it while we waited
+            if self._fresh():
+                self.hits += 1
+                return self._value
+            
+            self.misses += 1
+            generation = self._generation
+            value = await compute()
+            self.recomputes += 1
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+            return value
+    
+    def invalidate(self) -> None:
+        """Expire the snapshot"""
+        self._generation += 1
+        self._expires_at = 0.0
+        self._value = None
+    
+    def stats(self) -> dict:
+        """Hit/miss/recompute counters"""
+        return {
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recomputes": self.recomputes,
+        }
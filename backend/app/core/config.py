@@ -1,6 +1,6 @@
 """Application configuration"""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -12,6 +12,32 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./exam_hub.db"
+    DB_ECHO: bool = False  # log every SQL statement
+    DB_READ_POOL_SIZE: int = 5
+    DB_READ_MAX_OVERFLOW: int = 10
+    DB_WRITE_POOL_SIZE: int = 1  # SQLite allows one writer at a time
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a pooled connection
+    DB_POOL_RECYCLE: int = 3600  # seconds before a connection is replaced
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # safe with WAL; FULL for extra durability
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # wait this long for a lock before failing
+    SQLITE_CACHE_SIZE_KB: int = 16 * 1024  # page cache per connection
+    WRITE_QUEUE_SIZE: int = 1000  # pending attempt writes before returning 503
+    WRITE_BATCH_SIZE: int = 100  # attempt writes committed per transaction
+    
+    # Caching
+    ANSWER_KEY_CACHE_SIZE: int = 256  # compiled answer keys kept in memory
+    EXAM_CACHE_SIZE: int = 256  # exams (with questions) kept in memory
+    DASHBOARD_CACHE_TTL: float = 5.0  # seconds a dashboard snapshot is reused
+    EXAM_PAPER_GZIP: bool = True  # also store published exam papers gzip-compressed
+    
+    # Exports
+    EXPORT_BATCH_SIZE: int = 2000  # rows fetched per round trip when streaming exports
+    
+    # Imports
+    IMPORT_BATCH_SIZE: int = 1000  # question rows inserted per transaction
+    IMPORT_MAX_ERRORS: int = 1000  # row errors listed in an import report
+    IMPORT_MAX_ROW_CHARS: int = 100_000  # longest row; a CSV record's quoted line breaks included
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -24,6 +50,28 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "docx", "doc", "txt", "pptx", "jpg", "jpeg", "png"]
+    RESUMABLE_EXTENSIONS: List[str] = ["pdf", "docx", "doc", "txt", "pptx", "jpg", "jpeg", "png", "mp4"]  # recordings only come in chunks
+    MAX_BATCH_UPLOAD_FILES: int = 50  # files per batch upload request
+    UPLOAD_CONCURRENCY: int = 4  # blocks of a batch upload written and hashed at once
+    MAX_RESUMABLE_UPLOAD_SIZE: int = 2 * 1024 * 1024 * 1024  # 2GB, for uploads sent in chunks
+    UPLOAD_SESSION_TTL: int = 24 * 3600  # seconds an idle resumable upload is kept
+    UPLOAD_SESSION_GC_INTERVAL: int = 3600  # seconds between sweeps for stale uploads
+    
+    # Text extraction
+    EXTRACTION_WORKERS: int = 2  # processes extracting text from uploaded documents
+    EXTRACTION_MAX_CHARS: int = 1_000_000  # text kept per document
+    
+    # Image derivatives
+    IMAGE_WORKERS: int = 1  # processes resizing uploaded images
+    IMAGE_VARIANTS: Dict[str, int] = {"thumbnail": 320, "preview": 1600}  # WebP copies, longest side in pixels
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_MAX_PIXELS: int = 50_000_000  # larger images are not resized
+    
+    # Search
+    SEARCH_MAX_RESULTS: int = 1000  # how deep into the results a search can page
+    SEARCH_MAX_RANKED: int = 10000  # matches scored per search; the newest, for very common words
+    SEARCH_MAX_WORDS: int = 10  # words of a query searched for; the rest are ignored
+    SEARCH_SNIPPET_TOKENS: int = 16  # words of context in a result's snippet
     
     # AI/GenAI
     GEMINI_API_KEY: str = ""
@@ -0,0 +1,25 @@
+"""Validators for conditional GET requests"""
+import hashlib
+from datetime import datetime
+from typing import Any, NamedTuple, Optional
+
+
+class Validator(NamedTuple):
+    """ETag and Last-Modified of one representation of a resource"""
+    etag: str
+    last_modified: Optional[datetime] = None
+
+
+def make_validator(*parts: Any, last_modified: Optional[datetime] = None) -> Validator:
+    """Build a strong ETag from the values a representation is derived from
+    
+    ``parts`` should change whenever the response body would, e.g. a row's
+    version and updated_at, or a listing's row count and latest updated_at.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return Validator(f'"{digest}"', last_modified)
+
+
+def gzip_etag(etag: str) -> str:
+    """ETag of the gzip-encoded copy of a representation"""
+    return etag[:-1] + '-gzip"'
@@ -0,0 +1,32 @@
+"""Batch conversion of ORM objects to response schemas"""
+from functools import lru_cache
+from typing import List, Sequence, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.engine import Row
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[SchemaType]) -> TypeAdapter:
+    """TypeAdapter for a list of ``schema``, built once per schema"""
+    return TypeAdapter(List[schema])
+
+
+def validate_list(schema: Type[SchemaType], objs: Sequence) -> List[SchemaType]:
+    """Validate ORM objects or result rows against a schema in one call
+    
+    ORM objects are read through attribute access, so an expired or
+    deferred attribute is loaded (or raises) instead of going missing.
+    Result rows have no such state, so their columns are validated as
+    a dict, which skips pydantic's attribute lookups.
+    """
+    if objs and isinstance(objs[0], Row):
+        return list_adapter(schema).validate_python([row._asdict() for row in objs])
+    return list_adapter(schema).validate_python(objs, from_attributes=True)
+
+
+def dump_list_json(schema: Type[SchemaType], items: Sequence[SchemaType]) -> bytes:
+    """Serialize validated schema instances to a JSON array"""
+    return list_adapter(schema).dump_json(items)
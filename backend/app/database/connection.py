@@ -1,16 +1,78 @@
 """Database connection and session management"""
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True
-)
 
-# Create async session factory
+def _is_sqlite_file(url: str) -> bool:
+    """Whether the URL points at an on-disk SQLite database"""
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, read_only: bool):
+    """Apply the connection-level pragmas SQLite does not persist"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.execute(f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def _create_engine(pool_size: int, max_overflow: int, read_only: bool = False) -> AsyncEngine:
+    """Create an engine with a bounded connection pool"""
+    if not _is_sqlite_file(settings.DATABASE_URL):
+        return create_async_engine(settings.DATABASE_URL, echo=settings.DB_ECHO, future=True)
+    
+    new_engine = create_async_engine(
+        settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    
+    @event.listens_for(new_engine.sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, read_only)
+        if not read_only:
+            # Let SQLAlchemy emit BEGIN itself (see on_begin) instead of the
+            # driver's implicit one, which breaks SAVEPOINTs
+            dbapi_connection.isolation_level = None
+    
+    if not read_only:
+        @event.listens_for(new_engine.sync_engine, "begin")
+        def on_begin(conn):
+            # Take the write lock up front: a read transaction that later
+            # tries to write fails with SQLITE_BUSY without waiting
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    
+    return new_engine
+
+
+# Writes go through a single pooled connection, so writers queue in the
+# pool instead of fighting over SQLite's write lock. In WAL mode readers
+# never block on the writer, so reads get their own larger pool.
+engine = _create_engine(settings.DB_WRITE_POOL_SIZE, max_overflow=0)
+
+if _is_sqlite_file(settings.DATABASE_URL):
+    read_engine = _create_engine(settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW, read_only=True)
+else:
+    # An in-memory database only exists on its own connection
+    read_engine = engine
+
+# Create async session factories
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -19,6 +81,14 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -32,10 +102,52 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
-async def init_db():
-    """Initialize database - create all tables"""
+async def get_read_db() -> AsyncSession:
+    """Dependency for getting read-only database sessions"""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def init_db() -> dict:
+    """Initialize database - create all tables and upgrade existing ones
+    
+    Returns the columns and indexes that were added to an existing database.
+    """
+    from app.database.migrations import add_missing_columns, create_missing_indexes, create_search_index, analyze
+    
     async with engine.begin() as conn:
         # Import all models here so they are registered
         from app.models import exam, folder, file
         await conn.run_sync(Base.metadata.create_all)
+        added_columns = await conn.run_sync(add_missing_columns)
+        created_indexes = await conn.run_sync(create_missing_indexes)
+        search_index_created = await conn.run_sync(create_search_index)
+        if created_indexes:
+            await conn.run_sync(analyze)
+    
+    # Counter columns start at zero on existing databases; backfill them
+    if any(column.startswith("folders.") for column in added_columns):
+        from app.repositories.folder import FolderRepository
+        async with AsyncSessionLocal() as session:
+            await FolderRepository(session).rebuild_counts()
+    
+    # A new search index starts empty; fill it from existing exams
+    if search_index_created:
+        from app.repositories.search import SearchRepository
+        async with AsyncSessionLocal() as session:
+            await SearchRepository(session).rebuild()
+    
+    return {
+        "columns": added_columns,
+        "indexes": created_indexes + (["search_index"] if search_index_created else []),
+    }
+
 
+async def close_db():
+    """Close every pooled connection"""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
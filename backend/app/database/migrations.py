@@ -0,0 +1,93 @@
+"""Schema upgrades for existing databases
+
+``Base.metadata.create_all`` only creates missing tables; it never alters
+tables that already exist. Columns added to a model after the first
+release are listed here and added with ``ALTER TABLE`` on startup, and
+indexes declared on the models are created if they are missing. The
+full-text search index is not a model and is created here too.
+"""
+from typing import List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.database.connection import Base
+
+# (table, column, column DDL) in the order they were introduced
+ADDED_COLUMNS: List[Tuple[str, str, str]] = [
+    ("folders", "exam_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("folders", "file_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("folders", "total_bytes", "BIGINT NOT NULL DEFAULT 0"),
+    ("exams", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ("files", "blob_id", "INTEGER REFERENCES blobs(id)"),
+]
+
+# Full-text index of exam titles/descriptions and question texts/options
+# (see app/repositories/search.py). Accents are folded, so "resume"
+# finds "résumé", and 2- and 3-letter prefixes are indexed for queries
+# typed as you go. Matches in the title column (exam titles, question
+# texts) rank twice as high as in the body.
+SEARCH_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+]
+
+
+def add_missing_columns(conn: Connection) -> List[str]:
+    """Add any columns from ADDED_COLUMNS that the database lacks
+    
+    Returns the added columns as ``table.column`` strings.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in existing_tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if column in columns:
+            continue
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl}'))
+        added.append(f"{table}.{column}")
+    
+    return added
+
+
+def create_missing_indexes(conn: Connection) -> List[str]:
+    """Create indexes declared on the models that the database lacks
+    
+    Returns the names of the created indexes.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in existing:
+                continue
+            index.create(conn)
+            created.append(index.name)
+    
+    return created
+
+
+def create_search_index(conn: Connection) -> bool:
+    """Create the full-text search index if the database lacks it
+    
+    Returns whether it was created, in which case it is still empty.
+    """
+    if conn.dialect.name != "sqlite" or "search_index" in inspect(conn).get_table_names():
+        return False
+    for statement in SEARCH_INDEX_DDL:
+        conn.execute(text(statement))
+    return True
+
+
+def analyze(conn: Connection):
+    """Refresh the query planner's statistics"""
+    conn.execute(text("ANALYZE"))
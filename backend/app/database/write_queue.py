@@ -0,0 +1,156 @@
+"""Group-commit write scheduler
+
+SQLite has a single write lock, so concurrent write transactions only
+queue up behind each other. The scheduler runs queued write jobs on one
+background task and coalesces whatever has accumulated into a single
+transaction that is committed once; a failing job is rolled back on its
+own and does not affect the rest of its batch.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import AsyncSessionLocal
+
+WriteJob = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueueFullError(RuntimeError):
+    """Raised when the write queue has no room for another job"""
+
+
+class WriteScheduler:
+    """Runs write jobs in batched transactions on a single background task"""
+    
+    def __init__(self, max_queue_size: int, max_batch_size: int):
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.jobs = 0
+        self.failed_jobs = 0
+        self.batches = 0
+        self.commit_ms = 0.0
+    
+    def start(self):
+        """Start the background worker on the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Finish the queued jobs and stop the worker"""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+    
+    async def run(self, job: WriteJob) -> Any:
+        """Queue a write job and wait for its result
+        
+        The job receives the batch's session and must not commit it. Its
+        return value, or the exception it raised, is handed back here once
+        the batch containing it has been committed.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job, future))
+        except asyncio.QueueFull:
+            raise WriteQueueFullError("Too many pending writes") from None
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            try:
+                await self._run_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+    
+    async def _run_batch(self, batch: List[Tuple[WriteJob, asyncio.Future]]):
+        async with AsyncSessionLocal() as session:
+            try:
+                outcomes = await self._run_jobs(session, batch)
+            except Exception as e:
+                outcomes = [(future, None, e) for _, future in batch]
+            
+            # Everything in the batch is committed at once
+            start = time.perf_counter()
+            try:
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                outcomes = [(future, None, error or e) for future, _, error in outcomes]
+            self.commit_ms += (time.perf_counter() - start) * 1000
+        
+        self.jobs += len(batch)
+        self.batches += 1
+        for future, result, error in outcomes:
+            if error is not None:
+                self.failed_jobs += 1
+            _resolve(future, result, error)
+    
+    async def _run_jobs(self, session: AsyncSession, batch: List[Tuple[WriteJob, asyncio.Future]]) -> list:
+        """Run a batch's jobs, returning (future, result, error) per job
+        
+        Jobs first run back to back without savepoints, which is cheapest
+        when they all succeed. If one fails, the batch is rolled back and
+        replayed with a SAVEPOINT around each job, so only the failing
+        jobs are undone.
+        """
+        try:
+            return [(future, await job(session), None) for job, future in batch]
+        except Exception:
+            await session.rollback()
+            if len(batch) == 1:
+                raise
+        
+        outcomes = []
+        for job, future in batch:
+            try:
+                async with session.begin_nested():
+                    outcomes.append((future, await job(session), None))
+            except Exception as e:
+                outcomes.append((future, None, e))
+        return outcomes
+    
+    def stats(self) -> dict:
+        """Queue depth and batching counters"""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "jobs": self.jobs,
+            "failed_jobs": self.failed_jobs,
+            "batches": self.batches,
+            "avg_batch_size": round(self.jobs / self.batches, 2) if self.batches else 0.0,
+            "avg_commit_ms": round(self.commit_ms / self.batches, 3) if self.batches else 0.0,
+        }
+
+
+def _resolve(future: asyncio.Future, result: Any, exception: Optional[BaseException]):
+    """Complete a job's future unless its caller has already gone away"""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+write_scheduler = WriteScheduler(
+    max_queue_size=settings.WRITE_QUEUE_SIZE,
+    max_batch_size=settings.WRITE_BATCH_SIZE,
+)
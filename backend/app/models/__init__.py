@@ -1,7 +1,7 @@
 """Database models"""
-from app.models.exam import Exam, Question, ExamAttempt, Answer
+from app.models.exam import Exam, ExamPaper, Question, ExamAttempt, Answer
 from app.models.folder import Folder
-from app.models.file import File
+from app.models.file import File, Blob, BlobText, UploadSession
 
-__all__ = ["Exam", "Question", "ExamAttempt", "Answer", "Folder", "File"]
+__all__ = ["Exam", "ExamPaper", "Question", "ExamAttempt", "Answer", "Folder", "File", "Blob", "BlobText", "UploadSession"]
 
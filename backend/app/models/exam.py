@@ -1,5 +1,5 @@
 """Exam related models"""
-from sqlalchemy import Column, String, Text, Integer, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -7,6 +7,12 @@ from app.models.base import BaseModel
 class Exam(BaseModel):
     """Exam model"""
     __tablename__ = "exams"
+    __table_args__ = (
+        # Keyset pagination of a folder's exams: (folder_id, created_at, id);
+        # also serves plain folder_id lookups
+        Index("ix_exams_folder_id_created_at", "folder_id", "created_at"),
+        Index("ix_exams_is_published_created_at", "is_published", "created_at"),
+    )
     
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -14,6 +20,7 @@ class Exam(BaseModel):
     total_marks = Column(Float, default=0.0)
     passing_marks = Column(Float, default=0.0)
     is_published = Column(Boolean, default=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)  # bumped on every content edit
     
     # Foreign keys
     folder_id = Column(Integer, ForeignKey("folders.id", ondelete="SET NULL"), nullable=True)
@@ -22,11 +29,29 @@ class Exam(BaseModel):
     folder = relationship("Folder", back_populates="exams")
     questions = relationship("Question", back_populates="exam", cascade="all, delete-orphan")
     attempts = relationship("ExamAttempt", back_populates="exam", cascade="all, delete-orphan")
+    paper = relationship("ExamPaper", back_populates="exam", cascade="all, delete-orphan", uselist=False)
+
+
+class ExamPaper(BaseModel):
+    """Pre-rendered public view of a published exam"""
+    __tablename__ = "exam_papers"
+    
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False, unique=True)
+    version = Column(Integer, nullable=False)  # exam version it was rendered from
+    content = Column(LargeBinary, nullable=False)  # JSON response body
+    content_gzip = Column(LargeBinary, nullable=True)  # same body, gzip-compressed
+    
+    # Relationships
+    exam = relationship("Exam", back_populates="paper")
 
 
 class Question(BaseModel):
     """Question model"""
     __tablename__ = "questions"
+    __table_args__ = (
+        # An exam's questions in display order
+        Index("ix_questions_exam_id_order", "exam_id", "order"),
+    )
     
     exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
     question_text = Column(Text, nullable=False)
@@ -46,12 +71,19 @@ class Question(BaseModel):
 class ExamAttempt(BaseModel):
     """Exam attempt model"""
     __tablename__ = "exam_attempts"
+    __table_args__ = (
+        # Keyset pagination of an exam's attempts: (exam_id, created_at, id)
+        Index("ix_exam_attempts_exam_id_created_at", "exam_id", "created_at"),
+        Index("ix_exam_attempts_exam_id_status", "exam_id", "status"),
+        # Lets the dashboard's ETag find the latest attempt change cheaply
+        Index("ix_exam_attempts_updated_at", "updated_at"),
+    )
     
     exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
     student_name = Column(String(255), nullable=False)  # No auth, so we store name directly
     student_email = Column(String(255), nullable=True)  # Optional
     
-    status = Column(String(50), default="in_progress")  # in_progress, completed, submitted
+    status = Column(String(50), default="in_progress", index=True)  # in_progress, completed, submitted
     score = Column(Float, nullable=True)
     percentage = Column(Float, nullable=True)
     passed = Column(Boolean, nullable=True)
@@ -68,8 +100,8 @@ class Answer(BaseModel):
     """Student answer model"""
     __tablename__ = "answers"
     
-    attempt_id = Column(Integer, ForeignKey("exam_attempts.id", ondelete="CASCADE"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
+    attempt_id = Column(Integer, ForeignKey("exam_attempts.id", ondelete="CASCADE"), nullable=False, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
     
     answer_text = Column(Text, nullable=True)
     is_correct = Column(Boolean, nullable=True)
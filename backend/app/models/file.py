@@ -1,5 +1,5 @@
 """File model for uploaded documents"""
-from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, Float, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -7,6 +7,11 @@ from app.models.base import BaseModel
 class File(BaseModel):
     """File model"""
     __tablename__ = "files"
+    __table_args__ = (
+        # Keyset pagination of a folder's files: (folder_id, created_at, id);
+        # also serves plain folder_id lookups
+        Index("ix_files_folder_id_created_at", "folder_id", "created_at"),
+    )
     
     filename = Column(String(255), nullable=False)
     original_filename = Column(String(255), nullable=False)
@@ -17,7 +22,58 @@ class File(BaseModel):
     
     # Foreign keys
     folder_id = Column(Integer, ForeignKey("folders.id", ondelete="CASCADE"), nullable=True)
+    blob_id = Column(Integer, ForeignKey("blobs.id"), nullable=True, index=True)  # NULL for files stored before blobs
     
     # Relationships
     folder = relationship("Folder", back_populates="files")
+    blob = relationship("Blob", back_populates="files")
 
+
+class Blob(BaseModel):
+    """Stored file contents, addressed by SHA-256 and shared by identical files"""
+    __tablename__ = "blobs"
+    
+    sha256 = Column(String(64), nullable=False, unique=True)
+    size = Column(BigInteger, nullable=False)  # in bytes
+    path = Column(String(500), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # files pointing at this blob
+    
+    # Relationships
+    files = relationship("File", back_populates="blob")
+    text = relationship("BlobText", back_populates="blob", uselist=False, passive_deletes=True)
+
+
+class BlobText(BaseModel):
+    """Text extracted from a blob's document, once per distinct content"""
+    __tablename__ = "blob_texts"
+    
+    blob_id = Column(Integer, ForeignKey("blobs.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(String(20), nullable=False)  # done, failed, unsupported
+    text = Column(Text, nullable=True)
+    page_count = Column(Integer, nullable=True)  # pages, or slides; NULL for plain text
+    char_count = Column(Integer, nullable=False, default=0)
+    truncated = Column(Boolean, nullable=False, default=False)  # cut at EXTRACTION_MAX_CHARS
+    error = Column(String(500), nullable=True)
+    seconds = Column(Float, nullable=True)  # time the extraction took
+    
+    # Relationships
+    blob = relationship("Blob", back_populates="text")
+
+
+class UploadSession(BaseModel):
+    """A resumable upload in progress, its data so far in a partial file"""
+    __tablename__ = "upload_sessions"
+    __table_args__ = (
+        # Sweeps for stale sessions
+        Index("ix_upload_sessions_updated_at", "updated_at"),
+    )
+    
+    filename = Column(String(255), nullable=False)
+    file_type = Column(String(50), nullable=False)
+    mime_type = Column(String(100), nullable=True)
+    size = Column(BigInteger, nullable=False)  # declared total, in bytes
+    offset = Column(BigInteger, nullable=False, default=0)  # bytes received so far
+    path = Column(String(500), nullable=False)  # the partial file
+    
+    # Foreign keys
+    folder_id = Column(Integer, ForeignKey("folders.id", ondelete="CASCADE"), nullable=True)
@@ -1,5 +1,5 @@
 """Folder model for organizing exams"""
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, String, Text, Integer, BigInteger
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -12,6 +12,12 @@ class Folder(BaseModel):
     description = Column(Text, nullable=True)
     color = Column(String(50), default="#3B82F6")  # Default blue color
     
+    # Denormalized counters, maintained by the services in the same
+    # transaction as the exam/file write (see FolderRepository.adjust_counts)
+    exam_count = Column(Integer, default=0, server_default="0", nullable=False)
+    file_count = Column(Integer, default=0, server_default="0", nullable=False)
+    total_bytes = Column(BigInteger, default=0, server_default="0", nullable=False)
+    
     # Relationships
     exams = relationship("Exam", back_populates="folder", cascade="all, delete-orphan")
     files = relationship("File", back_populates="folder", cascade="all, delete-orphan")
@@ -1,12 +1,62 @@
 """Base repository with common CRUD operations"""
-from typing import Generic, TypeVar, Type, Optional, List
+import base64
+import json
+from datetime import datetime
+from typing import Generic, TypeVar, Type, Optional, List, Any, NamedTuple, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import select, insert, delete, func, tuple_, DateTime, Select
+from sqlalchemy.engine import Row
 from app.database.connection import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class Page(NamedTuple):
+    """A page of results and the cursor for the page after it"""
+    items: list
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, id: int) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, order, value, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str = "created_at", order: str = "asc") -> Tuple[Any, int]:
+    """Decode a cursor created by encode_cursor for the same ordering"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, value, id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    
+    if (cursor_sort_by, cursor_order) != (sort_by, order) or not isinstance(id, int):
+        raise InvalidCursorError("Cursor does not match the requested ordering")
+    return value, id
+
+
+def keyset_condition(sort_column, id_column, value: Any, id: int, descending: bool = False):
+    """Condition selecting the rows after (value, id) in (sort_column, id) order"""
+    if isinstance(sort_column.type, DateTime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (ValueError, TypeError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+    
+    # A row-value comparison (rather than the equivalent OR expansion) lets
+    # SQLite seek straight to the cursor position in a matching index
+    if descending:
+        return tuple_(sort_column, id_column) < tuple_(value, id)
+    return tuple_(sort_column, id_column) > tuple_(value, id)
+
+
 class BaseRepository(Generic[ModelType]):
     """Base repository with common CRUD operations"""
     
@@ -21,31 +71,123 @@ class BaseRepository(Generic[ModelType]):
         )
         return result.scalar_one_or_none()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        """Get all records with pagination"""
+    async def get_updated_at(self, id: int) -> Optional[datetime]:
+        """Get when a record was last modified, or None if it does not exist"""
+        result = await self.db.execute(
+            select(self.model.updated_at).where(self.model.id == id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_listing_state(self, *criteria) -> Row:
+        """Get the (count, last_modified) of the records matching ``criteria``
+        
+        Creating, updating or deleting a matching record changes at least
+        one of the two, so together they validate a cached listing.
+        """
         result = await self.db.execute(
-            select(self.model).offset(skip).limit(limit)
+            select(
+                func.count(self.model.id).label("count"),
+                func.max(self.model.updated_at).label("last_modified")
+            ).where(*criteria)
         )
-        return result.scalars().all()
+        return result.one()
+    
+    async def get_all(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        """Get all records with pagination"""
+        return await self.paginate(select(self.model), skip, limit, cursor)
+    
+    async def paginate(
+        self,
+        query: Select,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Run a query one page at a time in (created_at, id) order
+        
+        With a cursor the page starts right after the cursor's row (keyset
+        pagination, constant cost at any depth) and ``skip`` is ignored;
+        otherwise ``skip`` is applied as an OFFSET. Either way the returned
+        page carries the cursor for the next page, if there is one.
+        
+        A query for the entity returns ORM objects; a query for a list of
+        columns returns plain rows, which must include ``created_at`` and
+        ``id``.
+        """
+        query = query.order_by(self.model.created_at, self.model.id)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.where(
+                keyset_condition(self.model.created_at, self.model.id, created_at, last_id)
+            )
+        elif skip:
+            query = query.offset(skip)
+        
+        # One extra row tells us whether another page exists
+        result = await self.db.execute(query.limit(limit + 1))
+        if query.column_descriptions[0]["type"] is self.model:
+            items = result.scalars().all()
+        else:
+            items = result.all()
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor("created_at", "asc", last.created_at, last.id)
+        
+        return Page(items, next_cursor)
     
-    async def create(self, obj: ModelType) -> ModelType:
-        """Create a new record"""
+    async def create(self, obj: ModelType, commit: bool = True) -> ModelType:
+        """Create a new record
+        
+        With ``commit=False`` the record is only flushed (so its id is
+        assigned) and the caller commits it together with later writes.
+        """
         self.db.add(obj)
+        if not commit:
+            await self.db.flush()
+            return obj
         await self.db.commit()
         await self.db.refresh(obj)
         return obj
     
+    async def create_many(self, rows: List[dict], commit: bool = True) -> List[ModelType]:
+        """Create several records from column dicts in one transaction
+        
+        Rows are sent as multi-row INSERT ... RETURNING statements, so the
+        generated ids and defaults come back without a per-row refresh.
+        Records are returned in the order of ``rows``.
+        """
+        if not rows:
+            if commit:
+                await self.db.commit()
+            return []
+        
+        result = await self.db.execute(insert(self.model).returning(self.model), rows)
+        # RETURNING order is unspecified, but ids are allocated in insertion
+        # order within a statement, so sorting by id restores input order
+        objs = sorted(result.scalars().all(), key=lambda obj: obj.id)
+        if commit:
+            await self.db.commit()
+        return objs
+    
+    async def insert_many(self, rows: List[dict]) -> None:
+        """Insert records from column dicts without loading them back or committing"""
+        if rows:
+            await self.db.execute(insert(self.model), rows)
+    
     async def update(self, obj: ModelType) -> ModelType:
         """Update a record"""
         await self.db.commit()
         await self.db.refresh(obj)
         return obj
     
-    async def delete(self, id: int) -> bool:
+    async def delete(self, id: int, commit: bool = True) -> bool:
         """Delete a record by ID"""
         result = await self.db.execute(
             delete(self.model).where(self.model.id == id)
         )
-        await self.db.commit()
+        if commit:
+            await self.db.commit()
         return result.rowcount > 0
-
@@ -1,15 +1,24 @@
 """Exam repository"""
-from typing import List, Optional
-from sqlalchemy import select, func
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from sqlalchemy import select, update, delete, func, bindparam
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.exam import Exam, Question, ExamAttempt, Answer
-from app.repositories.base import BaseRepository
+from app.models.exam import Exam, ExamPaper, Question, ExamAttempt, Answer
+from app.repositories.base import BaseRepository, Page, decode_cursor, encode_cursor, keyset_condition
 
 
 class ExamRepository(BaseRepository[Exam]):
     """Exam repository"""
     
+    # What the exam listing shows (ExamListResponse), without the counts
+    list_columns = (
+        Exam.id, Exam.title, Exam.description, Exam.duration, Exam.total_marks,
+        Exam.is_published, Exam.folder_id, Exam.created_at,
+    )
+    
     def __init__(self, db: AsyncSession):
         super().__init__(Exam, db)
     
@@ -19,43 +28,265 @@ class ExamRepository(BaseRepository[Exam]):
             select(self.model)
             .options(selectinload(self.model.questions))
             .where(self.model.id == id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_version(self, id: int) -> Optional[int]:
+        """Get the current version of an exam, or None if it does not exist"""
+        result = await self.db.execute(
+            select(self.model.version).where(self.model.id == id)
         )
         return result.scalar_one_or_none()
     
-    async def get_all_with_counts(self, skip: int = 0, limit: int = 100) -> List[dict]:
-        """Get all exams with question and attempt counts"""
-        exams = await self.get_all(skip, limit)
+    async def get_revision(self, id: int) -> Optional[Row]:
+        """Get the (created_at, version) of an exam, or None if it does not exist"""
+        result = await self.db.execute(
+            select(self.model.created_at, self.model.version).where(self.model.id == id)
+        )
+        return result.one_or_none()
+    
+    async def get_state(self, id: int) -> Optional[Row]:
+        """Get the (version, updated_at) of an exam, or None if it does not exist"""
+        result = await self.db.execute(
+            select(self.model.version, self.model.updated_at).where(self.model.id == id)
+        )
+        return result.one_or_none()
+    
+    async def get_published_ids(self) -> List[int]:
+        """Get the IDs of all published exams"""
+        result = await self.db.execute(
+            select(self.model.id).where(self.model.is_published == True)
+        )
+        return result.scalars().all()
+    
+    async def bump_version(self, id: int) -> None:
+        """Increment an exam's version without committing"""
+        await self.db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(version=self.model.version + 1)
+        )
+    
+    async def move_out_of_folder(self, folder_id: int) -> List[Row]:
+        """Take every exam out of a folder and bump their versions, uncommitted
         
-        result = []
-        for exam in exams:
-            # Count questions
-            question_count_result = await self.db.execute(
-                select(func.count(Question.id)).where(Question.exam_id == exam.id)
+        Done before deleting a folder rather than left to the foreign key's
+        ON DELETE SET NULL, which would change the exams without changing
+        their version or updated_at. Returns the (id, created_at, version)
+        of the exams moved, as they were before.
+        """
+        result = await self.db.execute(
+            select(self.model.id, self.model.created_at, self.model.version)
+            .where(self.model.folder_id == folder_id)
+        )
+        moved = result.all()
+        if moved:
+            await self.db.execute(
+                update(self.model)
+                .where(self.model.folder_id == folder_id)
+                .values(folder_id=None, version=self.model.version + 1)
             )
-            question_count = question_count_result.scalar() or 0
-            
-            # Count attempts
-            attempt_count_result = await self.db.execute(
-                select(func.count(ExamAttempt.id)).where(ExamAttempt.exam_id == exam.id)
+        return moved
+    
+    async def add_marks(self, marks: Dict[int, float]) -> None:
+        """Add to the total marks of several exams and bump their versions
+        
+        ``marks`` maps exam IDs to the marks to add (0 to only bump the
+        version); all exams are updated in one executemany, uncommitted.
+        """
+        if not marks:
+            return
+        exams = self.model.__table__
+        await self.db.execute(
+            update(exams)
+            .where(exams.c.id == bindparam("exam_id"))
+            .values(total_marks=exams.c.total_marks + bindparam("marks"), version=exams.c.version + 1),
+            [{"exam_id": id, "marks": value} for id, value in marks.items()]
+        )
+    
+    async def get_next_orders(self, ids: Iterable[int]) -> Dict[int, int]:
+        """Map each existing exam in ``ids`` to the order after its last question"""
+        last_order = (
+            select(func.max(Question.order))
+            .where(Question.exam_id == self.model.id)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(self.model.id, func.coalesce(last_order + 1, 0))
+            .where(self.model.id.in_(ids))
+        )
+        return dict(result.all())
+    
+    async def get_all_with_counts(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        folder_id: Optional[int] = None,
+        is_published: Optional[bool] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        order: str = "asc",
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Get exams with question and attempt counts in a single query
+        
+        Returns plain rows of ``list_columns`` plus question_count and
+        attempt_count, not ORM objects. Pages are keyed on (sort column,
+        id); see BaseRepository.paginate.
+        """
+        # Aggregate each child table once and join the totals onto the exam
+        # rows, so the statement count stays at one regardless of page size.
+        question_totals = (
+            select(Question.exam_id, func.count(Question.id).label("total"))
+            .group_by(Question.exam_id)
+            .subquery()
+        )
+        attempt_totals = (
+            select(ExamAttempt.exam_id, func.count(ExamAttempt.id).label("total"))
+            .group_by(ExamAttempt.exam_id)
+            .subquery()
+        )
+        question_count = func.coalesce(question_totals.c.total, 0).label("question_count")
+        attempt_count = func.coalesce(attempt_totals.c.total, 0).label("attempt_count")
+        
+        columns = [*self.list_columns, question_count, attempt_count]
+        if sort_by == "updated_at":
+            # Only needed for the next page's cursor
+            columns.append(self.model.updated_at)
+        
+        query = (
+            select(*columns)
+            .outerjoin(question_totals, question_totals.c.exam_id == self.model.id)
+            .outerjoin(attempt_totals, attempt_totals.c.exam_id == self.model.id)
+        )
+        query = query.where(*self._list_filters(folder_id, is_published, search))
+        
+        sort_columns = {
+            "created_at": self.model.created_at,
+            "updated_at": self.model.updated_at,
+            "title": self.model.title,
+            "question_count": question_count,
+            "attempt_count": attempt_count,
+        }
+        sort_column = sort_columns[sort_by]
+        descending = order == "desc"
+        if descending:
+            query = query.order_by(sort_column.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), self.model.id.asc())
+        
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_by, order)
+            query = query.where(
+                keyset_condition(sort_column, self.model.id, value, last_id, descending)
             )
-            attempt_count = attempt_count_result.scalar() or 0
-            
-            result.append({
-                "exam": exam,
-                "question_count": question_count,
-                "attempt_count": attempt_count
-            })
+        elif skip:
+            query = query.offset(skip)
         
-        return result
+        result = await self.db.execute(query.limit(limit + 1))
+        rows = result.all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+        
+        return Page(rows, next_cursor)
     
-    async def get_by_folder(self, folder_id: Optional[int], skip: int = 0, limit: int = 100) -> List[Exam]:
+    async def get_listing_state_with_counts(
+        self,
+        folder_id: Optional[int] = None,
+        is_published: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Row:
+        """Get the (count, last_modified, last_attempt_id) of an exam listing
+        
+        Question edits bump the exam's updated_at, while new attempts only
+        show up as a higher attempt ID (the newest one, found in the
+        primary key index).
+        """
+        last_attempt_id = select(func.max(ExamAttempt.id)).scalar_subquery()
+        result = await self.db.execute(
+            select(
+                func.count(self.model.id).label("count"),
+                func.max(self.model.updated_at).label("last_modified"),
+                last_attempt_id.label("last_attempt_id")
+            ).where(*self._list_filters(folder_id, is_published, search))
+        )
+        return result.one()
+    
+    def _list_filters(
+        self,
+        folder_id: Optional[int],
+        is_published: Optional[bool],
+        search: Optional[str]
+    ) -> list:
+        """Conditions of the exam listing filters"""
+        criteria = []
+        if folder_id is not None:
+            criteria.append(self.model.folder_id == folder_id)
+        if is_published is not None:
+            criteria.append(self.model.is_published == is_published)
+        if search:
+            criteria.append(self.model.title.icontains(search, autoescape=True))
+        return criteria
+    
+    async def get_by_folder(
+        self,
+        folder_id: Optional[int],
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get exams by folder"""
         query = select(self.model)
         if folder_id:
             query = query.where(self.model.folder_id == folder_id)
         
-        result = await self.db.execute(query.offset(skip).limit(limit))
-        return result.scalars().all()
+        return await self.paginate(query, skip, limit, cursor)
+
+
+class ExamPaperRepository(BaseRepository[ExamPaper]):
+    """Exam paper repository"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(ExamPaper, db)
+    
+    async def get_current(self, exam_id: int) -> Optional[Row]:
+        """Get the stored paper bodies of a published exam
+        
+        Returns a plain (content, content_gzip) row, without loading any
+        ORM objects, or None if the exam is not published or the paper
+        was rendered from an older version of the exam.
+        """
+        result = await self.db.execute(
+            select(self.model.content, self.model.content_gzip)
+            .join(Exam, Exam.id == self.model.exam_id)
+            .where(
+                self.model.exam_id == exam_id,
+                self.model.version == Exam.version,
+                Exam.is_published == True
+            )
+        )
+        return result.one_or_none()
+    
+    async def save(self, exam_id: int, version: int, content: bytes, content_gzip: Optional[bytes]) -> None:
+        """Store the paper of an exam, replacing any older one"""
+        now = datetime.utcnow()
+        values = {"version": version, "content": content, "content_gzip": content_gzip, "updated_at": now}
+        await self.db.execute(
+            insert(self.model)
+            .values(exam_id=exam_id, created_at=now, **values)
+            .on_conflict_do_update(index_elements=[self.model.exam_id], set_=values)
+        )
+        await self.db.commit()
+    
+    async def delete_by_exam(self, exam_id: int) -> None:
+        """Delete the paper of an exam"""
+        await self.db.execute(delete(self.model).where(self.model.exam_id == exam_id))
+        await self.db.commit()
 
 
 class QuestionRepository(BaseRepository[Question]):
@@ -72,11 +303,31 @@ class QuestionRepository(BaseRepository[Question]):
             .order_by(self.model.order)
         )
         return result.scalars().all()
+    
+    async def get_last_id(self) -> int:
+        """Get the highest question ID, or 0 if there are no questions"""
+        result = await self.db.execute(select(func.coalesce(func.max(self.model.id), 0)))
+        return result.scalar_one()
 
 
 class ExamAttemptRepository(BaseRepository[ExamAttempt]):
     """Exam attempt repository"""
     
+    # What attempt listings show (ExamAttemptListResponse)
+    list_columns = (
+        ExamAttempt.id, ExamAttempt.exam_id, ExamAttempt.student_name, ExamAttempt.status,
+        ExamAttempt.score, ExamAttempt.percentage, ExamAttempt.passed, ExamAttempt.created_at,
+    )
+    
+    # One row per answer of an export, attempt columns first
+    export_columns = (
+        ExamAttempt.id.label("attempt_id"), ExamAttempt.student_name, ExamAttempt.student_email,
+        ExamAttempt.status, ExamAttempt.score, ExamAttempt.percentage, ExamAttempt.passed,
+        ExamAttempt.started_at, ExamAttempt.completed_at, ExamAttempt.created_at,
+        Answer.id.label("answer_id"), Answer.question_id, Answer.answer_text,
+        Answer.is_correct, Answer.marks_obtained,
+    )
+    
     def __init__(self, db: AsyncSession):
         super().__init__(ExamAttempt, db)
     
@@ -89,15 +340,71 @@ class ExamAttemptRepository(BaseRepository[ExamAttempt]):
         )
         return result.scalar_one_or_none()
     
-    async def get_by_exam(self, exam_id: int, skip: int = 0, limit: int = 100) -> List[ExamAttempt]:
-        """Get attempts by exam ID"""
+    async def complete(
+        self,
+        id: int,
+        score: float,
+        percentage: float,
+        passed: bool,
+        completed_at: str
+    ) -> bool:
+        """Mark an attempt completed without committing
+        
+        The status check is part of the UPDATE, so of two concurrent
+        submissions only one succeeds; returns False for the other.
+        """
         result = await self.db.execute(
-            select(self.model)
+            update(self.model)
+            .where(self.model.id == id, self.model.status != "completed")
+            .values(
+                status="completed",
+                score=score,
+                percentage=percentage,
+                passed=passed,
+                completed_at=completed_at
+            )
+        )
+        return result.rowcount > 0
+    
+    async def get_by_exam(
+        self,
+        exam_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get attempts by exam ID as plain rows of ``list_columns``"""
+        return await self.paginate(
+            select(*self.list_columns).where(self.model.exam_id == exam_id),
+            skip, limit, cursor
+        )
+    
+    async def stream_with_answers(self, exam_id: int, batch_size: int = 1000) -> AsyncIterator[List[Row]]:
+        """Stream an exam's attempts joined with their answers, in batches
+        
+        Yields lists of up to ``batch_size`` rows of ``export_columns``:
+        one per answer, or one with NULL answer columns for an attempt
+        without answers. Rows of an attempt are consecutive. The rows come
+        from a server-side cursor, and the ordering follows the
+        (exam_id, created_at) index, so SQLite never sorts or buffers the
+        whole result.
+        """
+        result = await self.db.stream(
+            select(*self.export_columns)
+            .outerjoin(Answer, Answer.attempt_id == self.model.id)
             .where(self.model.exam_id == exam_id)
-            .offset(skip)
-            .limit(limit)
+            .order_by(self.model.created_at, self.model.id, Answer.id)
+            .execution_options(yield_per=batch_size)
         )
-        return result.scalars().all()
+        async for batch in result.partitions():
+            yield batch
+    
+    async def get_recent(self, limit: int = 5) -> List[Row]:
+        """Get the newest attempts as plain rows of ``list_columns``"""
+        result = await self.db.execute(
+            select(*self.list_columns).order_by(self.model.created_at.desc()).limit(limit)
+        )
+        return result.all()
 
 
 class AnswerRepository(BaseRepository[Answer]):
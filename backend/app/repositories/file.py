@@ -1,25 +1,227 @@
 """File repository"""
-from typing import List, Optional
-from sqlalchemy import select
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+from sqlalchemy import select, update, delete, func, bindparam
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.file import File
-from app.repositories.base import BaseRepository
+from app.models.file import File, Blob, BlobText, UploadSession
+from app.repositories.base import BaseRepository, Page
 
 
 class FileRepository(BaseRepository[File]):
     """File repository"""
     
+    # What file listings show (FileResponse)
+    list_columns = (
+        File.id, File.filename, File.original_filename, File.file_path, File.file_type,
+        File.file_size, File.mime_type, File.folder_id, File.created_at,
+    )
+    
     def __init__(self, db: AsyncSession):
         super().__init__(File, db)
     
-    async def get_by_folder(self, folder_id: Optional[int], skip: int = 0, limit: int = 100) -> List[File]:
-        """Get files by folder"""
-        query = select(self.model)
+    async def get_by_folder(
+        self,
+        folder_id: Optional[int],
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """Get files by folder as plain rows of ``list_columns``"""
+        query = select(*self.list_columns).where(self.folder_filter(folder_id))
+        return await self.paginate(query, skip, limit, cursor)
+    
+    async def get_by_folder_for_delete(self, folder_id: int) -> List[Row]:
+        """Get the (blob_id, file_path) of every file in a folder"""
+        result = await self.db.execute(
+            select(self.model.blob_id, self.model.file_path).where(self.model.folder_id == folder_id)
+        )
+        return result.all()
+    
+    async def get_content(self, file_id: int) -> Optional[Row]:
+        """Get what serving a file's contents takes, with its blob's SHA-256"""
+        result = await self.db.execute(
+            select(
+                self.model.id, self.model.original_filename, self.model.file_path,
+                self.model.file_type, self.model.file_size, self.model.created_at, Blob.sha256
+            )
+            .outerjoin(Blob, self.model.blob_id == Blob.id)
+            .where(self.model.id == file_id)
+        )
+        return result.one_or_none()
+    
+    async def get_legacy(self) -> List[File]:
+        """Get the files stored before the blob store, outside of it"""
+        result = await self.db.execute(
+            select(self.model).where(self.model.blob_id.is_(None)).order_by(self.model.id)
+        )
+        return result.scalars().all()
+    
+    def folder_filter(self, folder_id: Optional[int]):
+        """Condition selecting the files of a folder, or of no folder"""
         if folder_id:
-            query = query.where(self.model.folder_id == folder_id)
-        else:
-            query = query.where(self.model.folder_id.is_(None))
+            return self.model.folder_id == folder_id
+        return self.model.folder_id.is_(None)
+
+
+class BlobRepository(BaseRepository[Blob]):
+    """Blob repository"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(Blob, db)
+    
+    async def acquire(self, sha256: str, size: int, path: str) -> Row:
+        """Take a reference to the blob with this hash, creating it if needed
+        
+        Returns its (id, path, ref_count); a ref_count of 1 means the blob
+        is new and its contents still have to be put at ``path``. Not
+        committed.
+        """
+        now = datetime.utcnow()
+        statement = (
+            insert(self.model)
+            .values(sha256=sha256, size=size, path=path, ref_count=1, created_at=now, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[self.model.sha256],
+                set_={"ref_count": self.model.ref_count + 1, "updated_at": now}
+            )
+            .returning(self.model.id, self.model.path, self.model.ref_count)
+        )
+        return (await self.db.execute(statement)).one()
+    
+    async def release(self, ids: Iterable[int]) -> List[str]:
+        """Drop one reference per ID, deleting blobs left with none
+        
+        Returns the paths of the deleted blobs. Not committed.
+        """
+        counts = Counter(ids)
+        if not counts:
+            return []
+        
+        blobs = self.model.__table__
+        await self.db.execute(
+            update(blobs)
+            .where(blobs.c.id == bindparam("blob_id"))
+            .values(ref_count=blobs.c.ref_count - bindparam("count")),
+            [{"blob_id": id, "count": count} for id, count in counts.items()]
+        )
+        result = await self.db.execute(
+            delete(blobs)
+            .where(blobs.c.id.in_(counts), blobs.c.ref_count <= 0)
+            .returning(blobs.c.path)
+        )
+        return result.scalars().all()
+    
+    async def get_usage(self) -> Row:
+        """Get (files, blobs, logical_bytes, blob_bytes, legacy_files, legacy_bytes)"""
+        result = await self.db.execute(
+            select(
+                select(func.count(File.id)).scalar_subquery().label("files"),
+                select(func.count(self.model.id)).scalar_subquery().label("blobs"),
+                select(func.coalesce(func.sum(File.file_size), 0)).scalar_subquery().label("logical_bytes"),
+                select(func.coalesce(func.sum(self.model.size), 0)).scalar_subquery().label("blob_bytes"),
+                select(func.count(File.id)).where(File.blob_id.is_(None)).scalar_subquery().label("legacy_files"),
+                select(func.coalesce(func.sum(File.file_size), 0))
+                .where(File.blob_id.is_(None)).scalar_subquery().label("legacy_bytes"),
+            )
+        )
+        return result.one()
+
+
+class UploadSessionRepository(BaseRepository[UploadSession]):
+    """Upload session repository"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(UploadSession, db)
+    
+    async def advance(self, id: int, offset: int, received: int) -> bool:
+        """Record ``received`` more bytes of a session that is at ``offset``
         
-        result = await self.db.execute(query.offset(skip).limit(limit))
+        Returns False if the session is gone or has moved on. Not committed.
+        """
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id == id, self.model.offset == offset)
+            .values(offset=offset + received, updated_at=datetime.utcnow())
+        )
+        return result.rowcount > 0
+    
+    async def set_offset(self, id: int, offset: int) -> None:
+        """Move a session back to what its partial file actually holds; not committed"""
+        await self.db.execute(
+            update(self.model).where(self.model.id == id).values(offset=offset, updated_at=datetime.utcnow())
+        )
+    
+    async def delete_stale(self, before: datetime) -> List[str]:
+        """Delete sessions idle since before a time, returning their partial files
+        
+        Not committed.
+        """
+        result = await self.db.execute(
+            delete(self.model).where(self.model.updated_at < before).returning(self.model.path)
+        )
+        return result.scalars().all()
+    
+    async def get_paths(self) -> List[str]:
+        """Get the partial file of every session"""
+        result = await self.db.execute(select(self.model.path))
         return result.scalars().all()
 
+
+class BlobTextRepository(BaseRepository[BlobText]):
+    """Repository of text extracted from blobs"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(BlobText, db)
+    
+    async def get_source(self, blob_id: int, types: Sequence[str]) -> Optional[Row]:
+        """Get a blob's (path, file_type, status), the type from a file of ``types`` using it
+        
+        ``status`` is that of any earlier extraction, else None. Returns
+        None if no such file uses the blob.
+        """
+        result = await self.db.execute(
+            select(Blob.path, File.file_type, self.model.status)
+            .join(File, File.blob_id == Blob.id)
+            .outerjoin(self.model, self.model.blob_id == Blob.id)
+            .where(Blob.id == blob_id, File.file_type.in_(types))
+            .limit(1)
+        )
+        return result.first()
+    
+    async def get_unextracted(self, types: Sequence[str], retry_failed: bool = False) -> List[int]:
+        """Get the blobs of files of ``types`` that have no extracted text yet"""
+        pending = self.model.id.is_(None)
+        if retry_failed:
+            pending = pending | (self.model.status == "failed")
+        result = await self.db.execute(
+            select(File.blob_id)
+            .outerjoin(self.model, self.model.blob_id == File.blob_id)
+            .where(File.blob_id.is_not(None), File.file_type.in_(types), pending)
+            .distinct()
+            .order_by(File.blob_id)
+        )
+        return result.scalars().all()
+    
+    async def save(self, blob_id: int, **values) -> None:
+        """Store the outcome of an extraction, replacing any earlier one; not committed"""
+        now = datetime.utcnow()
+        await self.db.execute(
+            insert(self.model)
+            .values(blob_id=blob_id, created_at=now, updated_at=now, **values)
+            .on_conflict_do_update(index_elements=[self.model.blob_id], set_={**values, "updated_at": now})
+        )
+    
+    async def get_for_file(self, file_id: int) -> Optional[Row]:
+        """Get a file's (file_type, blob_id) with the text extracted from its blob, if any"""
+        result = await self.db.execute(
+            select(
+                File.file_type, File.blob_id, self.model.status, self.model.text, self.model.page_count,
+                self.model.char_count, self.model.truncated, self.model.seconds, self.model.error
+            )
+            .outerjoin(self.model, self.model.blob_id == File.blob_id)
+            .where(File.id == file_id)
+        )
+        return result.first()
@@ -1,6 +1,6 @@
 """Folder repository"""
-from typing import List
-from sqlalchemy import select, func
+from typing import Optional
+from sqlalchemy import select, update, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.folder import Folder
 from app.models.exam import Exam
@@ -14,30 +14,63 @@ class FolderRepository(BaseRepository[Folder]):
     def __init__(self, db: AsyncSession):
         super().__init__(Folder, db)
     
-    async def get_all_with_counts(self, skip: int = 0, limit: int = 100) -> List[dict]:
-        """Get all folders with exam and file counts"""
-        # Get folders
-        folders = await self.get_all(skip, limit)
+    async def adjust_counts(
+        self,
+        folder_id: Optional[int],
+        exams: int = 0,
+        files: int = 0,
+        size: int = 0
+    ) -> bool:
+        """Apply deltas to a folder's counters without committing
         
-        result = []
-        for folder in folders:
-            # Count exams
-            exam_count_result = await self.db.execute(
-                select(func.count(Exam.id)).where(Exam.folder_id == folder.id)
-            )
-            exam_count = exam_count_result.scalar() or 0
-            
-            # Count files
-            file_count_result = await self.db.execute(
-                select(func.count(File.id)).where(File.folder_id == folder.id)
+        Callers run this before the commit of the exam/file write it
+        accounts for, so both land in the same transaction. Returns False
+        if the folder does not exist.
+        """
+        if folder_id is None:
+            return True
+        
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id == folder_id)
+            .values(
+                exam_count=self.model.exam_count + exams,
+                file_count=self.model.file_count + files,
+                total_bytes=self.model.total_bytes + size
             )
-            file_count = file_count_result.scalar() or 0
-            
-            result.append({
-                "folder": folder,
-                "exam_count": exam_count,
-                "file_count": file_count
-            })
+        )
+        return result.rowcount > 0
+    
+    async def rebuild_counts(self) -> int:
+        """Recompute every folder's counters from the exams and files tables
         
-        return result
-
+        Returns the number of folders whose counters were out of date.
+        """
+        exam_count = (
+            select(func.count(Exam.id))
+            .where(Exam.folder_id == self.model.id)
+            .scalar_subquery()
+        )
+        file_count = (
+            select(func.count(File.id))
+            .where(File.folder_id == self.model.id)
+            .scalar_subquery()
+        )
+        total_bytes = (
+            select(func.coalesce(func.sum(File.file_size), 0))
+            .where(File.folder_id == self.model.id)
+            .scalar_subquery()
+        )
+        
+        result = await self.db.execute(
+            update(self.model)
+            .where(or_(
+                self.model.exam_count != exam_count,
+                self.model.file_count != file_count,
+                self.model.total_bytes != total_bytes
+            ))
+            .values(exam_count=exam_count, file_count=file_count, total_bytes=total_bytes)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
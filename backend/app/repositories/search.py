@@ -0,0 +1,166 @@
+"""Search index repository
+
+The index is an SQLite FTS5 table, search_index, with one row per exam
+and per question (see migrations.create_search_index). Questions are
+stored under their id as rowid and exams under EXAM_ROWID_BASE + id, so
+every row is found by rowid: keeping it in step costs a B-tree lookup,
+never a scan.
+
+Rows are always copied from the exams and questions tables within the
+caller's transaction, so the index commits or rolls back with the edit;
+pending ORM changes must be flushed first.
+"""
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import column, delete, func, insert, literal_column, select, table, text
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.exam import Exam, Question
+
+search_index = table("search_index", column("rowid"), column("title"), column("body"))
+
+# Above any question id, so that in rowid order every exam comes after
+# the newest question
+EXAM_ROWID_BASE = 1 << 60
+
+# Text of a question's options (a JSON list), one per line
+OPTIONS_TEXT = func.coalesce(
+    select(func.group_concat(literal_column("value"), "\n"))
+    .select_from(func.json_each(Question.options))
+    .scalar_subquery(),
+    ""
+)
+
+
+class SearchRepository:
+    """Search index repository"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def index_exam(self, exam_id: int, with_questions: bool = False) -> None:
+        """Index (or re-index) an exam, and optionally its questions, uncommitted"""
+        await self._index_exams(Exam.id == exam_id)
+        if with_questions:
+            await self._index_questions(Question.exam_id == exam_id)
+    
+    async def index_exams(self, exam_ids: Iterable[int]) -> None:
+        """Index (or re-index) exams, uncommitted"""
+        await self._index_exams(Exam.id.in_(list(exam_ids)))
+    
+    async def index_questions(self, question_ids: Iterable[int]) -> None:
+        """Index (or re-index) questions, uncommitted"""
+        await self._index_questions(Question.id.in_(list(question_ids)))
+    
+    async def index_questions_after(self, question_id: int) -> None:
+        """Index the questions with higher ids, i.e. inserted since, uncommitted"""
+        await self._index_questions(Question.id > question_id)
+    
+    async def _index_exams(self, *criteria) -> None:
+        await self.db.execute(
+            insert(search_index).prefix_with("OR REPLACE").from_select(
+                ["rowid", "title", "body"],
+                select(EXAM_ROWID_BASE + Exam.id, Exam.title, func.coalesce(Exam.description, "")).where(*criteria)
+            )
+        )
+    
+    async def _index_questions(self, *criteria) -> None:
+        await self.db.execute(
+            insert(search_index).prefix_with("OR REPLACE").from_select(
+                ["rowid", "title", "body"],
+                select(Question.id, Question.question_text, OPTIONS_TEXT).where(*criteria)
+            )
+        )
+    
+    async def remove_exam(self, exam_id: int) -> None:
+        """Remove an exam and its questions from the index, uncommitted
+        
+        Must run before the exam is deleted, while its questions can still
+        be found.
+        """
+        await self.db.execute(delete(search_index).where(search_index.c.rowid == EXAM_ROWID_BASE + exam_id))
+        await self.db.execute(
+            delete(search_index)
+            .where(search_index.c.rowid.in_(select(Question.id).where(Question.exam_id == exam_id)))
+        )
+    
+    async def remove_questions(self, question_ids: Iterable[int]) -> None:
+        """Remove questions from the index, uncommitted"""
+        await self.db.execute(delete(search_index).where(search_index.c.rowid.in_(list(question_ids))))
+    
+    async def rebuild(self) -> None:
+        """Index every exam and question from scratch, and commit"""
+        await self.db.execute(delete(search_index))
+        await self._index_exams()
+        await self._index_questions()
+        # Merge the index into one segment, the fastest layout to query
+        await self.db.execute(text("INSERT INTO search_index(search_index) VALUES ('optimize')"))
+        await self.db.commit()
+    
+    async def search(
+        self,
+        query: str,
+        type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20,
+        max_ranked: int = 10000,
+        snippet_tokens: int = 16,
+        marks: Tuple[str, str] = ("<mark>", "</mark>")
+    ) -> List[Row]:
+        """Get a page of matches for an FTS5 query, best first
+        
+        Returns (rowid, score, snippet) rows; rowids from EXAM_ROWID_BASE
+        up are exams. Scores are BM25, lower is better, weighted towards
+        titles and question texts (see migrations.create_search_index).
+        
+        BM25 scores every match before any can be returned, which for a
+        word found in most of a large bank takes seconds. So only the
+        newest ``max_ranked`` matches are ranked: all of them for any
+        selective query, and every matching exam plus the latest questions
+        for the rest.
+        """
+        criteria = [literal_column("search_index").op("MATCH")(query)]
+        if type == "exam":
+            criteria.append(search_index.c.rowid >= EXAM_ROWID_BASE)
+        elif type == "question":
+            criteria.append(search_index.c.rowid < EXAM_ROWID_BASE)
+        
+        # Walking matches in rowid order is cheap: no scoring, no sorting
+        result = await self.db.execute(
+            select(search_index.c.rowid)
+            .where(*criteria)
+            .order_by(search_index.c.rowid.desc())
+            .offset(max_ranked - 1)
+            .limit(1)
+        )
+        oldest_ranked = result.scalar_one_or_none()
+        if oldest_ranked is not None:
+            criteria.append(search_index.c.rowid >= oldest_ranked)
+        
+        result = await self.db.execute(
+            select(
+                search_index.c.rowid,
+                literal_column("rank").label("score"),
+                func.snippet(literal_column("search_index"), -1, marks[0], marks[1], "…", snippet_tokens)
+                .label("snippet")
+            )
+            .where(*criteria)
+            .order_by(literal_column("rank"))
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.all()
+    
+    async def get_exams(self, exam_ids: Iterable[int]) -> List[Row]:
+        """Get the (id, title, is_published, folder_id) of exams"""
+        result = await self.db.execute(
+            select(Exam.id, Exam.title, Exam.is_published, Exam.folder_id).where(Exam.id.in_(list(exam_ids)))
+        )
+        return result.all()
+    
+    async def get_questions(self, question_ids: Iterable[int]) -> List[Row]:
+        """Get the (id, exam_id, question_type, question_text) of questions"""
+        result = await self.db.execute(
+            select(Question.id, Question.exam_id, Question.question_type, Question.question_text)
+            .where(Question.id.in_(list(question_ids)))
+        )
+        return result.all()
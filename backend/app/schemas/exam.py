@@ -1,5 +1,5 @@
 """Exam schemas"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Any
 from datetime import datetime
 
@@ -192,3 +192,43 @@ class ExamAttemptListResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+# Import Schemas
+class QuestionImportRow(QuestionCreate):
+    """One row of a question bank import
+    
+    A row names an existing exam by ``exam_id`` or a new draft exam by
+    ``exam_title``; rows with the same title go into the same new exam,
+    which takes its description and duration from its first row.
+    """
+    exam_id: Optional[int] = None
+    exam_title: Optional[str] = Field(None, min_length=1, max_length=255)
+    exam_description: Optional[str] = None
+    exam_duration: Optional[int] = Field(None, ge=1)
+    
+    @model_validator(mode="after")
+    def check_exam(self) -> "QuestionImportRow":
+        if (self.exam_id is None) == (self.exam_title is None):
+            raise ValueError("exactly one of exam_id and exam_title is required")
+        return self
+
+
+class ImportRowError(BaseModel):
+    """A rejected import row and why"""
+    line: int
+    errors: List[str]
+
+
+class ImportReport(BaseModel):
+    """Outcome of a question bank import"""
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    exams_created: int = 0
+    exams_updated: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False  # more rows failed than IMPORT_MAX_ERRORS
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    peak_memory_bytes: int = 0  # high-water mark of the whole process
@@ -1,6 +1,6 @@
 """File schemas"""
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -25,3 +25,61 @@ class FileUploadResponse(BaseModel):
     message: str
     file: FileResponse
 
+
+class BatchUploadResult(BaseModel):
+    """Outcome of one file of a batch upload"""
+    filename: str
+    file: Optional[FileResponse] = None  # set when it was stored
+    error: Optional[str] = None  # set when it was rejected
+
+
+class BatchUploadResponse(BaseModel):
+    """Schema for batch upload response, with a result per file in request order"""
+    uploaded: int
+    rejected: int
+    results: List[BatchUploadResult]
+
+
+class StorageReport(BaseModel):
+    """Disk usage of uploaded files and the space saved by sharing blobs"""
+    files: int
+    blobs: int  # distinct contents stored
+    legacy_files: int  # files stored before blobs, one copy each
+    logical_bytes: int  # total size of all files
+    stored_bytes: int  # what they take on disk
+    saved_bytes: int
+    dedup_ratio: float  # logical_bytes / stored_bytes
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema for starting a resumable upload"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., ge=0)  # total size of the file, in bytes
+    content_type: Optional[str] = Field(None, max_length=100)
+    folder_id: Optional[int] = None
+
+
+class UploadSessionResponse(BaseModel):
+    """Schema for a resumable upload in progress"""
+    id: int
+    filename: str
+    size: int
+    offset: int  # bytes received; the next chunk starts here
+    folder_id: Optional[int]
+    created_at: datetime
+    expires_at: datetime  # when it is discarded unless more data arrives
+    
+    class Config:
+        from_attributes = True
+
+
+class FileTextResponse(BaseModel):
+    """Schema for the text extracted from a file"""
+    file_id: int
+    status: str  # pending, done, failed or unsupported
+    page_count: Optional[int] = None
+    char_count: int = 0
+    truncated: bool = False
+    seconds: Optional[float] = None  # time the extraction took
+    error: Optional[str] = None
+    text: Optional[str] = None
@@ -30,6 +30,7 @@ class FolderResponse(FolderBase):
     updated_at: datetime
     exam_count: int = 0
     file_count: int = 0
+    total_bytes: int = 0
     
     class Config:
         from_attributes = True
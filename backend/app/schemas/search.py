@@ -0,0 +1,24 @@
+"""Search schemas"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SearchResult(BaseModel):
+    """An exam or question matching a search"""
+    type: str  # exam or question
+    id: int
+    exam_id: int
+    exam_title: str
+    title: str  # the exam's title or the question's text
+    question_type: Optional[str] = None
+    snippet: str  # HTML-escaped, matched words wrapped in <mark>
+    score: float  # higher is better
+    is_published: bool
+    folder_id: Optional[int] = None
+
+
+class SearchResponse(BaseModel):
+    """A page of search results, best first"""
+    query: str
+    results: List[SearchResult]
+    next_skip: Optional[int] = None  # skip value of the next page, if any
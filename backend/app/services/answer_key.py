@@ -0,0 +1,84 @@
+"""Compiled answer keys for grading submissions"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.exam import Exam, Question
+
+# Question types graded by comparing against the correct answer
+AUTO_GRADED_TYPES = ("mcq", "true_false")
+
+
+def normalize_answer(text: str) -> str:
+    """Normalize an answer for comparison"""
+    return text.strip().lower()
+
+
+@dataclass(frozen=True)
+class AnswerKeyEntry:
+    """Grading data for one question"""
+    key: Optional[str]  # normalized correct answer
+    marks: float
+    grader: Callable[["AnswerKeyEntry", str], Tuple[bool, float]]
+
+
+def grade_exact(entry: AnswerKeyEntry, answer_text: str) -> Tuple[bool, float]:
+    """Auto-grade by case-insensitive exact match"""
+    is_correct = normalize_answer(answer_text) == entry.key
+    return is_correct, entry.marks if is_correct else 0.0
+
+
+def grade_full_marks(entry: AnswerKeyEntry, answer_text: str) -> Tuple[bool, float]:
+    """Short answer and essay can't be auto-graded; give full marks for now"""
+    return True, entry.marks
+
+
+def grade_no_key(entry: AnswerKeyEntry, answer_text: str) -> Tuple[bool, float]:
+    """Questions without a correct answer award nothing"""
+    return False, 0.0
+
+
+@dataclass(frozen=True)
+class CompiledAnswerKey:
+    """Answer key of one exam version, indexed by question ID"""
+    exam_id: int
+    created_at: datetime  # tells apart exams that reuse a deleted exam's ID
+    version: int
+    entries: Dict[int, AnswerKeyEntry]
+    
+    def grade(self, question_id: int, answer_text: str) -> Optional[Tuple[bool, float]]:
+        """Grade one answer; None if the question is not part of the exam"""
+        entry = self.entries.get(question_id)
+        if entry is None:
+            return None
+        if not answer_text:
+            return False, 0.0
+        return entry.grader(entry, answer_text)
+
+
+def compile_answer_key(exam: Exam, questions: Iterable[Question]) -> CompiledAnswerKey:
+    """Build the answer key of an exam from its questions"""
+    entries = {}
+    for question in questions:
+        if not question.correct_answer:
+            entries[question.id] = AnswerKeyEntry(None, question.marks, grade_no_key)
+        elif question.question_type in AUTO_GRADED_TYPES:
+            key = normalize_answer(question.correct_answer)
+            entries[question.id] = AnswerKeyEntry(key, question.marks, grade_exact)
+        else:
+            entries[question.id] = AnswerKeyEntry(None, question.marks, grade_full_marks)
+    
+    return CompiledAnswerKey(
+        exam_id=exam.id,
+        created_at=exam.created_at,
+        version=exam.version,
+        entries=entries,
+    )
+
+
+# Keyed by exam ID; entries whose version or creation time no longer
+# matches the exam row are treated as misses, so edits from any worker
+# invalidate them, and so does deleting an exam whose ID is then reused.
+answer_key_cache = LRUCache(maxsize=settings.ANSWER_KEY_CACHE_SIZE)
@@ -0,0 +1,87 @@
+"""Streaming export of exam attempts with their answers"""
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List
+
+import orjson
+from sqlalchemy.engine import Row
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+ATTEMPT_FIELDS = (
+    "attempt_id", "student_name", "student_email", "status", "score", "percentage",
+    "passed", "started_at", "completed_at", "created_at",
+)
+ANSWER_FIELDS = ("answer_id", "question_id", "answer_text", "is_correct", "marks_obtained")
+
+# Rows are encoded into chunks of about this many bytes before being sent
+CHUNK_SIZE = 64 * 1024
+
+RowBatches = AsyncIterator[List[Row]]
+
+
+async def export_ndjson(batches: RowBatches) -> AsyncIterator[bytes]:
+    """One JSON object per attempt, with its answers nested under "answers"
+    
+    Rows must arrive grouped by attempt (see
+    ExamAttemptRepository.stream_with_answers), so only the attempt being
+    assembled is held in memory.
+    """
+    attempt_count = len(ATTEMPT_FIELDS)
+    chunk: List[bytes] = []
+    size = 0
+    attempt = None
+    
+    async for batch in batches:
+        for row in batch:
+            if attempt is None or attempt["attempt_id"] != row[0]:
+                if attempt is not None:
+                    line = orjson.dumps(attempt) + b"\n"
+                    chunk.append(line)
+                    size += len(line)
+                attempt = dict(zip(ATTEMPT_FIELDS, row[:attempt_count]))
+                attempt["answers"] = []
+            if row[attempt_count] is not None:
+                attempt["answers"].append(dict(zip(ANSWER_FIELDS, row[attempt_count:])))
+        
+        if size >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    
+    if attempt is not None:
+        chunk.append(orjson.dumps(attempt) + b"\n")
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def export_csv(batches: RowBatches) -> AsyncIterator[bytes]:
+    """One CSV row per answer, repeating the attempt's columns
+    
+    Attempts without answers get a single row with empty answer columns.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ATTEMPT_FIELDS + ANSWER_FIELDS)
+    
+    async for batch in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+EXPORTERS = {
+    "ndjson": export_ndjson,
+    "csv": export_csv,
+}
@@ -0,0 +1,136 @@
+"""Content-addressed storage of uploaded files
+
+Every distinct file content is stored once, under UPLOAD_DIR/blobs named
+by its SHA-256, and File rows point at the shared blob. A blob row counts
+the files referencing it and is deleted, with its file, when the last
+one goes. Resized copies of images, kept under UPLOAD_DIR/derivatives by
+the same hash, go with it.
+
+Blob rows and blob files change together: add() and release() run inside
+a write transaction, and commit() commits it and then finishes the file
+side, or undoes it if the commit fails. Writes hold SQLite's write lock
+from their first statement, so no other transaction can take a reference
+to a blob between its release and the removal of its file.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.file import BlobRepository
+from app.schemas.file import StorageReport
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def blob_root() -> Path:
+    return Path(settings.UPLOAD_DIR) / "blobs"
+
+
+def derivative_path(sha256: str, variant: str) -> Path:
+    """Where the WebP copy of an image blob for ``variant`` is cached"""
+    return Path(settings.UPLOAD_DIR) / "derivatives" / sha256[:2] / f"{sha256}-{variant}.webp"
+
+
+def hash_file(path: Path) -> Tuple[str, int]:
+    """SHA-256 and size of a file, read in blocks; blocking"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+class BlobStore:
+    """Blob rows and files, kept in step across one write transaction"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = BlobRepository(db)
+        self.root = blob_root()
+        self._moved: List[Tuple[Path, Path]] = []  # (source, blob path) of new blobs
+        self._trashed: List[Tuple[Path, Path]] = []  # (blob path, trash path) of released blobs
+        self._obsolete: List[Path] = []  # files to remove once committed
+    
+    async def add(self, sha256: str, size: int, source: Path) -> Row:
+        """Reference the blob with this content, moving ``source`` in if it is new
+        
+        Returns the blob's (id, path, ref_count). When the content is
+        already stored, ``source`` is left where it is for the caller.
+        """
+        path = self.root / sha256[:2] / sha256
+        blob = await self.repository.acquire(sha256, size, str(path))
+        if blob.ref_count == 1:
+            await asyncio.to_thread(_move, source, Path(blob.path))
+            self._moved.append((source, Path(blob.path)))
+        return blob
+    
+    async def release(self, blob_ids: Iterable[int]) -> None:
+        """Drop references, removing blobs no file points at any more"""
+        for path in await self.repository.release(blob_ids):
+            path = Path(path)
+            trash = path.with_name(f"{path.name}.{uuid.uuid4().hex}.deleted")
+            if await asyncio.to_thread(_move, path, trash):
+                self._trashed.append((path, trash))
+            self._obsolete.extend(derivative_path(path.name, variant) for variant in settings.IMAGE_VARIANTS)
+    
+    def remove_after_commit(self, paths: Iterable[Path]) -> None:
+        """Remove files outside the blob store once the transaction commits"""
+        self._obsolete.extend(paths)
+    
+    async def commit(self) -> None:
+        """Commit the transaction, then complete or undo the file changes"""
+        try:
+            await self.db.commit()
+        except BaseException:
+            await asyncio.to_thread(self._undo)
+            raise
+        await asyncio.to_thread(_remove, [trash for _, trash in self._trashed] + self._obsolete)
+        self._moved, self._trashed, self._obsolete = [], [], []
+    
+    def _undo(self):
+        for source, path in reversed(self._moved):
+            _move(path, source)
+        for path, trash in self._trashed:
+            _move(trash, path)
+        self._moved, self._trashed, self._obsolete = [], [], []
+    
+    async def get_report(self) -> StorageReport:
+        """Report disk usage and the space saved by sharing blobs"""
+        usage = await self.repository.get_usage()
+        stored_bytes = usage.blob_bytes + usage.legacy_bytes
+        return StorageReport(
+            files=usage.files,
+            blobs=usage.blobs,
+            legacy_files=usage.legacy_files,
+            logical_bytes=usage.logical_bytes,
+            stored_bytes=stored_bytes,
+            saved_bytes=usage.logical_bytes - stored_bytes,
+            dedup_ratio=round(usage.logical_bytes / stored_bytes, 2) if stored_bytes else 1.0,
+        )
+
+
+def _move(source: Path, target: Path) -> bool:
+    """Rename a file, creating the target's directory; False if it is missing"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(source, target)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _remove(paths: List[Path]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
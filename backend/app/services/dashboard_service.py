@@ -1,85 +1,128 @@
 """Dashboard service"""
-from sqlalchemy import select, func
+from typing import List, NamedTuple, Tuple
+from sqlalchemy import select, func, case, true
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import SnapshotCache
+from app.core.config import settings
+from app.core.etag import Validator, make_validator
+from app.core.serialization import validate_list
 from app.models.exam import Exam, ExamAttempt
 from app.models.folder import Folder
 from app.models.file import File
+from app.repositories.exam import ExamRepository, ExamAttemptRepository
 from app.schemas.dashboard import DashboardStats, DashboardResponse
 from app.schemas.exam import ExamListResponse, ExamAttemptListResponse
 
+# Invalidated by every exam, attempt, folder and file write
+dashboard_cache = SnapshotCache(ttl=settings.DASHBOARD_CACHE_TTL)
+
+RECENT_LIMIT = 5
+
+
+class DashboardSnapshot(NamedTuple):
+    """A dashboard and the validator read just before it was computed"""
+    validator: Validator
+    dashboard: DashboardResponse
+
 
 class DashboardService:
     """Dashboard service"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.exam_repo = ExamRepository(db)
+        self.attempt_repo = ExamAttemptRepository(db)
     
     async def get_dashboard_stats(self) -> DashboardResponse:
         """Get dashboard statistics"""
-        # Count exams
-        total_exams_result = await self.db.execute(select(func.count(Exam.id)))
-        total_exams = total_exams_result.scalar() or 0
-        
-        # Count published exams
-        published_exams_result = await self.db.execute(
-            select(func.count(Exam.id)).where(Exam.is_published == True)
-        )
-        published_exams = published_exams_result.scalar() or 0
+        return (await self.get_dashboard_snapshot()).dashboard
+    
+    async def get_dashboard_snapshot(self) -> DashboardSnapshot:
+        """Get the dashboard along with the validator it was built under
         
-        # Count draft exams
-        draft_exams = total_exams - published_exams
+        A snapshot may be older than the database (see DASHBOARD_CACHE_TTL),
+        so responses carry the snapshot's own validator, never a newer one.
+        """
+        return await dashboard_cache.get(self._build_dashboard)
+    
+    @staticmethod
+    def _validator_columns() -> List:
+        """What the dashboard's validator is made of, as scalar subqueries
         
-        # Count folders
-        total_folders_result = await self.db.execute(select(func.count(Folder.id)))
-        total_folders = total_folders_result.scalar() or 0
+        Exams, folders and files are small tables; the latest attempt
+        changes are found from the primary key and updated_at indexes.
+        """
+        return [
+            select(func.count(Exam.id)).scalar_subquery().label("total_exams"),
+            select(func.max(Exam.updated_at)).scalar_subquery(),
+            select(func.count(Folder.id)).scalar_subquery().label("total_folders"),
+            select(func.count(File.id)).scalar_subquery().label("total_files"),
+            select(func.max(ExamAttempt.id)).scalar_subquery(),
+            select(func.max(ExamAttempt.updated_at)).scalar_subquery(),
+        ]
+    
+    async def get_dashboard_validator(self) -> Validator:
+        """Get the current validator of the dashboard in one query"""
+        result = await self.db.execute(select(*self._validator_columns()))
+        return make_validator("dashboard", *result.one())
+    
+    async def _build_dashboard(self) -> DashboardSnapshot:
+        """Compute the dashboard from the database
         
-        # Count files
-        total_files_result = await self.db.execute(select(func.count(File.id)))
-        total_files = total_files_result.scalar() or 0
+        Three queries: the counters with the validator, then the two
+        recent lists, which are rows rather than aggregates.
+        """
+        validator, stats = await self._get_stats()
         
-        # Count attempts
-        total_attempts_result = await self.db.execute(select(func.count(ExamAttempt.id)))
-        total_attempts = total_attempts_result.scalar() or 0
+        # Get recent exams
+        recent_exams = (await self.exam_repo.get_all_with_counts(
+            limit=RECENT_LIMIT, sort_by="created_at", order="desc"
+        )).items
         
-        # Count completed attempts
-        completed_attempts_result = await self.db.execute(
-            select(func.count(ExamAttempt.id)).where(ExamAttempt.status == "completed")
-        )
-        completed_attempts = completed_attempts_result.scalar() or 0
+        # Get recent attempts
+        recent_attempts = await self.attempt_repo.get_recent(RECENT_LIMIT)
         
-        # Calculate average score
-        avg_score_result = await self.db.execute(
-            select(func.avg(ExamAttempt.percentage)).where(ExamAttempt.status == "completed")
+        dashboard = DashboardResponse(
+            stats=stats,
+            recent_exams=validate_list(ExamListResponse, recent_exams),
+            recent_attempts=validate_list(ExamAttemptListResponse, recent_attempts)
         )
-        average_score = avg_score_result.scalar() or 0.0
+        return DashboardSnapshot(validator, dashboard)
+    
+    async def _get_stats(self) -> Tuple[Validator, DashboardStats]:
+        """Count exams, folders, files and attempts with the validator in one query
         
-        stats = DashboardStats(
-            total_exams=total_exams,
-            total_folders=total_folders,
-            total_attempts=total_attempts,
-            total_files=total_files,
-            published_exams=published_exams,
-            draft_exams=draft_exams,
-            completed_attempts=completed_attempts,
-            average_score=round(average_score, 2)
-        )
+        The validator is read in the same statement, so it describes
+        exactly the data the counters were computed from.
+        """
+        exam_stats = select(
+            func.coalesce(func.sum(case((Exam.is_published == True, 1), else_=0)), 0).label("published_exams"),
+        ).subquery()
         
-        # Get recent exams
-        recent_exams_result = await self.db.execute(
-            select(Exam).order_by(Exam.created_at.desc()).limit(5)
-        )
-        recent_exams = recent_exams_result.scalars().all()
+        is_completed = ExamAttempt.status == "completed"
+        attempt_stats = select(
+            func.count(ExamAttempt.id).label("total_attempts"),
+            func.coalesce(func.sum(case((is_completed, 1), else_=0)), 0).label("completed_attempts"),
+            func.avg(case((is_completed, ExamAttempt.percentage))).label("average_score"),
+        ).subquery()
         
-        # Get recent attempts
-        recent_attempts_result = await self.db.execute(
-            select(ExamAttempt).order_by(ExamAttempt.created_at.desc()).limit(5)
+        validator_columns = self._validator_columns()
+        result = await self.db.execute(
+            select(*validator_columns, exam_stats, attempt_stats)
+            # Both sides are single rows
+            .select_from(exam_stats.join(attempt_stats, true()))
         )
-        recent_attempts = recent_attempts_result.scalars().all()
+        row = result.one()
         
-        return DashboardResponse(
-            stats=stats,
-            recent_exams=[ExamListResponse(**e.__dict__, question_count=0, attempt_count=0) for e in recent_exams],
-            recent_attempts=[ExamAttemptListResponse(**a.__dict__) for a in recent_attempts]
+        validator = make_validator("dashboard", *row[:len(validator_columns)])
+        return validator, DashboardStats(
+            total_exams=row.total_exams,
+            total_folders=row.total_folders,
+            total_attempts=row.total_attempts,
+            total_files=row.total_files,
+            published_exams=row.published_exams,
+            draft_exams=row.total_exams - row.published_exams,
+            completed_attempts=row.completed_attempts,
+            average_score=round(row.average_score or 0.0, 2)
         )
-
@@ -0,0 +1,124 @@
+"""Text extraction from uploaded documents
+
+These functions run in worker processes, so they take and return plain
+values and import nothing from the rest of the application. DOCX and
+PPTX files are zipped XML and read with the standard library; PDFs need
+the optional ``pypdf`` package.
+"""
+import re
+import time
+import zipfile
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from xml.etree.ElementTree import iterparse
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DRAWING_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+APP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+SLIDE_NAME = re.compile(r"ppt/slides/slide(\d+)\.xml")
+
+
+class UnsupportedDocument(Exception):
+    """Raised for documents whose text cannot be extracted"""
+
+
+class DocumentText(NamedTuple):
+    """Text of a document, cut at the requested length"""
+    text: str
+    page_count: Optional[int]  # pages, or slides; None for plain text
+    truncated: bool
+    seconds: float  # time spent extracting, in the worker
+
+
+def extract_text(path: str, file_type: str, max_chars: int) -> DocumentText:
+    """Extract up to ``max_chars`` characters of a document's text; blocking"""
+    extractor = EXTRACTORS.get(file_type)
+    if extractor is None:
+        raise UnsupportedDocument(f"No text extraction for .{file_type} files")
+    
+    start = time.perf_counter()
+    parts: List[str] = []
+    length = 0
+    page_count = None
+    for item in extractor(path):
+        if isinstance(item, int):
+            page_count = item
+            continue
+        parts.append(item)
+        length += len(item)
+        if length > max_chars:
+            break
+    text = "".join(parts)
+    return DocumentText(text[:max_chars], page_count, len(text) > max_chars, time.perf_counter() - start)
+
+
+def _txt(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as file:
+        while block := file.read(64 * 1024):
+            yield block
+
+
+def _docx(path: str) -> Iterator:
+    """The page count Word saved, if any, then the text of word/document.xml"""
+    with zipfile.ZipFile(path) as archive:
+        if "docProps/app.xml" in archive.namelist():
+            with archive.open("docProps/app.xml") as properties:
+                for _, element in iterparse(properties):
+                    if element.tag == f"{APP_NS}Pages" and (element.text or "").isdigit():
+                        yield int(element.text)
+        with archive.open("word/document.xml") as document:
+            yield from _paragraphs(document, WORD_NS, {f"{WORD_NS}tab": "\t", f"{WORD_NS}br": "\n"})
+
+
+def _pptx(path: str) -> Iterator:
+    """Text of each slide in order, slides separated by a blank line"""
+    with zipfile.ZipFile(path) as archive:
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in archive.namelist() if (match := SLIDE_NAME.fullmatch(name))
+        )
+        yield len(slides)
+        for index, (_, name) in enumerate(slides):
+            if index:
+                yield "\n"
+            with archive.open(name) as slide:
+                yield from _paragraphs(slide, DRAWING_NS, {f"{DRAWING_NS}br": "\n"})
+
+
+def _paragraphs(xml, namespace: str, breaks: Dict[str, str]) -> Iterator[str]:
+    """Text runs of an OOXML part, a line per paragraph, parsed incrementally"""
+    text_tag, paragraph_tag = f"{namespace}t", f"{namespace}p"
+    line: List[str] = []
+    for _, element in iterparse(xml):
+        if element.tag == text_tag:
+            line.append(element.text or "")
+        elif element.tag in breaks:
+            line.append(breaks[element.tag])
+        elif element.tag == paragraph_tag:
+            yield "".join(line) + "\n"
+            line = []
+            element.clear()
+
+
+def _pdf(path: str) -> Iterator:
+    try:
+        import pypdf  # only needed in the worker processes
+    except ImportError:
+        raise UnsupportedDocument("PDF text extraction needs the pypdf package")
+    reader = pypdf.PdfReader(path)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise UnsupportedDocument("PDF is encrypted")
+    yield len(reader.pages)
+    for index, page in enumerate(reader.pages):
+        if index:
+            yield "\n"
+        yield page.extract_text() or ""
+
+
+EXTRACTORS: Dict[str, Callable[[str], Iterator]] = {
+    "txt": _txt,
+    "docx": _docx,
+    "pptx": _pptx,
+    "pdf": _pdf,
+}
+
+EXTRACTABLE_TYPES = tuple(EXTRACTORS)
@@ -0,0 +1,24 @@
+"""In-process cache of exams with their questions"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.schemas.exam import ExamResponse
+
+
+@dataclass(frozen=True)
+class ExamSnapshot:
+    """An exam and its questions as of one exam version"""
+    id: int
+    created_at: datetime
+    version: int
+    exam: ExamResponse
+
+
+# Keyed by (exam ID, created_at, version). Every edit bumps the version,
+# so entries of older versions are never hit again and simply age out of
+# the LRU; a worker learns about edits made elsewhere by reading the
+# current version. SQLite gives a new exam the ID of the last one deleted,
+# and created_at keeps the two apart.
+exam_cache = LRUCache(maxsize=settings.EXAM_CACHE_SIZE)
@@ -1,17 +1,42 @@
 """Exam service"""
-from typing import List
+import gzip
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 from datetime import datetime
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 
-from app.models.exam import Exam, Question, ExamAttempt, Answer
-from app.repositories.exam import ExamRepository, QuestionRepository, ExamAttemptRepository, AnswerRepository
+from app.database.connection import ReadSessionLocal
+from app.database.write_queue import WriteQueueFullError, write_scheduler
+from app.models.exam import Exam, Question, ExamAttempt
+from app.repositories.base import Page, InvalidCursorError
+from app.core.config import settings
+from app.core.etag import Validator, make_validator
+from app.core.serialization import validate_list
+from app.repositories.exam import (
+    ExamRepository, ExamPaperRepository, QuestionRepository, ExamAttemptRepository, AnswerRepository
+)
+from app.repositories.folder import FolderRepository
+from app.repositories.search import SearchRepository
+from app.services.attempt_export import EXPORTERS
+from app.services.answer_key import CompiledAnswerKey, answer_key_cache, compile_answer_key
+from app.services.dashboard_service import dashboard_cache
+from app.services.exam_cache import ExamSnapshot, exam_cache
+from app.services.question_import import PARSERS, ImportState, peak_memory_bytes
 from app.schemas.exam import (
     ExamCreate, ExamUpdate, ExamResponse, ExamResponsePublic, ExamListResponse,
     QuestionCreate, QuestionUpdate, QuestionResponse,
-    ExamAttemptCreate, ExamAttemptSubmit, ExamAttemptResponse, ExamAttemptListResponse
+    ExamAttemptCreate, ExamAttemptSubmit, ExamAttemptResponse, ExamAttemptListResponse,
+    QuestionImportRow, ImportRowError, ImportReport
 )
 
+# Columns of a question taken from an import row
+QUESTION_FIELDS = set(QuestionCreate.model_fields)
+
 
 class ExamService:
     """Exam service"""
@@ -22,81 +47,204 @@ class ExamService:
         self.question_repo = QuestionRepository(db)
         self.attempt_repo = ExamAttemptRepository(db)
         self.answer_repo = AnswerRepository(db)
+        self.folder_repo = FolderRepository(db)
+        self.paper_repo = ExamPaperRepository(db)
+        self.search_repo = SearchRepository(db)
     
     async def create_exam(self, exam_data: ExamCreate) -> ExamResponse:
         """Create a new exam"""
         # Create exam
         exam_dict = exam_data.model_dump(exclude={"questions"})
         exam = Exam(**exam_dict)
-        exam = await self.exam_repo.create(exam)
-        
-        # Create questions if provided
-        questions = []
-        if exam_data.questions:
-            for idx, question_data in enumerate(exam_data.questions):
-                question_dict = question_data.model_dump()
-                question_dict["exam_id"] = exam.id
-                question_dict["order"] = idx
-                question = Question(**question_dict)
-                question = await self.question_repo.create(question)
-                questions.append(question)
-        
-        # Return response
-        exam_dict = exam.__dict__
-        exam_dict["questions"] = [QuestionResponse(**q.__dict__) for q in questions]
-        return ExamResponse(**exam_dict)
+        if not await self.folder_repo.adjust_counts(exam.folder_id, exams=1):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Folder not found"
+            )
+        exam = await self.exam_repo.create(exam, commit=False)
+        
+        # Create questions (if provided) in the same transaction as the exam
+        question_rows = []
+        for idx, question_data in enumerate(exam_data.questions or []):
+            question_dict = question_data.model_dump()
+            question_dict["exam_id"] = exam.id
+            question_dict["order"] = idx
+            question_rows.append(question_dict)
+        questions = await self.question_repo.create_many(question_rows, commit=False)
+        await self.search_repo.index_exam(exam.id, with_questions=True)
+        await self.db.commit()
+        dashboard_cache.invalidate()
+        
+        if exam.is_published:
+            answer_key_cache.set(exam.id, compile_answer_key(exam, questions))
+            await self._render_paper(exam.id)
+        
+        # Return response; the questions are already at hand, so attach them
+        # rather than letting validation lazy-load the relationship
+        set_committed_value(exam, "questions", questions)
+        return ExamResponse.model_validate(exam)
     
     async def get_exam(self, exam_id: int, include_answers: bool = False) -> ExamResponse | ExamResponsePublic:
         """Get exam by ID"""
-        exam = await self.exam_repo.get_by_id_with_questions(exam_id)
-        if not exam:
+        snapshot = await self._get_snapshot(exam_id)
+        if not snapshot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Exam not found"
             )
         
         if include_answers:
-            return ExamResponse(**exam.__dict__)
-        else:
-            # Return public version without answers
-            exam_dict = {
-                "id": exam.id,
-                "title": exam.title,
-                "description": exam.description,
-                "duration": exam.duration,
-                "total_marks": exam.total_marks,
-                "passing_marks": exam.passing_marks,
-                "is_published": exam.is_published,
-                "folder_id": exam.folder_id,
-                "created_at": exam.created_at,
-                "questions": [
-                    {
-                        "id": q.id,
-                        "exam_id": q.exam_id,
-                        "question_text": q.question_text,
-                        "question_type": q.question_type,
-                        "marks": q.marks,
-                        "order": q.order,
-                        "options": q.options,
-                        "created_at": q.created_at
-                    }
-                    for q in exam.questions
-                ]
-            }
-            return ExamResponsePublic(**exam_dict)
+            return snapshot.exam
+        return self._to_public(snapshot.exam)
     
-    async def get_all_exams(self, skip: int = 0, limit: int = 100) -> List[ExamListResponse]:
-        """Get all exams"""
-        exams_with_counts = await self.exam_repo.get_all_with_counts(skip, limit)
+    async def get_exam_validator(self, exam_id: int, include_answers: bool = False) -> Validator:
+        """Get the validator of an exam"""
+        state = await self.exam_repo.get_state(exam_id)
+        if state is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exam not found"
+            )
+        return make_validator(
+            "exam", exam_id, state.version, state.updated_at, include_answers,
+            last_modified=state.updated_at
+        )
+    
+    async def _get_snapshot(self, exam_id: int) -> Optional[ExamSnapshot]:
+        """Get an exam with its questions, from the cache when it is current
+        
+        Checking the cached entry costs one primary-key lookup of the exam's
+        version, which also catches edits made by other workers.
+        """
+        revision = await self.exam_repo.get_revision(exam_id)
+        if revision is None:
+            return None
+        
+        snapshot = exam_cache.get((exam_id, revision.created_at, revision.version))
+        if snapshot is None:
+            exam = await self.exam_repo.get_by_id_with_questions(exam_id)
+            if exam is None:
+                return None
+            # Keyed by the version actually loaded, which may be newer
+            snapshot = ExamSnapshot(exam.id, exam.created_at, exam.version, ExamResponse.model_validate(exam))
+            exam_cache.set((exam.id, exam.created_at, exam.version), snapshot)
+        return snapshot
+    
+    async def get_exam_paper(self, exam_id: int) -> Optional[Row]:
+        """Get the pre-rendered public view of a published exam, if current"""
+        return await self.paper_repo.get_current(exam_id)
+    
+    def _to_public(self, exam: ExamResponse) -> ExamResponsePublic:
+        """Public view of an exam, without answers"""
+        exam_dict = {
+            "id": exam.id,
+            "title": exam.title,
+            "description": exam.description,
+            "duration": exam.duration,
+            "total_marks": exam.total_marks,
+            "passing_marks": exam.passing_marks,
+            "is_published": exam.is_published,
+            "folder_id": exam.folder_id,
+            "created_at": exam.created_at,
+            "questions": [
+                {
+                    "id": q.id,
+                    "exam_id": q.exam_id,
+                    "question_text": q.question_text,
+                    "question_type": q.question_type,
+                    "marks": q.marks,
+                    "order": q.order,
+                    "options": q.options,
+                    "created_at": q.created_at
+                }
+                for q in exam.questions
+            ]
+        }
+        return ExamResponsePublic(**exam_dict)
+    
+    async def _render_paper(self, exam_id: int) -> None:
+        """Store the public view of a published exam as ready-to-send JSON
+        
+        Drafts have no paper. Every exam or question edit calls this
+        after its commit; until it runs, the paper's version no longer
+        matches the exam and reads fall back to building the response.
+        """
+        snapshot = await self._get_snapshot(exam_id)
+        if snapshot is None:
+            # Deleted meanwhile; end the read so the writer is released
+            await self.db.rollback()
+            return
+        if not snapshot.exam.is_published:
+            await self.paper_repo.delete_by_exam(exam_id)
+            return
         
-        return [
-            ExamListResponse(
-                **e["exam"].__dict__,
-                question_count=e["question_count"],
-                attempt_count=e["attempt_count"]
+        content = self._to_public(snapshot.exam).model_dump_json().encode()
+        content_gzip = gzip.compress(content, compresslevel=9, mtime=0) if settings.EXAM_PAPER_GZIP else None
+        await self.paper_repo.save(exam_id, snapshot.version, content, content_gzip)
+    
+    async def render_papers(self) -> int:
+        """Render the paper of every published exam; returns how many"""
+        exam_ids = await self.exam_repo.get_published_ids()
+        for exam_id in exam_ids:
+            await self._render_paper(exam_id)
+        return len(exam_ids)
+    
+    async def _exam_changed(self, exam_id: int) -> None:
+        """Refresh everything derived from an exam after an edit"""
+        answer_key_cache.pop(exam_id)
+        dashboard_cache.invalidate()
+        await self._render_paper(exam_id)
+    
+    async def exams_changed(self, exams: Iterable[Row]) -> None:
+        """Refresh everything derived from exams changed by another service
+        
+        ``exams`` are (id, created_at, version) rows from before the change,
+        committed since.
+        """
+        for exam in exams:
+            exam_cache.pop((exam.id, exam.created_at, exam.version))
+            await self._exam_changed(exam.id)
+    
+    async def get_all_exams(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        folder_id: Optional[int] = None,
+        is_published: Optional[bool] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        order: str = "asc",
+        cursor: Optional[str] = None,
+    ) -> Page:
+        """Get all exams"""
+        try:
+            exams_with_counts, next_cursor = await self.exam_repo.get_all_with_counts(
+                skip, limit,
+                folder_id=folder_id,
+                is_published=is_published,
+                search=search,
+                sort_by=sort_by,
+                order=order,
+                cursor=cursor,
             )
-            for e in exams_with_counts
-        ]
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        exams = validate_list(ExamListResponse, exams_with_counts)
+        return Page(exams, next_cursor)
+    
+    async def get_exams_validator(
+        self,
+        folder_id: Optional[int] = None,
+        is_published: Optional[bool] = None,
+        search: Optional[str] = None,
+    ) -> Validator:
+        """Get the validator of an exam listing"""
+        state = await self.exam_repo.get_listing_state_with_counts(folder_id, is_published, search)
+        return make_validator("exams", *state)
     
     async def update_exam(self, exam_id: int, exam_data: ExamUpdate) -> ExamResponse:
         """Update exam"""
@@ -109,10 +257,30 @@ class ExamService:
         
         # Update fields
         update_data = exam_data.model_dump(exclude_unset=True)
+        if "folder_id" in update_data and update_data["folder_id"] != exam.folder_id:
+            if not await self.folder_repo.adjust_counts(update_data["folder_id"], exams=1):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Folder not found"
+                )
+            await self.folder_repo.adjust_counts(exam.folder_id, exams=-1)
+        
+        was_published = exam.is_published
         for key, value in update_data.items():
             setattr(exam, key, value)
+        if update_data:
+            await self.exam_repo.bump_version(exam_id)
+        if update_data.keys() & {"title", "description"}:
+            await self.db.flush()
+            await self.search_repo.index_exam(exam_id)
         
         exam = await self.exam_repo.update(exam)
+        await self._exam_changed(exam_id)
+        
+        # Compile the answer key up front when the exam goes live
+        if exam.is_published and not was_published:
+            self._get_answer_key(await self._get_snapshot(exam_id))
+        
         return await self.get_exam(exam_id, include_answers=True)
     
     async def delete_exam(self, exam_id: int) -> bool:
@@ -124,7 +292,14 @@ class ExamService:
                 detail="Exam not found"
             )
         
-        return await self.exam_repo.delete(exam_id)
+        cache_key = (exam.id, exam.created_at, exam.version)
+        await self.folder_repo.adjust_counts(exam.folder_id, exams=-1)
+        await self.search_repo.remove_exam(exam_id)
+        deleted = await self.exam_repo.delete(exam_id)
+        exam_cache.pop(cache_key)
+        answer_key_cache.pop(exam_id)
+        dashboard_cache.invalidate()
+        return deleted
     
     # Question operations
     async def add_question(self, exam_id: int, question_data: QuestionCreate) -> QuestionResponse:
@@ -139,9 +314,13 @@ class ExamService:
         question_dict = question_data.model_dump()
         question_dict["exam_id"] = exam_id
         question = Question(**question_dict)
-        question = await self.question_repo.create(question)
+        await self.exam_repo.bump_version(exam_id)
+        question = await self.question_repo.create(question, commit=False)
+        await self.search_repo.index_questions([question.id])
+        question = await self.question_repo.update(question)
+        await self._exam_changed(exam_id)
         
-        return QuestionResponse(**question.__dict__)
+        return QuestionResponse.model_validate(question)
     
     async def update_question(self, question_id: int, question_data: QuestionUpdate) -> QuestionResponse:
         """Update question"""
@@ -156,8 +335,13 @@ class ExamService:
         for key, value in update_data.items():
             setattr(question, key, value)
         
+        await self.exam_repo.bump_version(question.exam_id)
+        if update_data.keys() & {"question_text", "options"}:
+            await self.db.flush()
+            await self.search_repo.index_questions([question_id])
         question = await self.question_repo.update(question)
-        return QuestionResponse(**question.__dict__)
+        await self._exam_changed(question.exam_id)
+        return QuestionResponse.model_validate(question)
     
     async def delete_question(self, question_id: int) -> bool:
         """Delete question"""
@@ -168,7 +352,177 @@ class ExamService:
                 detail="Question not found"
             )
         
-        return await self.question_repo.delete(question_id)
+        await self.exam_repo.bump_version(question.exam_id)
+        await self.search_repo.remove_questions([question_id])
+        deleted = await self.question_repo.delete(question_id)
+        await self._exam_changed(question.exam_id)
+        return deleted
+    
+    # Question imports
+    async def import_questions(
+        self,
+        chunks: AsyncIterator[bytes],
+        format: str = "ndjson",
+        folder_id: Optional[int] = None
+    ) -> ImportReport:
+        """Import questions from an NDJSON or CSV byte stream
+        
+        Rows are parsed and validated as they arrive and written in
+        transactions of IMPORT_BATCH_SIZE rows, so memory stays flat however
+        large the file is. An invalid row is reported with its line number
+        and skipped; a batch that fails to write is rolled back, its rows
+        are reported, and the import carries on with the next batch.
+        """
+        if folder_id is not None:
+            folder_exists = await self.folder_repo.get_updated_at(folder_id) is not None
+            # Free the write connection while the first batch streams in
+            await self.db.rollback()
+            if not folder_exists:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Folder not found"
+                )
+        
+        report = ImportReport()
+        state = ImportState(folder_id=folder_id)
+        start = time.perf_counter()
+        row_count = 0
+        batch: List[Tuple[int, QuestionImportRow]] = []
+        
+        async for line, record, error in PARSERS[format](chunks):
+            row_count += 1
+            if error is not None:
+                self._reject_row(report, line, [error])
+                continue
+            try:
+                batch.append((line, QuestionImportRow.model_validate(record)))
+            except ValidationError as e:
+                self._reject_row(report, line, [
+                    f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+                ])
+                continue
+            
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                await self._import_batch(batch, state, report)
+                batch = []
+        if batch:
+            await self._import_batch(batch, state, report)
+        
+        if report.imported:
+            dashboard_cache.invalidate()
+        # Rows naming a missing exam are only found once their batch is written
+        report.errors.sort(key=lambda error: error.line)
+        report.rows = row_count
+        report.exams_updated = len(state.updated)
+        report.seconds = round(time.perf_counter() - start, 3)
+        report.rows_per_second = round(report.rows / report.seconds, 1) if report.seconds else 0.0
+        report.peak_memory_bytes = peak_memory_bytes()
+        return report
+    
+    async def _import_batch(
+        self,
+        batch: List[Tuple[int, QuestionImportRow]],
+        state: ImportState,
+        report: ImportReport
+    ) -> None:
+        """Write one batch of validated rows in a single transaction"""
+        # Look up exams referenced by id for the first time
+        unseen = {row.exam_id for _, row in batch if row.exam_id is not None}
+        unseen -= state.next_order.keys() | state.missing
+        if unseen:
+            found = await self.exam_repo.get_next_orders(unseen)
+            state.next_order.update(found)
+            state.missing.update(unseen - found.keys())
+        
+        rows = []
+        for line, row in batch:
+            if row.exam_id in state.missing:
+                self._reject_row(report, line, [f"exam_id: Exam {row.exam_id} not found"])
+            else:
+                rows.append((line, row))
+        if not rows:
+            # Release the writer taken by the exam lookup before the next batch streams in
+            await self.db.rollback()
+            return
+        
+        # New titles become draft exams worth the marks of their questions
+        new_exams = {}
+        for _, row in rows:
+            if row.exam_title is not None and row.exam_title not in state.exam_ids:
+                exam = new_exams.setdefault(row.exam_title, {
+                    "title": row.exam_title,
+                    "description": row.exam_description,
+                    "duration": row.exam_duration,
+                    "total_marks": 0.0,
+                    "is_published": False,
+                    "folder_id": state.folder_id,
+                })
+                exam["total_marks"] += row.marks
+        
+        try:
+            exams = await self.exam_repo.create_many(list(new_exams.values()), commit=False)
+            created = {exam.title: exam.id for exam in exams}
+            await self.folder_repo.adjust_counts(state.folder_id, exams=len(created))
+            
+            next_order = {}
+            added_marks = defaultdict(float)
+            question_rows = []
+            for _, row in rows:
+                if row.exam_id is not None:
+                    exam_id = row.exam_id
+                else:
+                    exam_id = state.exam_ids.get(row.exam_title) or created[row.exam_title]
+                
+                # Rows without an order are appended after the exam's questions
+                order = next_order.get(exam_id, state.next_order.get(exam_id, 0))
+                if "order" in row.model_fields_set:
+                    next_order[exam_id] = max(order, row.order + 1)
+                    order = row.order
+                else:
+                    next_order[exam_id] = order + 1
+                
+                question = row.model_dump(include=QUESTION_FIELDS)
+                question["exam_id"] = exam_id
+                question["order"] = order
+                question_rows.append(question)
+                added_marks[exam_id] += row.marks
+            last_question_id = await self.question_repo.get_last_id()
+            await self.question_repo.insert_many(question_rows)
+            await self.search_repo.index_exams(created.values())
+            await self.search_repo.index_questions_after(last_question_id)
+            
+            # Exams from earlier batches of this import grow their total;
+            # existing exams keep theirs, as with add_question
+            touched = added_marks.keys() - set(created.values())
+            await self.exam_repo.add_marks({
+                exam_id: added_marks[exam_id] if exam_id in state.created else 0.0
+                for exam_id in touched
+            })
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            for line, _ in rows:
+                self._reject_row(report, line, [f"Not imported: its batch failed to write ({e.__class__.__name__})"])
+            return
+        
+        state.exam_ids.update(created)
+        state.created.update(created.values())
+        state.next_order.update(next_order)
+        report.imported += len(rows)
+        report.exams_created += len(created)
+        
+        for exam_id in touched - state.created:
+            state.updated.add(exam_id)
+            await self._exam_changed(exam_id)
+    
+    @staticmethod
+    def _reject_row(report: ImportReport, line: int, errors: List[str]) -> None:
+        """Count a rejected row, listing it until IMPORT_MAX_ERRORS is reached"""
+        report.failed += 1
+        if len(report.errors) < settings.IMPORT_MAX_ERRORS:
+            report.errors.append(ImportRowError(line=line, errors=errors))
+        else:
+            report.errors_truncated = True
     
     # Exam attempt operations
     async def start_attempt(self, exam_id: int, attempt_data: ExamAttemptCreate) -> ExamAttemptResponse:
@@ -191,10 +545,14 @@ class ExamService:
         attempt_dict["status"] = "in_progress"
         attempt_dict["started_at"] = datetime.utcnow().isoformat()
         
-        attempt = ExamAttempt(**attempt_dict)
-        attempt = await self.attempt_repo.create(attempt)
+        async def write(session: AsyncSession) -> ExamAttempt:
+            attempts = await ExamAttemptRepository(session).create_many([attempt_dict], commit=False)
+            return attempts[0]
         
-        return ExamAttemptResponse(**attempt.__dict__, answers=[])
+        attempt = await self._run_write(write)
+        dashboard_cache.invalidate()
+        set_committed_value(attempt, "answers", [])
+        return ExamAttemptResponse.model_validate(attempt)
     
     async def submit_attempt(self, attempt_id: int, submission: ExamAttemptSubmit) -> ExamAttemptResponse:
         """Submit an exam attempt"""
@@ -211,56 +569,93 @@ class ExamService:
                 detail="Attempt already completed"
             )
         
-        # Get exam with questions
-        exam = await self.exam_repo.get_by_id_with_questions(attempt.exam_id)
+        # Get exam and its compiled answer key
+        snapshot = await self._get_snapshot(attempt.exam_id)
+        if snapshot is None:
+            # Deleted since the attempt was loaded
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exam not found"
+            )
+        answer_key = self._get_answer_key(snapshot)
+        exam = snapshot.exam
         
         # Grade the submission
         total_score = 0.0
-        answers = []
+        answer_rows = []
         
         for answer_data in submission.answers:
-            question = next((q for q in exam.questions if q.id == answer_data.question_id), None)
-            if not question:
+            graded = answer_key.grade(answer_data.question_id, answer_data.answer_text)
+            if graded is None:
                 continue
             
-            # Check if answer is correct (simple matching for now)
-            is_correct = False
-            marks_obtained = 0.0
-            
-            if question.correct_answer and answer_data.answer_text:
-                if question.question_type == "mcq" or question.question_type == "true_false":
-                    is_correct = answer_data.answer_text.strip().lower() == question.correct_answer.strip().lower()
-                    marks_obtained = question.marks if is_correct else 0.0
-                else:
-                    # For short answer and essay, we can't auto-grade, give full marks for now
-                    is_correct = True
-                    marks_obtained = question.marks
-            
+            is_correct, marks_obtained = graded
             total_score += marks_obtained
-            
-            # Save answer
-            answer = Answer(
-                attempt_id=attempt_id,
-                question_id=answer_data.question_id,
-                answer_text=answer_data.answer_text,
-                is_correct=is_correct,
-                marks_obtained=marks_obtained
-            )
-            answer = await self.answer_repo.create(answer)
-            answers.append(answer)
+            answer_rows.append({
+                "attempt_id": attempt_id,
+                "question_id": answer_data.question_id,
+                "answer_text": answer_data.answer_text,
+                "is_correct": is_correct,
+                "marks_obtained": marks_obtained
+            })
         
-        # Update attempt
-        attempt.status = "completed"
-        attempt.score = total_score
-        attempt.percentage = (total_score / exam.total_marks * 100) if exam.total_marks > 0 else 0
-        attempt.passed = attempt.percentage >= (exam.passing_marks / exam.total_marks * 100) if exam.total_marks > 0 else False
-        attempt.completed_at = datetime.utcnow().isoformat()
+        percentage = (total_score / exam.total_marks * 100) if exam.total_marks > 0 else 0
+        passed = percentage >= (exam.passing_marks / exam.total_marks * 100) if exam.total_marks > 0 else False
         
-        attempt = await self.attempt_repo.update(attempt)
+        completion = {
+            "status": "completed",
+            "score": total_score,
+            "percentage": percentage,
+            "passed": passed,
+            "completed_at": datetime.utcnow().isoformat()
+        }
         
-        # Get attempt with answers
-        attempt = await self.attempt_repo.get_by_id_with_answers(attempt_id)
-        return ExamAttemptResponse(**attempt.__dict__)
+        # Score update and answers are written together, so a failure never
+        # leaves a half-graded attempt behind
+        async def write(session: AsyncSession) -> list:
+            completed = await ExamAttemptRepository(session).complete(
+                attempt_id,
+                score=completion["score"],
+                percentage=completion["percentage"],
+                passed=completion["passed"],
+                completed_at=completion["completed_at"]
+            )
+            if not completed:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Attempt already completed"
+                )
+            return await AnswerRepository(session).create_many(answer_rows, commit=False)
+        
+        answers = await self._run_write(write)
+        dashboard_cache.invalidate()
+        
+        # Reflect the committed write on the attempt loaded before it
+        for key, value in completion.items():
+            set_committed_value(attempt, key, value)
+        set_committed_value(attempt, "answers", answers)
+        return ExamAttemptResponse.model_validate(attempt)
+    
+    async def _run_write(self, job):
+        """Run a write through the group-commit scheduler"""
+        try:
+            return await write_scheduler.run(job)
+        except WriteQueueFullError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry"
+            )
+    
+    def _get_answer_key(self, snapshot: ExamSnapshot) -> CompiledAnswerKey:
+        """Get the compiled answer key of an exam, compiling it on first use"""
+        answer_key = answer_key_cache.get(snapshot.id)
+        # SQLite reuses the ID of the last exam once it is deleted, so the
+        # version alone could match a key compiled for the deleted exam
+        current = (snapshot.created_at, snapshot.version)
+        if answer_key is None or (answer_key.created_at, answer_key.version) != current:
+            answer_key = compile_answer_key(snapshot, snapshot.exam.questions)
+            answer_key_cache.set(snapshot.id, answer_key)
+        return answer_key
     
     async def get_attempt(self, attempt_id: int) -> ExamAttemptResponse:
         """Get exam attempt by ID"""
@@ -271,10 +666,43 @@ class ExamService:
                 detail="Attempt not found"
             )
         
-        return ExamAttemptResponse(**attempt.__dict__)
+        return ExamAttemptResponse.model_validate(attempt)
     
-    async def get_exam_attempts(self, exam_id: int, skip: int = 0, limit: int = 100) -> List[ExamAttemptListResponse]:
+    async def get_exam_attempts(
+        self,
+        exam_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get all attempts for an exam"""
-        attempts = await self.attempt_repo.get_by_exam(exam_id, skip, limit)
-        return [ExamAttemptListResponse(**a.__dict__) for a in attempts]
-
+        try:
+            attempts, next_cursor = await self.attempt_repo.get_by_exam(exam_id, skip, limit, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return Page(validate_list(ExamAttemptListResponse, attempts), next_cursor)
+    
+    async def export_attempts(self, exam_id: int, format: str = "ndjson") -> AsyncIterator[bytes]:
+        """Export every attempt of an exam with its answers as encoded chunks
+        
+        The exam is checked up front so a missing one is still a 404. The
+        rows are then streamed from a session of their own, which stays
+        open for as long as the client keeps reading.
+        """
+        if await self.exam_repo.get_version(exam_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Exam not found"
+            )
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            async with ReadSessionLocal() as db:
+                batches = ExamAttemptRepository(db).stream_with_answers(exam_id, settings.EXPORT_BATCH_SIZE)
+                async for chunk in EXPORTERS[format](batches):
+                    yield chunk
+        
+        return chunks()
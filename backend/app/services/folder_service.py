@@ -1,10 +1,19 @@
 """Folder service"""
-from typing import List
+from pathlib import Path
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
+from app.core.etag import Validator, make_validator
+from app.core.serialization import validate_list
 from app.models.folder import Folder
+from app.repositories.base import Page, InvalidCursorError
+from app.repositories.exam import ExamRepository
+from app.repositories.file import FileRepository
 from app.repositories.folder import FolderRepository
+from app.services.blob_store import BlobStore
+from app.services.dashboard_service import dashboard_cache
+from app.services.exam_service import ExamService
 from app.schemas.folder import FolderCreate, FolderUpdate, FolderResponse
 
 
@@ -19,12 +28,9 @@ class FolderService:
         """Create a new folder"""
         folder = Folder(**folder_data.model_dump())
         folder = await self.repository.create(folder)
+        dashboard_cache.invalidate()
         
-        return FolderResponse(
-            **folder.__dict__,
-            exam_count=0,
-            file_count=0
-        )
+        return FolderResponse.model_validate(folder)
     
     async def get_folder(self, folder_id: int) -> FolderResponse:
         """Get folder by ID"""
@@ -35,28 +41,34 @@ class FolderService:
                 detail="Folder not found"
             )
         
-        # Get counts
-        folder_with_counts = await self.repository.get_all_with_counts()
-        folder_data = next((f for f in folder_with_counts if f["folder"].id == folder_id), None)
-        
-        return FolderResponse(
-            **folder.__dict__,
-            exam_count=folder_data["exam_count"] if folder_data else 0,
-            file_count=folder_data["file_count"] if folder_data else 0
-        )
+        return FolderResponse.model_validate(folder)
+    
+    async def get_folder_validator(self, folder_id: int) -> Validator:
+        """Get the validator of a folder"""
+        updated_at = await self.repository.get_updated_at(folder_id)
+        if updated_at is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Folder not found"
+            )
+        return make_validator("folder", folder_id, updated_at, last_modified=updated_at)
     
-    async def get_all_folders(self, skip: int = 0, limit: int = 100) -> List[FolderResponse]:
+    async def get_folders_validator(self) -> Validator:
+        """Get the validator of the folder listing"""
+        state = await self.repository.get_listing_state()
+        return make_validator("folders", *state)
+    
+    async def get_all_folders(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
         """Get all folders"""
-        folders_with_counts = await self.repository.get_all_with_counts(skip, limit)
-        
-        return [
-            FolderResponse(
-                **f["folder"].__dict__,
-                exam_count=f["exam_count"],
-                file_count=f["file_count"]
+        try:
+            folders, next_cursor = await self.repository.get_all(skip, limit, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
             )
-            for f in folders_with_counts
-        ]
+        
+        return Page(validate_list(FolderResponse, folders), next_cursor)
     
     async def update_folder(self, folder_id: int, folder_data: FolderUpdate) -> FolderResponse:
         """Update folder"""
@@ -74,7 +86,11 @@ class FolderService:
         
         folder = await self.repository.update(folder)
         
-        return await self.get_folder(folder_id)
+        return FolderResponse.model_validate(folder)
+    
+    async def rebuild_counts(self) -> int:
+        """Repair the denormalized exam/file counters on every folder"""
+        return await self.repository.rebuild_counts()
     
     async def delete_folder(self, folder_id: int) -> bool:
         """Delete folder"""
@@ -85,5 +101,17 @@ class FolderService:
                 detail="Folder not found"
             )
         
-        return await self.repository.delete(folder_id)
+        # Exams are moved out of the folder as an edit of each, so their
+        # versions, ETags and papers change; its files are deleted with it,
+        # releasing their blobs
+        moved = await ExamRepository(self.db).move_out_of_folder(folder_id)
+        files = await FileRepository(self.db).get_by_folder_for_delete(folder_id)
+        deleted = await self.repository.delete(folder_id, commit=False)
+        blobs = BlobStore(self.db)
+        await blobs.release(file.blob_id for file in files if file.blob_id is not None)
+        blobs.remove_after_commit(Path(file.file_path) for file in files if file.blob_id is None)
+        await blobs.commit()
+        await ExamService(self.db).exams_changed(moved)
+        dashboard_cache.invalidate()
+        return deleted
 
@@ -0,0 +1,146 @@
+"""Resized WebP copies of uploaded images
+
+Uploads queue their JPEG and PNG blobs here once committed and return
+without waiting. A worker task has every variant in IMAGE_VARIANTS made
+in a process pool, so resizing never blocks the event loop. Copies are
+cached on disk under the blob's SHA-256, so an image uploaded many times
+is resized once and a cached copy is served without any work. A variant
+requested before it is ready is made on demand, joining the work already
+under way for it if there is any.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.blob_store import derivative_path
+from app.services.image_processing import make_derivative
+
+
+class DerivativeQueue:
+    """Makes and caches the WebP variants of image blobs in a process pool"""
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._making: Dict[Tuple[str, str], asyncio.Future] = {}  # (sha256, variant) being made
+        self.running = 0
+        self.generated = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds: Optional[float] = None
+    
+    def start(self):
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._start_pool()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """Stop the workers; variants not made yet are made when requested"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._stop_pool()
+    
+    def _start_pool(self):
+        if self._pool is None:
+            # Spawned workers do not inherit the server's threads and open connections
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+    
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def enqueue(self, images: Iterable[Tuple[str, str]]) -> None:
+        """Queue (sha256, path) image blobs for resizing; never waits"""
+        if self._queue is None:
+            return  # not running; variants are made when requested
+        for image in images:
+            self._queue.put_nowait(image)
+    
+    async def _work(self):
+        while True:
+            sha256, source = await self._queue.get()
+            try:
+                for variant in settings.IMAGE_VARIANTS:
+                    await self.get(sha256, source, variant)
+            except Exception as e:
+                print(f"⚠️  Resizing image {sha256[:12]} failed: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def get(self, sha256: str, source: str, variant: str) -> Path:
+        """Path of the cached ``variant`` of an image blob, made first if need be"""
+        target = derivative_path(sha256, variant)
+        if await asyncio.to_thread(target.exists):
+            self.cache_hits += 1
+            return target
+        
+        key = (sha256, variant)
+        making = self._making.get(key)
+        if making is None:
+            making = asyncio.ensure_future(self._make(source, target, settings.IMAGE_VARIANTS[variant]))
+            self._making[key] = making
+            making.add_done_callback(lambda future: self._made(key, future))
+        # Whoever gave up waiting, the copy is finished for the others
+        await asyncio.shield(making)
+        return target
+    
+    def _made(self, key: Tuple[str, str], future: asyncio.Future):
+        del self._making[key]
+        if not future.cancelled():
+            future.exception()  # raised to the waiters, if any are left
+    
+    async def _make(self, source: str, target: Path, max_side: int):
+        self._start_pool()
+        loop = asyncio.get_running_loop()
+        self.running += 1
+        try:
+            derivative = await loop.run_in_executor(
+                self._pool, make_derivative, source, str(target), max_side,
+                settings.IMAGE_WEBP_QUALITY, settings.IMAGE_MAX_PIXELS
+            )
+        except BrokenProcessPool:
+            # A worker died, e.g. out of memory on this image; the pool
+            # cannot be used again
+            self._stop_pool()
+            self.failed += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+        self.generated += 1
+        self.total_seconds += derivative.seconds
+        self.max_seconds = max(self.max_seconds, derivative.seconds)
+        self.last_seconds = derivative.seconds
+    
+    def stats(self) -> dict:
+        """Queue depth, cache hits and resizing times"""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "generated": self.generated,
+            "failed": self.failed,
+            "cache_hits": self.cache_hits,
+            "avg_seconds": round(self.total_seconds / self.generated, 4) if self.generated else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+            "last_seconds": round(self.last_seconds, 4) if self.last_seconds is not None else None,
+        }
+
+
+derivative_queue = DerivativeQueue(settings.IMAGE_WORKERS)
@@ -0,0 +1,161 @@
+"""Streaming parsers for question bank imports"""
+import codecs
+import csv
+import sys
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from app.core.config import settings
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# (line number, record, error); exactly one of record and error is set
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_chars: int) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """Decode UTF-8 chunks and yield (line number, line) without line endings
+    
+    Only the current partial line is buffered, however large the input;
+    a line longer than ``max_chars`` is dropped as it arrives and yielded
+    as None. Invalid bytes are replaced rather than aborting the import.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    overlong = False
+    number = 0
+    async for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            number += 1
+            if overlong or len(line) > max_chars:
+                overlong = False
+                yield number, None
+            else:
+                yield number, line[:-1] if line.endswith("\r") else line
+        if len(pending) > max_chars:
+            pending = ""
+            overlong = True
+    
+    pending += decoder.decode(b"", final=True)
+    if overlong or len(pending) > max_chars:
+        yield number + 1, None
+    elif pending:
+        yield number + 1, pending[:-1] if pending.endswith("\r") else pending
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """One JSON object per line; blank lines are skipped"""
+    max_chars = settings.IMPORT_MAX_ROW_CHARS
+    async for number, line in iter_lines(chunks, max_chars):
+        if line is None:
+            yield number, None, f"Row longer than {max_chars} characters"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, record, None
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """A header row followed by one question per record
+    
+    Quoted fields may span lines; a record is complete once its quotes
+    are balanced, and its lines are then read by csv.reader in one pass.
+    A record longer than IMPORT_MAX_ROW_CHARS is reported and reading
+    resumes on the next line, so an unclosed quote costs one row rather
+    than buffering the rest of the file. Empty cells are left out so
+    schema defaults apply, and ``options`` is either a JSON array or
+    values separated by ``|``.
+    """
+    max_chars = settings.IMPORT_MAX_ROW_CHARS
+    header = None
+    record_lines: List[str] = []
+    quotes = 0
+    length = 0
+    start = 0
+    async for number, line in iter_lines(chunks, max_chars):
+        if not record_lines:
+            if line is not None and not line.strip():
+                continue
+            start = number
+        if line is None or length + len(line) >= max_chars:
+            record_lines, quotes, length = [], 0, 0
+            yield start, None, f"Row longer than {max_chars} characters"
+            continue
+        record_lines.append(line + "\n")
+        quotes += line.count('"')
+        length += len(line) + 1
+        if quotes % 2:
+            continue
+        
+        try:
+            values = next(csv.reader(record_lines))
+        except csv.Error as e:
+            yield start, None, f"Invalid CSV: {e}"
+            continue
+        finally:
+            record_lines, quotes, length = [], 0, 0
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, _csv_record(header, values), None
+    
+    if record_lines:
+        yield start, None, "Unterminated quoted field"
+
+
+def _csv_record(header: list, values: list) -> dict:
+    record = {name: value for name, value in zip(header, values) if value != ""}
+    options = record.get("options")
+    if options is not None:
+        if options.lstrip().startswith("["):
+            try:
+                record["options"] = orjson.loads(options)
+            except orjson.JSONDecodeError:
+                pass  # left as a string, which fails validation with a clear error
+        else:
+            record["options"] = [option.strip() for option in options.split("|")]
+    return record
+
+
+@dataclass
+class ImportState:
+    """Exams an import has resolved so far, carried from batch to batch"""
+    folder_id: Optional[int] = None
+    exam_ids: Dict[str, int] = field(default_factory=dict)  # exam_title -> exam created for it
+    next_order: Dict[int, int] = field(default_factory=dict)  # exam id -> order of its next question
+    created: Set[int] = field(default_factory=set)  # exams created by this import
+    updated: Set[int] = field(default_factory=set)  # existing exams that received questions
+    missing: Set[int] = field(default_factory=set)  # exam_ids that do not exist
+
+
+def peak_memory_bytes() -> int:
+    """High-water mark of this process's resident memory, 0 if unknown"""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+PARSERS = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
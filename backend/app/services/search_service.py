@@ -0,0 +1,105 @@
+"""Full-text search over exams and questions"""
+import html
+import re
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.search import EXAM_ROWID_BASE, SearchRepository
+from app.schemas.search import SearchResponse, SearchResult
+
+WORD = re.compile(r"\w+")
+
+# Put around matched words by SQLite, and turned into <mark> tags once the
+# snippet has been escaped
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+
+def match_expression(query: str) -> Optional[str]:
+    """FTS5 query requiring every word of a search, the last one as a prefix
+    
+    Each word is quoted, so nothing typed is read as FTS5 syntax. The
+    last word is matched as a prefix, for searches typed as you go,
+    unless it is a single letter or the search ends with a space.
+    Returns None if the search has no words.
+    """
+    words = WORD.findall(query)[:settings.SEARCH_MAX_WORDS]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) > 1 and not query[-1].isspace():
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def render_snippet(snippet: str) -> str:
+    """HTML-escape a snippet and mark its matched words"""
+    return html.escape(snippet).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>")
+
+
+class SearchService:
+    """Search service"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = SearchRepository(db)
+    
+    async def search(
+        self,
+        query: str,
+        type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> SearchResponse:
+        """Search exam titles and descriptions and question texts and options
+        
+        Results are ranked by BM25 and paged with ``skip``, up to
+        SEARCH_MAX_RESULTS deep. Words so common that they match more than
+        SEARCH_MAX_RANKED exams and questions rank only the newest ones.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Search query has no words"
+            )
+        
+        limit = min(limit, settings.SEARCH_MAX_RESULTS - skip)
+        if limit <= 0:
+            return SearchResponse(query=query, results=[])
+        # One extra match tells us whether another page exists
+        matches = await self.repository.search(
+            expression, type, skip, limit + 1,
+            max_ranked=settings.SEARCH_MAX_RANKED,
+            snippet_tokens=settings.SEARCH_SNIPPET_TOKENS,
+            marks=(MATCH_START, MATCH_END)
+        )
+        next_skip = skip + limit if len(matches) > limit and skip + limit < settings.SEARCH_MAX_RESULTS else None
+        matches = matches[:limit]
+        
+        question_ids = [match.rowid for match in matches if match.rowid < EXAM_ROWID_BASE]
+        questions = {q.id: q for q in await self.repository.get_questions(question_ids)} if question_ids else {}
+        exam_ids = {match.rowid - EXAM_ROWID_BASE for match in matches if match.rowid >= EXAM_ROWID_BASE}
+        exam_ids.update(question.exam_id for question in questions.values())
+        exams = {exam.id: exam for exam in await self.repository.get_exams(exam_ids)} if exam_ids else {}
+        
+        results = []
+        for match in matches:
+            question = questions.get(match.rowid)
+            exam = exams.get(question.exam_id if question else match.rowid - EXAM_ROWID_BASE)
+            if exam is None:
+                continue  # deleted since the search ran
+            results.append(SearchResult(
+                type="question" if question else "exam",
+                id=question.id if question else exam.id,
+                exam_id=exam.id,
+                exam_title=exam.title,
+                title=question.question_text if question else exam.title,
+                question_type=question.question_type if question else None,
+                snippet=render_snippet(match.snippet),
+                score=round(-match.score, 4),
+                is_published=exam.is_published,
+                folder_id=exam.folder_id
+            ))
+        return SearchResponse(query=query, results=results, next_skip=next_skip)
@@ -0,0 +1,193 @@
+"""Background text extraction from uploaded documents
+
+Uploads queue the blobs of their PDF, DOCX, PPTX and TXT files here once
+committed, and return without waiting. Worker tasks hand each blob to a
+process pool, so parsing never blocks the event loop or holds the GIL
+the server needs, and store the outcome through the write scheduler.
+
+Text is kept per blob, so a document uploaded many times is extracted
+once, and a blob that already has an outcome is skipped: re-queueing is
+harmless. Blobs uploaded while the pipeline was not running are picked
+up when it next starts.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import ReadSessionLocal
+from app.database.write_queue import write_scheduler
+from app.repositories.file import BlobTextRepository
+from app.services.document_text import EXTRACTABLE_TYPES, UnsupportedDocument, extract_text
+
+
+class ExtractionQueue:
+    """Extracts the text of queued blobs in a process pool"""
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()  # blobs waiting or being extracted
+        self._tasks: List[asyncio.Task] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.running = 0
+        self.extracted = 0
+        self.failed = 0
+        self.unsupported = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds: Optional[float] = None
+    
+    def start(self):
+        """Start the workers on the running event loop and queue the backlog"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._start_pool()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._queue_backlog()))
+    
+    async def stop(self):
+        """Stop the workers; blobs still queued are picked up at the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued.clear()
+        self._stop_pool()
+    
+    def _start_pool(self):
+        if self._pool is None:
+            # Spawned workers do not inherit the server's threads and open connections
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+    
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def enqueue(self, blob_ids: Iterable[int]) -> None:
+        """Queue blobs for extraction, unless already queued; never waits"""
+        if self._queue is None:
+            return  # not running; the backlog is queued when it starts
+        for blob_id in blob_ids:
+            if blob_id not in self._queued:
+                self._queued.add(blob_id)
+                self._queue.put_nowait(blob_id)
+    
+    async def run_backlog(self, retry_failed: bool = False) -> int:
+        """Extract the text of every blob still without it, and wait
+        
+        For the management command, outside the server; the blobs are
+        spread over the pool's processes. Returns the number processed.
+        """
+        async with ReadSessionLocal() as db:
+            blob_ids = await BlobTextRepository(db).get_unextracted(EXTRACTABLE_TYPES, retry_failed)
+        self._start_pool()
+        try:
+            pending = iter(blob_ids)
+            
+            async def work():
+                for blob_id in pending:
+                    await self.extract(blob_id, force=retry_failed)
+            
+            await asyncio.gather(*(work() for _ in range(self.workers)))
+        finally:
+            self._stop_pool()
+        return len(blob_ids)
+    
+    async def _queue_backlog(self):
+        async with ReadSessionLocal() as db:
+            self.enqueue(await BlobTextRepository(db).get_unextracted(EXTRACTABLE_TYPES))
+    
+    async def _work(self):
+        while True:
+            blob_id = await self._queue.get()
+            try:
+                await self.extract(blob_id)
+            except Exception as e:
+                print(f"⚠️  Text extraction of blob {blob_id} failed: {e}")
+            finally:
+                self._queued.discard(blob_id)
+                self._queue.task_done()
+    
+    async def extract(self, blob_id: int, force: bool = False) -> None:
+        """Extract and store a blob's text, unless that has been done"""
+        self.running += 1
+        try:
+            await self._extract(blob_id, force)
+        finally:
+            self.running -= 1
+    
+    async def _extract(self, blob_id: int, force: bool):
+        async with ReadSessionLocal() as db:
+            source = await BlobTextRepository(db).get_source(blob_id, EXTRACTABLE_TYPES)
+        if source is None or (source.status is not None and not force):
+            return
+        
+        loop = asyncio.get_running_loop()
+        seconds = None
+        values = {"text": None, "page_count": None, "char_count": 0, "truncated": False, "error": None}
+        start = time.perf_counter()
+        try:
+            document = await loop.run_in_executor(
+                self._pool, extract_text, source.path, source.file_type, settings.EXTRACTION_MAX_CHARS
+            )
+            values.update(
+                status="done", text=document.text, page_count=document.page_count,
+                char_count=len(document.text), truncated=document.truncated
+            )
+            # Not counting the wait for a worker process to start
+            seconds = document.seconds
+            self.extracted += 1
+        except UnsupportedDocument as e:
+            values.update(status="unsupported", error=str(e))
+            self.unsupported += 1
+        except BrokenProcessPool:
+            # A worker died, e.g. out of memory on this document; the pool
+            # cannot be used again
+            self._stop_pool()
+            self._start_pool()
+            values.update(status="failed", error="Extraction process died")
+            self.failed += 1
+        except Exception as e:
+            # A malformed document
+            values.update(status="failed", error=f"{type(e).__name__}: {e}"[:500])
+            self.failed += 1
+        if seconds is None:
+            seconds = time.perf_counter() - start
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_seconds = seconds
+        
+        async def save(db: AsyncSession):
+            await BlobTextRepository(db).save(blob_id, seconds=round(seconds, 4), **values)
+        
+        try:
+            await write_scheduler.run(save)
+        except IntegrityError:
+            pass  # the blob was deleted meanwhile
+    
+    def stats(self) -> dict:
+        """Queue depth and extraction times"""
+        processed = self.extracted + self.failed + self.unsupported
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": self.running,
+            "extracted": self.extracted,
+            "failed": self.failed,
+            "unsupported": self.unsupported,
+            "avg_seconds": round(self.total_seconds / processed, 4) if processed else 0.0,
+            "max_seconds": round(self.max_seconds, 4),
+            "last_seconds": round(self.last_seconds, 4) if self.last_seconds is not None else None,
+        }
+
+
+extraction_queue = ExtractionQueue(settings.EXTRACTION_WORKERS)
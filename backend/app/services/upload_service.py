@@ -1,15 +1,29 @@
 """Upload service"""
+import asyncio
+import mimetypes
 import os
-import uuid
-from typing import Optional
+from typing import List, Optional, Tuple
 from pathlib import Path
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import UploadFile, HTTPException, status
+from fastapi import HTTPException, Request, status
 
-from app.models.file import File
-from app.repositories.file import FileRepository
-from app.schemas.file import FileResponse
+from app.repositories.base import Page, InvalidCursorError
+from app.repositories.file import BlobTextRepository, FileRepository
+from app.repositories.folder import FolderRepository
+from app.schemas.file import (
+    BatchUploadResponse, BatchUploadResult, FileResponse, FileTextResponse, StorageReport
+)
+from app.services.dashboard_service import dashboard_cache
+from app.services.blob_store import BlobStore, hash_file
+from app.services.document_text import EXTRACTABLE_TYPES
+from app.services.image_derivatives import derivative_queue
+from app.services.image_processing import IMAGE_TYPES
+from app.services.text_extraction import extraction_queue
+from app.services.upload_stream import ReceivedFile, check_upload_request, discard, receive_files
 from app.core.config import settings
+from app.core.etag import Validator, make_validator
+from app.core.serialization import validate_list
 
 
 class UploadService:
@@ -18,50 +32,122 @@ class UploadService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.repository = FileRepository(db)
+        self.folder_repo = FolderRepository(db)
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(parents=True, exist_ok=True)
     
-    async def upload_file(self, file: UploadFile, folder_id: Optional[int] = None) -> FileResponse:
-        """Upload a file"""
-        # Validate file size
-        contents = await file.read()
-        file_size = len(contents)
+    async def upload_file(self, request: Request, folder_id: Optional[int] = None) -> FileResponse:
+        """Upload the file sent in a multipart/form-data request
         
-        if file_size > settings.MAX_UPLOAD_SIZE:
+        The request is vetted from its headers and the folder checked before
+        any of the body is read. The file is then streamed to a temporary
+        file and hashed on the way, and only moved into the blob store if
+        no identical file is stored already.
+        """
+        boundary = check_upload_request(request.headers)
+        await self._check_folder(folder_id)
+        
+        files = await receive_files(boundary, request.stream(), self.upload_dir)
+        if not files:
             raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE} bytes"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No file in the request"
             )
         
-        # Validate file extension
-        file_ext = file.filename.split(".")[-1].lower() if "." in file.filename else ""
-        if file_ext not in settings.ALLOWED_EXTENSIONS:
+        try:
+            return await self.save_upload(files[0], folder_id)
+        finally:
+            await discard(files)
+    
+    async def upload_files(self, request: Request, folder_id: Optional[int] = None) -> BatchUploadResponse:
+        """Upload every file sent in a multipart/form-data request at once
+        
+        Files are streamed to disk as they arrive, with up to
+        UPLOAD_CONCURRENCY blocks written and hashed at a time. A file with
+        a disallowed extension or over MAX_UPLOAD_SIZE is rejected on its
+        own; the rest are recorded together in one commit.
+        """
+        max_files = settings.MAX_BATCH_UPLOAD_FILES
+        boundary = check_upload_request(request.headers, max_files)
+        await self._check_folder(folder_id)
+        
+        files = await receive_files(
+            boundary, request.stream(), self.upload_dir, max_files,
+            concurrency=settings.UPLOAD_CONCURRENCY, strict=False
+        )
+        if not files:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
-            )
-        
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = self.upload_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        # Save to database
-        file_obj = File(
-            filename=unique_filename,
-            original_filename=file.filename,
-            file_path=str(file_path),
-            file_type=file_ext,
-            file_size=file_size,
-            mime_type=file.content_type,
-            folder_id=folder_id
-        )
-        file_obj = await self.repository.create(file_obj)
+                detail="No file in the request"
+            )
+        
+        try:
+            saved = iter(await self.save_uploads([file for file in files if file.error is None], folder_id))
+        finally:
+            await discard(files)
+        
+        results = [
+            BatchUploadResult(filename=file.filename, error=file.error) if file.error is not None
+            else BatchUploadResult(filename=file.filename, file=next(saved))
+            for file in files
+        ]
+        uploaded = sum(result.file is not None for result in results)
+        return BatchUploadResponse(uploaded=uploaded, rejected=len(results) - uploaded, results=results)
+    
+    async def _check_folder(self, folder_id: Optional[int]) -> None:
+        """404 unless the folder exists, checked before an upload's body is read"""
+        if folder_id is None:
+            return
+        folder_exists = await self.folder_repo.get_updated_at(folder_id) is not None
+        # Free the write connection while the body streams in
+        await self.db.rollback()
+        if not folder_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Folder not found"
+            )
+    
+    async def save_upload(self, upload: ReceivedFile, folder_id: Optional[int]) -> FileResponse:
+        """Record a received file against its blob in one commit"""
+        return (await self.save_uploads([upload], folder_id))[0]
+    
+    async def save_uploads(self, uploads: List[ReceivedFile], folder_id: Optional[int]) -> List[FileResponse]:
+        """Record received files against their blobs in one commit
+        
+        The files are inserted in one statement and the folder's counters
+        changed once. Identical files within the batch share one blob.
+        """
+        if not uploads:
+            return []
+        if not await self.folder_repo.adjust_counts(
+            folder_id, files=len(uploads), size=sum(upload.size for upload in uploads)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Folder not found"
+            )
         
-        return FileResponse(**file_obj.__dict__)
+        blobs = BlobStore(self.db)
+        rows = []
+        for upload in uploads:
+            blob = await blobs.add(upload.sha256, upload.size, upload.path)
+            rows.append({
+                "filename": upload.sha256,
+                "original_filename": upload.filename,
+                "file_path": blob.path,
+                "file_type": upload.extension,
+                "file_size": upload.size,
+                "mime_type": upload.content_type,
+                "folder_id": folder_id,
+                "blob_id": blob.id,
+            })
+        file_objs = await self.repository.create_many(rows, commit=False)
+        await blobs.commit()
+        dashboard_cache.invalidate()
+        extraction_queue.enqueue(row["blob_id"] for row in rows if row["file_type"] in EXTRACTABLE_TYPES)
+        derivative_queue.enqueue((row["filename"], row["file_path"]) for row in rows if row["file_type"] in IMAGE_TYPES)
+        
+        return validate_list(FileResponse, file_objs)
     
     async def get_file(self, file_id: int) -> FileResponse:
         """Get file by ID"""
@@ -72,15 +158,154 @@ class UploadService:
                 detail="File not found"
             )
         
-        return FileResponse(**file_obj.__dict__)
+        return FileResponse.model_validate(file_obj)
+    
+    async def get_file_content(self, file_id: int) -> Row:
+        """Get what serving a file's contents takes, without touching the disk
+        
+        Ends the read transaction, so a long download does not hold a
+        database connection.
+        """
+        content = await self.repository.get_content(file_id)
+        await self.db.rollback()
+        if content is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        return content
+    
+    @staticmethod
+    def get_content_validator(content: Row) -> Validator:
+        """Validator of a file's contents: the SHA-256 of its blob
+        
+        A file's contents never change, so this is a strong ETag that any
+        copy of the same bytes shares.
+        """
+        if content.sha256 is not None:
+            return Validator(f'"{content.sha256}"', content.created_at)
+        return make_validator("file", content.id, content.file_size, last_modified=content.created_at)
+    
+    @staticmethod
+    def get_content_type(content: Row) -> str:
+        """Content type for a file's extension
+        
+        The type the client sent with the upload is not trusted, since the
+        contents are served inline.
+        """
+        return mimetypes.guess_type(f"file.{content.file_type}")[0] or "application/octet-stream"
+    
+    async def get_file_text(self, file_id: int) -> FileTextResponse:
+        """Get the text extracted from a file, or where its extraction stands"""
+        row = await BlobTextRepository(self.db).get_for_file(file_id)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found"
+            )
+        
+        if row.status is not None:
+            return FileTextResponse(
+                file_id=file_id,
+                status=row.status,
+                page_count=row.page_count,
+                char_count=row.char_count,
+                truncated=row.truncated,
+                seconds=row.seconds,
+                error=row.error,
+                text=row.text
+            )
+        if row.file_type not in EXTRACTABLE_TYPES:
+            return FileTextResponse(
+                file_id=file_id,
+                status="unsupported",
+                error=f"No text extraction for .{row.file_type} files"
+            )
+        if row.blob_id is None:
+            return FileTextResponse(
+                file_id=file_id,
+                status="pending",
+                error="Stored before the blob store; run manage.py dedupe-files"
+            )
+        return FileTextResponse(file_id=file_id, status="pending")
+    
+    async def get_content_size(self, content: Row) -> int:
+        """Size of a file's contents on disk, or 404 if they are missing"""
+        try:
+            stat = await asyncio.to_thread(os.stat, content.file_path)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File contents not found"
+            )
+        return stat.st_size
+    
+    @staticmethod
+    def get_image_validator(content: Row, variant: str) -> Validator:
+        """Validator of a resized copy of an image file, or 404 if there is none
+        
+        Copies are made from the blob, so the ETag is its SHA-256 and the
+        variant.
+        """
+        if variant not in settings.IMAGE_VARIANTS:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Unknown image variant; use one of {', '.join(settings.IMAGE_VARIANTS)}"
+            )
+        if content.file_type not in IMAGE_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No resized copies of .{content.file_type} files"
+            )
+        if content.sha256 is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Stored before the blob store; run manage.py dedupe-files"
+            )
+        return Validator(f'"{content.sha256}-{variant}"', content.created_at)
+    
+    async def get_image(self, content: Row, variant: str) -> Tuple[str, int]:
+        """Path and size of a resized copy of an image file, made if not cached yet"""
+        try:
+            path = await derivative_queue.get(content.sha256, content.file_path, variant)
+            stat = await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File contents not found"
+            )
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="File is not a readable image"
+            )
+        return str(path), stat.st_size
     
-    async def get_files_by_folder(self, folder_id: Optional[int], skip: int = 0, limit: int = 100) -> list[FileResponse]:
+    async def get_files_by_folder(
+        self,
+        folder_id: Optional[int],
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> Page:
         """Get files by folder"""
-        files = await self.repository.get_by_folder(folder_id, skip, limit)
-        return [FileResponse(**f.__dict__) for f in files]
+        try:
+            files, next_cursor = await self.repository.get_by_folder(folder_id, skip, limit, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        return Page(validate_list(FileResponse, files), next_cursor)
+    
+    async def get_files_validator(self, folder_id: Optional[int]) -> Validator:
+        """Get the validator of a folder's file listing"""
+        state = await self.repository.get_listing_state(self.repository.folder_filter(folder_id))
+        return make_validator("files", folder_id, *state)
     
     async def delete_file(self, file_id: int) -> bool:
-        """Delete file"""
+        """Delete file, and its blob if no other file shares it"""
         file_obj = await self.repository.get_by_id(file_id)
         if not file_obj:
             raise HTTPException(
@@ -88,13 +313,43 @@ class UploadService:
                 detail="File not found"
             )
         
-        # Delete physical file
-        try:
-            if os.path.exists(file_obj.file_path):
-                os.remove(file_obj.file_path)
-        except Exception as e:
-            print(f"Error deleting file: {e}")
+        await self.folder_repo.adjust_counts(file_obj.folder_id, files=-1, size=-file_obj.file_size)
+        deleted = await self.repository.delete(file_id, commit=False)
         
-        # Delete from database
-        return await self.repository.delete(file_id)
-
+        # The row goes first: a blob cannot be deleted while a file points at it
+        blobs = BlobStore(self.db)
+        if file_obj.blob_id is not None:
+            await blobs.release([file_obj.blob_id])
+        else:
+            blobs.remove_after_commit([Path(file_obj.file_path)])
+        await blobs.commit()
+        dashboard_cache.invalidate()
+        return deleted
+    
+    async def get_storage_report(self) -> StorageReport:
+        """Report disk usage and the space saved by deduplication"""
+        return await BlobStore(self.db).get_report()
+    
+    async def migrate_legacy_files(self) -> int:
+        """Move files stored before the blob store into it, one commit each
+        
+        Duplicates among them are stored once. Returns the number of files
+        moved; files missing from disk are left as they are.
+        """
+        moved = 0
+        for file_obj in await self.repository.get_legacy():
+            source = Path(file_obj.file_path)
+            try:
+                sha256, size = await asyncio.to_thread(hash_file, source)
+            except FileNotFoundError:
+                continue
+            
+            blobs = BlobStore(self.db)
+            blob = await blobs.add(sha256, size, source)
+            if blob.ref_count > 1:
+                blobs.remove_after_commit([source])
+            file_obj.blob_id = blob.id
+            file_obj.file_path = blob.path
+            await blobs.commit()
+            moved += 1
+        return moved
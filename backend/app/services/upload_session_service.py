@@ -0,0 +1,284 @@
+"""Resumable uploads
+
+A client starts a session with the file's name and size, sends the data
+in chunks, each at the offset the session has reached, and completes the
+session to get the File. Chunks are written straight into a partial file
+under UPLOAD_DIR/partial, and the offset is only advanced for bytes that
+reached it, so after a dropped connection the client asks for the offset
+and carries on from there. Sessions idle for UPLOAD_SESSION_TTL seconds
+are removed, with their partial files, by a periodic sweep.
+"""
+import asyncio
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Set
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.models.file import UploadSession
+from app.repositories.file import UploadSessionRepository
+from app.repositories.folder import FolderRepository
+from app.schemas.file import FileResponse, UploadSessionCreate, UploadSessionResponse
+from app.services.blob_store import hash_file
+from app.services.upload_service import UploadService
+from app.services.upload_stream import ReceivedFile, check_extension, discard, write_at
+
+# Sessions a request of this process is writing to or completing
+_busy: Set[int] = set()
+
+
+def partial_dir() -> Path:
+    return Path(settings.UPLOAD_DIR) / "partial"
+
+
+class UploadSessionService:
+    """Upload session service"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = UploadSessionRepository(db)
+        self.folder_repo = FolderRepository(db)
+        self.partial_dir = partial_dir()
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+    
+    async def create_session(self, data: UploadSessionCreate) -> UploadSessionResponse:
+        """Start a resumable upload with an empty partial file"""
+        extension = check_extension(data.filename, settings.RESUMABLE_EXTENSIONS)
+        if data.size > settings.MAX_RESUMABLE_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size exceeds maximum allowed size of {settings.MAX_RESUMABLE_UPLOAD_SIZE} bytes"
+            )
+        if data.folder_id is not None and await self.folder_repo.get_updated_at(data.folder_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Folder not found"
+            )
+        
+        path = self.partial_dir / f"{uuid.uuid4().hex}.part"
+        await asyncio.to_thread(path.touch)
+        session = UploadSession(
+            filename=data.filename,
+            file_type=extension,
+            mime_type=data.content_type,
+            size=data.size,
+            offset=0,
+            path=str(path),
+            folder_id=data.folder_id
+        )
+        try:
+            await self.repository.create(session)
+        except BaseException:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            raise
+        return self._to_response(session)
+    
+    async def get_session(self, session_id: int) -> UploadSessionResponse:
+        """Get a session and the offset it has reached"""
+        return self._to_response(await self._get(session_id))
+    
+    async def upload_chunk(self, session_id: int, offset: int, request: Request) -> UploadSessionResponse:
+        """Write the request body into a session's partial file at ``offset``
+        
+        ``offset`` must be where the session is; 409 otherwise, with the
+        actual offset in the Upload-Offset header. Whatever part of the
+        body arrives is kept, even if the client disconnects.
+        """
+        row = await self._get(session_id)
+        session, path = self._to_response(row), Path(row.path)
+        # Free the write connection while the body streams in
+        await self.db.rollback()
+        if offset != session.offset:
+            raise _conflict(f"Upload is at offset {session.offset}, not {offset}", session.offset)
+        
+        remaining = session.size - offset
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > remaining:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Chunk runs past the end of the upload"
+            )
+        
+        with _claim(session_id, session.offset):
+            received = await write_at(request.stream(), path, offset, remaining)
+            if received:
+                if not await self.repository.advance(session_id, offset, received):
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Upload session changed while the chunk was received"
+                    )
+                await self.db.commit()
+        
+        session.offset += received
+        session.expires_at = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+        return session
+    
+    async def complete_session(self, session_id: int) -> FileResponse:
+        """Turn a fully received upload into a File, ending the session
+        
+        The partial file is hashed and moved into the blob store, and the
+        session row deleted in the same commit as the File is created.
+        """
+        session = await self._get(session_id)
+        upload = ReceivedFile(
+            "file", session.filename, session.file_type, session.mime_type,
+            Path(session.path), session.size, ""
+        )
+        offset, folder_id = session.offset, session.folder_id
+        # Free the write connection while the file is hashed
+        await self.db.rollback()
+        if offset < upload.size:
+            raise _conflict(f"Upload incomplete: {offset} of {upload.size} bytes received", offset)
+        
+        with _claim(session_id, offset):
+            try:
+                sha256, size = await asyncio.to_thread(hash_file, upload.path)
+            except FileNotFoundError:
+                size = 0
+            if size != upload.size:
+                # The partial file lost data, e.g. in a crash; resume from what it holds
+                await self.repository.set_offset(session_id, min(size, upload.size))
+                await self.db.commit()
+                raise _conflict(f"Upload incomplete: {size} of {upload.size} bytes stored", size)
+            
+            upload = upload._replace(sha256=sha256)
+            if not await self.repository.delete(session_id, commit=False):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Upload session not found"
+                )
+            file_response = await UploadService(self.db).save_upload(upload, folder_id)
+        # Left behind when identical contents were stored already
+        await discard([upload])
+        return file_response
+    
+    async def delete_session(self, session_id: int) -> None:
+        """Abandon an upload, removing its partial file"""
+        session = await self._get(session_id)
+        path = Path(session.path)
+        with _claim(session_id, session.offset):
+            await self.repository.delete(session_id)
+        await asyncio.to_thread(path.unlink, missing_ok=True)
+    
+    async def collect_stale_sessions(self) -> int:
+        """Remove sessions idle for longer than UPLOAD_SESSION_TTL
+        
+        Partial files that no session refers to, left by a crash between
+        creating one and committing its session, are removed once they are
+        as old. Returns the number of files removed.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+        stale = await self.repository.delete_stale(cutoff)
+        await self.db.commit()
+        live = {Path(path).name for path in await self.repository.get_paths()}
+        await self.db.rollback()
+        cutoff_time = time.time() - settings.UPLOAD_SESSION_TTL
+        return await asyncio.to_thread(_remove_partials, self.partial_dir, stale, live, cutoff_time)
+    
+    async def _get(self, session_id: int) -> UploadSession:
+        session = await self.repository.get_by_id(session_id)
+        if not session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload session not found"
+            )
+        return session
+    
+    @staticmethod
+    def _to_response(session: UploadSession) -> UploadSessionResponse:
+        return UploadSessionResponse(
+            id=session.id,
+            filename=session.filename,
+            size=session.size,
+            offset=session.offset,
+            folder_id=session.folder_id,
+            created_at=session.created_at,
+            expires_at=session.updated_at + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+        )
+
+
+
+@contextmanager
+def _claim(session_id: int, offset: int):
+    """Mark a session busy, or raise 409 if a request is already using it"""
+    if session_id in _busy:
+        raise _conflict("Another request is using this upload session", offset)
+    _busy.add(session_id)
+    try:
+        yield
+    finally:
+        _busy.discard(session_id)
+
+
+def _conflict(detail: str, offset: int) -> HTTPException:
+    """409 carrying the offset the session is really at"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail,
+        headers={"Upload-Offset": str(offset)}
+    )
+
+
+class SessionCollector:
+    """Sweeps for stale upload sessions on a background task"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start sweeping on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop sweeping"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    removed = await UploadSessionService(db).collect_stale_sessions()
+                if removed:
+                    print(f"🧹 Removed {removed} stale partial upload(s)")
+            except Exception as e:
+                print(f"⚠️  Sweep for stale uploads failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+def _remove_partials(directory: Path, stale: List[str], live: Set[str], cutoff: float) -> int:
+    """Remove stale partial files and orphans last modified before ``cutoff``"""
+    paths = list(stale)
+    for entry in os.scandir(directory):
+        try:
+            if entry.name not in live and entry.stat().st_mtime < cutoff:
+                paths.append(entry.path)
+        except FileNotFoundError:
+            pass
+    
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+session_collector = SessionCollector(settings.UPLOAD_SESSION_GC_INTERVAL)
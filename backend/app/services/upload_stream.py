@@ -0,0 +1,384 @@
+"""Streaming uploads: multipart/form-data bodies and raw chunks
+
+Request bodies are parsed as they arrive and each file part is written
+to a temporary file in the upload directory, and hashed, from a worker
+thread, so an upload costs a small fixed buffer instead of its size in
+memory and the event loop never blocks on disk I/O. Temporary files are
+then renamed into place, which is atomic within the upload directory.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+
+# Room for the multipart framing and form fields around the files
+FORM_OVERHEAD = 64 * 1024
+
+# File data is handed to the writer thread in blocks of about this size
+WRITE_BUFFER_SIZE = 256 * 1024
+
+TEMP_PREFIX = ".upload-"
+
+
+class ReceivedFile(NamedTuple):
+    """A file part, written to a temporary file in the upload directory"""
+    field_name: str
+    filename: str
+    extension: str
+    content_type: Optional[str]
+    path: Optional[Path]
+    size: int
+    sha256: str
+    error: Optional[str] = None  # why the part was rejected, when not strict
+
+
+def file_extension(filename: str) -> str:
+    """Lower-case extension of a filename, without the dot"""
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def check_extension(filename: str, allowed: Optional[List[str]] = None) -> str:
+    """Return a filename's extension, or raise 400 if it is not allowed
+    
+    ``allowed`` defaults to ALLOWED_EXTENSIONS.
+    """
+    allowed = settings.ALLOWED_EXTENSIONS if allowed is None else allowed
+    extension = file_extension(filename)
+    if extension not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File type not allowed. Allowed types: {', '.join(allowed)}"
+        )
+    return extension
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size exceeds maximum allowed size of {settings.MAX_UPLOAD_SIZE} bytes"
+    )
+
+
+def check_upload_request(headers: Headers, max_files: int = 1) -> bytes:
+    """Vet an upload from its headers alone, before any of the body is read
+    
+    Returns the multipart boundary. A declared Content-Length that cannot
+    fit within the size limit is rejected with 413 straight away.
+    """
+    content_type, params = parse_options_header(headers.get("content-type"))
+    if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data body"
+        )
+    
+    content_length = headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_files * (settings.MAX_UPLOAD_SIZE + FORM_OVERHEAD):
+        raise too_large()
+    return params[b"boundary"]
+
+
+async def discard(files: List[ReceivedFile]) -> None:
+    """Delete the temporary files of uploads that will not be kept"""
+    await asyncio.to_thread(_unlink, [file.path for file in files if file.path is not None])
+
+
+async def receive_files(
+    boundary: bytes,
+    stream: AsyncIterator[bytes],
+    upload_dir: Path,
+    max_files: int = 1,
+    concurrency: int = 1,
+    strict: bool = True
+) -> List[ReceivedFile]:
+    """Parse a multipart body, writing its file parts to temporary files
+    
+    Extensions are checked as soon as a part's headers arrive, before any
+    of its data is written, and a file is stopped as soon as it crosses
+    MAX_UPLOAD_SIZE. With ``strict`` either aborts the upload with 400 or
+    413; otherwise the part is skipped and returned with its error and
+    no path. Up to ``concurrency`` blocks are written and hashed at once
+    while the body keeps arriving. On any error every temporary file of
+    the request is deleted.
+    """
+    receiver = _MultipartReceiver(boundary, upload_dir, max_files, concurrency, strict)
+    try:
+        async for chunk in stream:
+            receiver.parser.write(chunk)
+            await receiver.flush()
+        receiver.parser.finalize()
+        await receiver.flush()
+        return await receiver.finish()
+    except BaseException:
+        await receiver.abort()
+        raise
+
+
+async def write_at(stream: AsyncIterator[bytes], path: Path, offset: int, limit: int) -> int:
+    """Write a request body into an existing file at ``offset``
+    
+    Returns the number of bytes written. If the client goes away midway,
+    what did arrive is kept and counted, so an upload can resume from
+    there. A body of more than ``limit`` bytes is rejected with 413.
+    """
+    fd = await asyncio.to_thread(os.open, path, os.O_WRONLY)
+    written = 0
+    buffer: List[bytes] = []
+    buffered = 0
+    try:
+        try:
+            async for chunk in stream:
+                if written + buffered + len(chunk) > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Chunk runs past the end of the upload"
+                    )
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= WRITE_BUFFER_SIZE:
+                    await asyncio.to_thread(_pwrite, fd, b"".join(buffer), offset + written)
+                    written += buffered
+                    buffer, buffered = [], 0
+        except ClientDisconnect:
+            pass
+        if buffer:
+            await asyncio.to_thread(_pwrite, fd, b"".join(buffer), offset + written)
+            written += buffered
+    finally:
+        await asyncio.to_thread(os.close, fd)
+    return written
+
+
+class _MultipartReceiver:
+    """Turns parser callbacks into file writes
+    
+    The parser's callbacks are synchronous, so they only queue what has
+    to happen, in order; flush() then hands the file I/O to worker
+    threads between chunks of the request body. Each part's operations
+    run one after another, and at most ``concurrency`` of them are in
+    flight, which bounds the data held in memory.
+    """
+    
+    def __init__(self, boundary: bytes, upload_dir: Path, max_files: int, concurrency: int, strict: bool):
+        self.upload_dir = upload_dir
+        self.max_files = max_files
+        self.strict = strict
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        })
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._part: Optional[_FilePart] = None  # the file part being received
+        self._parts: List[_FilePart] = []
+        self._field_bytes = 0
+        self._ops: List[tuple] = []
+        self._slots = asyncio.Semaphore(concurrency)
+    
+    # Parser callbacks
+    def on_part_begin(self):
+        self._headers = {}
+        self._part = None
+    
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+    
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if b"filename" not in options:
+            return  # a plain form field; its value is not needed
+        
+        if len(self._parts) >= self.max_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {self.max_files} file(s) per request"
+            )
+        filename = options[b"filename"].decode("utf-8", "replace")
+        content_type = self._headers.get(b"content-type")
+        self._part = _FilePart(
+            field_name=options.get(b"name", b"").decode("utf-8", "replace"),
+            filename=filename,
+            extension=file_extension(filename),
+            content_type=content_type.decode("latin-1") if content_type else None,
+        )
+        self._parts.append(self._part)
+        try:
+            check_extension(filename)
+        except HTTPException as e:
+            self._reject(e)
+            return
+        self._ops.append((self._open, self._part))
+    
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._part is None:
+            self._field_bytes += end - start
+            if self._field_bytes > FORM_OVERHEAD:
+                raise too_large()
+            return
+        if self._part.error is not None:
+            return  # rejected; its data is skipped
+        
+        self._part.size += end - start
+        if self._part.size > settings.MAX_UPLOAD_SIZE:
+            self._reject(too_large())
+            self._ops.append((self._discard, self._part))
+            return
+        self._ops.append((self._write, self._part, data[start:end]))
+    
+    def on_part_end(self):
+        if self._part is not None and self._part.error is None:
+            self._ops.append((self._close, self._part))
+        self._part = None
+    
+    def _reject(self, error: HTTPException):
+        """Skip the current part, or abort the upload when strict"""
+        if self.strict:
+            raise error
+        self._part.error = error.detail
+    
+    # File I/O, between chunks
+    async def flush(self):
+        """Hand what the parser has queued so far to the worker threads"""
+        ops, self._ops = self._ops, []
+        for op, *args in ops:
+            await op(*args)
+    
+    async def _open(self, part: "_FilePart"):
+        await self._submit(part, part.open, self.upload_dir)
+    
+    async def _write(self, part: "_FilePart", data: bytes):
+        part.buffer.append(data)
+        part.buffered += len(data)
+        if part.buffered >= WRITE_BUFFER_SIZE:
+            await self._write_buffer(part)
+    
+    async def _close(self, part: "_FilePart"):
+        await self._write_buffer(part)
+        await self._submit(part, part.close)
+    
+    async def _discard(self, part: "_FilePart"):
+        part.buffer, part.buffered = [], 0
+        await self._submit(part, part.discard)
+    
+    async def _write_buffer(self, part: "_FilePart"):
+        if part.buffer:
+            data, part.buffer, part.buffered = b"".join(part.buffer), [], 0
+            await self._submit(part, part.write, data)
+    
+    async def _submit(self, part: "_FilePart", function, *args):
+        """Run a blocking operation of a part in a worker thread after the
+        part's earlier ones, waiting only while all slots are busy"""
+        if part.task is not None and part.task.done():
+            part.task.result()  # raise a failed write straight away
+        await self._slots.acquire()
+        previous = part.task
+        
+        async def run():
+            try:
+                if previous is not None:
+                    await previous
+                await asyncio.to_thread(function, *args)
+            finally:
+                self._slots.release()
+        
+        part.task = asyncio.create_task(run())
+    
+    async def finish(self) -> List[ReceivedFile]:
+        """Wait for the last writes, and return the files in request order"""
+        await asyncio.gather(*(part.task for part in self._parts if part.task is not None))
+        return [
+            ReceivedFile(
+                part.field_name, part.filename, part.extension, part.content_type,
+                part.path, part.size, part.digest.hexdigest() if part.error is None else "", part.error
+            )
+            for part in self._parts
+        ]
+    
+    async def abort(self):
+        """Close and delete every temporary file of the request"""
+        # Let writes in flight finish first; their threads cannot be stopped
+        await asyncio.gather(
+            *(part.task for part in self._parts if part.task is not None), return_exceptions=True
+        )
+        await asyncio.to_thread(self._close_all)
+    
+    def _close_all(self):
+        for part in self._parts:
+            if part.file is not None:
+                part.file.close()
+        _unlink([part.path for part in self._parts if part.path is not None])
+
+
+@dataclass
+class _FilePart:
+    """A file part while it is being received; its methods run in worker threads"""
+    field_name: str
+    filename: str
+    extension: str
+    content_type: Optional[str]
+    size: int = 0
+    error: Optional[str] = None
+    file: Optional[BinaryIO] = None
+    path: Optional[Path] = None
+    buffer: List[bytes] = field(default_factory=list)
+    buffered: int = 0
+    digest: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    task: Optional[asyncio.Task] = None  # the last operation queued
+    
+    def open(self, upload_dir: Path):
+        fd, path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=".part", dir=upload_dir)
+        self.file, self.path = os.fdopen(fd, "wb"), Path(path)
+    
+    def write(self, data: bytes):
+        """Hash and write a block of data"""
+        self.digest.update(data)
+        self.file.write(data)
+    
+    def close(self):
+        self.file.close()
+        self.file = None
+    
+    def discard(self):
+        """Drop a part rejected midway"""
+        self.close()
+        _unlink([self.path])
+        self.path = None
+
+
+def _unlink(paths: List[Path]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    view = memoryview(data)
+    while view:
+        count = os.pwrite(fd, view, offset)
+        view, offset = view[count:], offset + count
@@ -0,0 +1,98 @@
+"""
+Benchmark: uploading a course pack, POST /api/upload/batch.
+
+Uploads a pack of files (40 files of 1 MiB by default) into a folder
+once as a single batch request and once as one POST /api/upload per
+file, sent a few at a time, and reports wall time, files per second and
+the number of database transactions committed.
+
+Usage (from the backend directory):
+    python benchmarks/bench_batch_upload.py [--files 40] [--size-mb 1] [--rounds 3]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+
+from common import reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.database.connection import engine
+from main import app
+
+BOUNDARY = "bench-boundary"
+COMMITS = {"count": 0}
+
+
+@event.listens_for(engine.sync_engine, "commit")
+def count_commit(conn):
+    COMMITS["count"] += 1
+
+
+def part(name: str, filename: str, data: bytes) -> bytes:
+    return (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + data + b"\r\n"
+
+
+def make_pack(count: int, size: int) -> list:
+    return [(f"chapter-{n}.pdf", os.urandom(size)) for n in range(count)]
+
+
+async def batch(client, folder_id: int, pack: list):
+    body = b"".join(part("files", filename, data) for filename, data in pack) + f"--{BOUNDARY}--\r\n".encode()
+    response = await client.post(
+        f"/api/upload/batch?folder_id={folder_id}", content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+    )
+    assert response.status_code == 201 and response.json()["uploaded"] == len(pack), response.text
+
+
+async def one_by_one(client, folder_id: int, pack: list):
+    async def upload(filename: str, data: bytes):
+        response = await client.post(
+            f"/api/upload?folder_id={folder_id}",
+            content=part("file", filename, data) + f"--{BOUNDARY}--\r\n".encode(),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+        )
+        assert response.status_code == 201, response.text
+    
+    for start in range(0, len(pack), 4):
+        await asyncio.gather(*(upload(filename, data) for filename, data in pack[start:start + 4]))
+
+
+async def main(count: int, size: int, rounds: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    rows = []
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            folder_id = (await client.post("/api/folders", json={"name": "Course pack"})).json()["id"]
+            for label, upload in (("batch request", batch), ("one request per file", one_by_one)):
+                best = None
+                for _ in range(rounds):
+                    pack = make_pack(count, size)  # fresh contents, so nothing is deduplicated
+                    COMMITS["count"] = 0
+                    start = time.perf_counter()
+                    await upload(client, folder_id, pack)
+                    seconds = time.perf_counter() - start
+                    best = min(best or seconds, seconds)
+                rows.append((label, f"{best * 1000:.0f}", f"{count / best:.0f}", COMMITS["count"]))
+    finally:
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    print(f"\n{count} files of {size / 2**20:.1f} MiB, best of {rounds}\n")
+    print_table(["upload", "ms", "files/s", "commits"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size-mb", type=float, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    count = min(args.files, settings.MAX_BATCH_UPLOAD_FILES)
+    asyncio.run(main(count, min(int(args.size_mb * 2**20), settings.MAX_UPLOAD_SIZE), args.rounds))
@@ -0,0 +1,80 @@
+"""
+Benchmark: creating an exam with its questions.
+
+Compares the old path (one ``QuestionRepository.create`` per question,
+each with its own commit and refresh) with ``ExamService.create_exam``,
+which inserts all questions with ``create_many`` in one transaction.
+
+Usage (from the backend directory):
+    python benchmarks/bench_create_exam.py
+"""
+import asyncio
+
+from common import count_queries, timer, reset_database, print_table
+
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import Exam, Question
+from app.repositories.exam import ExamRepository, QuestionRepository
+from app.schemas.exam import ExamCreate, QuestionCreate, QuestionResponse
+from app.services.exam_service import ExamService
+
+
+def make_exam(question_count: int) -> ExamCreate:
+    return ExamCreate(
+        title=f"Exam with {question_count} questions",
+        total_marks=question_count,
+        questions=[
+            QuestionCreate(
+                question_text=f"Question {n}?",
+                question_type="mcq",
+                options=["a", "b", "c", "d"],
+                correct_answer="a",
+            )
+            for n in range(question_count)
+        ],
+    )
+
+
+async def legacy_create_exam(db, exam_data: ExamCreate):
+    """The previous implementation: commit + refresh per question"""
+    exam = await ExamRepository(db).create(Exam(**exam_data.model_dump(exclude={"questions"})))
+    question_repo = QuestionRepository(db)
+    questions = []
+    for idx, question_data in enumerate(exam_data.questions):
+        question_dict = question_data.model_dump()
+        question_dict["exam_id"] = exam.id
+        question_dict["order"] = idx
+        questions.append(await question_repo.create(Question(**question_dict)))
+    return [QuestionResponse(**q.__dict__) for q in questions]
+
+
+async def main():
+    await reset_database()
+    
+    rows = []
+    for question_count in (10, 100, 1000):
+        exam_data = make_exam(question_count)
+        
+        async with AsyncSessionLocal() as db:
+            with count_queries() as legacy_queries, timer() as legacy_time:
+                await legacy_create_exam(db, exam_data)
+        async with AsyncSessionLocal() as db:
+            with count_queries() as new_queries, timer() as new_time:
+                exam = await ExamService(db).create_exam(exam_data)
+        assert len(exam.questions) == question_count and all(q.id for q in exam.questions)
+        
+        rows.append((
+            question_count,
+            legacy_queries.count, legacy_queries.commits, f"{legacy_time['ms']:.1f}",
+            new_queries.count, new_queries.commits, f"{new_time['ms']:.1f}",
+        ))
+    
+    print("\nCreating one exam\n")
+    print_table(
+        ["questions", "legacy stmts", "legacy commits", "legacy ms", "stmts", "commits", "ms"],
+        rows
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark: dashboard statistics.
+
+Compares the old query-per-number dashboard with the aggregate query,
+checks that both produce the same numbers, and times a cached snapshot
+hit and a burst of concurrent polls after an invalidation.
+
+Usage (from the backend directory):
+    python benchmarks/bench_dashboard.py [--exams 2000] [--attempts 100000]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from common import count_queries, timer, reset_database, print_table
+
+from sqlalchemy import select, func, insert
+
+from app.database.connection import AsyncSessionLocal, ReadSessionLocal
+from app.models.exam import Exam, Question, ExamAttempt
+from app.models.folder import Folder
+from app.models.file import File
+from app.services.dashboard_service import DashboardService, dashboard_cache
+
+POLLERS = 50
+
+
+async def legacy_stats(db) -> dict:
+    """The previous implementation: one query per number"""
+    total_exams = (await db.execute(select(func.count(Exam.id)))).scalar() or 0
+    published_exams = (await db.execute(
+        select(func.count(Exam.id)).where(Exam.is_published == True)
+    )).scalar() or 0
+    total_folders = (await db.execute(select(func.count(Folder.id)))).scalar() or 0
+    total_files = (await db.execute(select(func.count(File.id)))).scalar() or 0
+    total_attempts = (await db.execute(select(func.count(ExamAttempt.id)))).scalar() or 0
+    completed_attempts = (await db.execute(
+        select(func.count(ExamAttempt.id)).where(ExamAttempt.status == "completed")
+    )).scalar() or 0
+    average_score = (await db.execute(
+        select(func.avg(ExamAttempt.percentage)).where(ExamAttempt.status == "completed")
+    )).scalar() or 0.0
+    await db.execute(select(Exam).order_by(Exam.created_at.desc()).limit(5))
+    await db.execute(select(ExamAttempt).order_by(ExamAttempt.created_at.desc()).limit(5))
+    return {
+        "total_exams": total_exams,
+        "total_folders": total_folders,
+        "total_attempts": total_attempts,
+        "total_files": total_files,
+        "published_exams": published_exams,
+        "draft_exams": total_exams - published_exams,
+        "completed_attempts": completed_attempts,
+        "average_score": round(average_score, 2),
+    }
+
+
+async def seed(exam_count: int, attempt_count: int):
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Folder), [
+            {"name": f"Folder {i}", "created_at": now, "updated_at": now} for i in range(50)
+        ])
+        await db.execute(insert(File), [
+            {"filename": f"{i}.pdf", "original_filename": f"{i}.pdf", "file_path": f"/tmp/{i}.pdf",
+             "file_type": "pdf", "file_size": 1024, "created_at": now, "updated_at": now}
+            for i in range(500)
+        ])
+        await db.execute(insert(Exam), [
+            {"title": f"Exam {i}", "is_published": i % 3 != 0, "created_at": now, "updated_at": now}
+            for i in range(exam_count)
+        ])
+        exam_ids = (await db.execute(select(Exam.id))).scalars().all()
+        await db.execute(insert(Question), [
+            {"exam_id": exam_id, "question_text": "Q", "question_type": "mcq", "marks": 1.0,
+             "order": 0, "created_at": now, "updated_at": now}
+            for exam_id in exam_ids
+        ])
+        for offset in range(0, attempt_count, 10_000):
+            await db.execute(insert(ExamAttempt), [
+                {"exam_id": exam_ids[n % len(exam_ids)], "student_name": f"S{n}",
+                 "status": "completed" if n % 4 else "in_progress", "percentage": n % 100,
+                 "created_at": now, "updated_at": now}
+                for n in range(offset, min(offset + 10_000, attempt_count))
+            ])
+        await db.commit()
+
+
+async def main(exam_count: int, attempt_count: int):
+    await reset_database()
+    await seed(exam_count, attempt_count)
+    rows = []
+    
+    async with ReadSessionLocal() as db:
+        with count_queries() as queries, timer() as elapsed:
+            legacy = await legacy_stats(db)
+        rows.append(("legacy, every request", queries.count, f"{elapsed['ms']:.1f}"))
+    
+    dashboard_cache.invalidate()
+    async with ReadSessionLocal() as db:
+        with count_queries() as queries, timer() as elapsed:
+            current = await DashboardService(db).get_dashboard_stats()
+        rows.append(("snapshot recompute", queries.count, f"{elapsed['ms']:.1f}"))
+    assert current.stats.model_dump() == legacy, "results differ"
+    
+    async with ReadSessionLocal() as db:
+        with count_queries() as queries, timer() as elapsed:
+            await DashboardService(db).get_dashboard_stats()
+        rows.append(("snapshot hit", queries.count, f"{elapsed['ms']:.3f}"))
+    
+    # Concurrent polls right after a write share one recompute
+    dashboard_cache.invalidate()
+    
+    async def poll():
+        async with ReadSessionLocal() as db:
+            return await DashboardService(db).get_dashboard_stats()
+    
+    with count_queries() as queries, timer() as elapsed:
+        await asyncio.gather(*(poll() for _ in range(POLLERS)))
+    rows.append((f"{POLLERS} concurrent polls after a write", queries.count, f"{elapsed['ms']:.1f}"))
+    
+    print(f"\nDashboard, {exam_count} exams, {attempt_count} attempts\n")
+    print_table(["case", "queries", "ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exams", type=int, default=2000)
+    parser.add_argument("--attempts", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.exams, args.attempts))
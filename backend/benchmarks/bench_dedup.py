@@ -0,0 +1,75 @@
+"""
+Benchmark: the same course files uploaded into many folders.
+
+Uploads a handful of distinct files (syllabi, slide decks) into every
+one of a set of folders through POST /api/upload, as teachers do when
+they reuse material, then compares the bytes written to the upload
+directory with what a store-every-copy scheme would have written, using
+GET /api/upload/storage and the directory's actual size.
+
+Usage (from the backend directory):
+    python benchmarks/bench_dedup.py [--files 5] [--folders 20] [--size-mb 4]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+
+from common import reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+
+from app.core.config import settings
+from main import app
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+async def main(file_count: int, folder_count: int, size: int):
+    await reset_database()
+    shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    contents = [os.urandom(size) for _ in range(file_count)]
+    
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        folder_ids = []
+        for n in range(folder_count):
+            response = await client.post("/api/folders", json={"name": f"Course {n}"})
+            folder_ids.append(response.json()["id"])
+        
+        start = time.perf_counter()
+        for folder_id in folder_ids:
+            for n, content in enumerate(contents):
+                response = await client.post(
+                    f"/api/upload?folder_id={folder_id}",
+                    files={"file": (f"syllabus-{n}.pdf", content, "application/pdf")}
+                )
+                assert response.status_code == 201, response.text
+        elapsed = time.perf_counter() - start
+        report = (await client.get("/api/upload/storage")).json()
+    
+    on_disk = directory_size(settings.UPLOAD_DIR)
+    shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    uploads = file_count * folder_count
+    rows = [
+        ("one copy per upload (previous)", f"{report['logical_bytes'] / 2**20:.1f}", uploads),
+        ("content-addressed blobs", f"{on_disk / 2**20:.1f}", report["blobs"]),
+    ]
+    print(f"\n{file_count} files of {size / 2**20:.1f} MiB uploaded into {folder_count} folders "
+          f"({uploads} uploads, {uploads / elapsed:.0f} uploads/s)\n")
+    print_table(["storage", "MiB on disk", "files on disk"], rows)
+    print(f"\nsaved {report['saved_bytes'] / 2**20:.1f} MiB, dedup ratio {report['dedup_ratio']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--folders", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.files, args.folders, int(args.size_mb * 2**20)))
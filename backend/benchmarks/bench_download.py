@@ -0,0 +1,106 @@
+"""
+Benchmark: downloading uploaded files, GET /api/upload/{id}/content.
+
+Uploads a few large files, then through the ASGI app: downloads each
+whole, fetches 64 KiB ranges from the end of each (as a PDF viewer or a
+resumed download does), and repeats views with If-None-Match. The same
+downloads also go to a naive endpoint that reads the whole file into
+memory and returns it. Reports requests and MiB per second and how many
+bytes each run read (the database's reads included). Served in-process
+the response bodies are copied through Python either way; under a server
+that offers zero-copy sending, the content endpoint's are not.
+
+Usage (from the backend directory):
+    python benchmarks/bench_download.py [--files 8] [--size-mb 10] [--views 500]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+
+from common import reset_database, print_table
+
+from fastapi import Depends, Response
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import get_read_db
+from app.repositories.file import FileRepository
+from main import app
+
+RANGE_SIZE = 64 * 1024
+
+
+def disk_reads() -> int:
+    """Bytes this process has read through the page cache or the disk"""
+    with open("/proc/self/io") as io:
+        return int(dict(line.split(": ") for line in io.read().splitlines())["rchar"])
+
+
+@app.get("/bench/naive-content/{file_id}", include_in_schema=False)
+async def naive_content(file_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Read the whole file, whatever the client asked for"""
+    file_obj = await FileRepository(db).get_by_id(file_id)
+    with open(file_obj.file_path, "rb") as f:
+        return Response(f.read(), media_type="application/pdf")
+
+
+async def run(client, label: str, requests: list) -> tuple:
+    start_reads = disk_reads()
+    received = 0
+    
+    async def fetch(url: str, headers: dict):
+        nonlocal received
+        async with client.stream("GET", url, headers=headers) as response:
+            assert response.status_code in (200, 206, 304), response.status_code
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+    
+    start = time.perf_counter()
+    for batch in range(0, len(requests), 8):
+        await asyncio.gather(*(fetch(url, headers) for url, headers in requests[batch:batch + 8]))
+    seconds = time.perf_counter() - start
+    return (
+        label, f"{len(requests) / seconds:,.0f}", f"{received / 2**20 / seconds:,.0f}",
+        f"{(disk_reads() - start_reads) / 2**20:,.1f}",
+    )
+
+
+async def main(file_count: int, size: int, views: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    rows = []
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            files = []
+            for n in range(file_count):
+                response = await client.post(
+                    "/api/upload", files={"file": (f"slides-{n}.pdf", os.urandom(size), "application/pdf")}
+                )
+                file = response.json()["file"]
+                files.append((file["id"], f'"{file["filename"]}"'))
+            
+            tail = {"Range": f"bytes=-{RANGE_SIZE}"}
+            for label, url in (("content endpoint", "/api/upload/{}/content"), ("naive", "/bench/naive-content/{}")):
+                rows.append(await run(client, f"whole file, {label}", [(url.format(id), {}) for id, _ in files]))
+                rows.append(await run(client, f"64 KiB tail range, {label}", [(url.format(id), tail) for id, _ in files] * 8))
+                repeat = [(url.format(files[n % file_count][0]), {"If-None-Match": files[n % file_count][1]})
+                          for n in range(views)]
+                rows.append(await run(client, f"repeat view, {label}", repeat))
+    finally:
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    print(f"\n{file_count} files of {size / 2**20:.1f} MiB, 8 requests at a time\n")
+    print_table(["requests", "req/s", "MiB/s", "read from disk MiB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--views", type=int, default=500)
+    args = parser.parse_args()
+    size = min(int(args.size_mb * 2**20), settings.MAX_UPLOAD_SIZE)
+    asyncio.run(main(args.files, size, args.views))
@@ -0,0 +1,78 @@
+"""
+Benchmark: loading an exam with its questions through ExamService.
+
+Compares loading the exam and its questions from the database on every
+call (the cache cleared before each one) with the versioned in-process
+cache, which costs one version lookup per call. Then bumps the version
+from a separate session, as another worker would, and checks that the
+next call sees the edit.
+
+Usage (from the backend directory):
+    python benchmarks/bench_exam_cache.py [--questions 100] [--calls 2000]
+"""
+import argparse
+import asyncio
+
+from common import count_queries, timer, reset_database, print_table
+
+from sqlalchemy import update
+
+from app.database.connection import AsyncSessionLocal, ReadSessionLocal
+from app.models.exam import Exam
+from app.schemas.exam import ExamCreate
+from app.services.exam_cache import exam_cache
+from app.services.exam_service import ExamService
+
+
+async def measure(exam_id: int, call_count: int, cached: bool):
+    async with ReadSessionLocal() as db:
+        service = ExamService(db)
+        with count_queries() as queries, timer() as elapsed:
+            for _ in range(call_count):
+                if not cached:
+                    exam_cache.clear()
+                exam = await service.get_exam(exam_id, include_answers=True)
+    return exam, queries.count / call_count, elapsed["ms"] / call_count
+
+
+async def main(question_count: int, call_count: int):
+    await reset_database()
+    async with AsyncSessionLocal() as db:
+        created = await ExamService(db).create_exam(ExamCreate(
+            title="Final exam",
+            is_published=True,
+            total_marks=question_count,
+            questions=[
+                {"question_text": f"Question {n}", "question_type": "mcq",
+                 "options": ["a", "b", "c", "d"], "correct_answer": "a", "marks": 1}
+                for n in range(question_count)
+            ],
+        ))
+    
+    uncached, uncached_queries, uncached_ms = await measure(created.id, call_count, cached=False)
+    cached, cached_queries, cached_ms = await measure(created.id, call_count, cached=True)
+    assert uncached == cached, "results differ"
+    
+    # An edit committed elsewhere only bumps the version in the database
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Exam).where(Exam.id == created.id).values(title="Edited", version=Exam.version + 1)
+        )
+        await db.commit()
+    async with ReadSessionLocal() as db:
+        assert (await ExamService(db).get_exam(created.id, include_answers=True)).title == "Edited"
+    
+    print(f"\nExamService.get_exam, {question_count} questions, {call_count} calls\n")
+    print_table(["path", "queries/call", "ms/call"], [
+        ("load from database", f"{uncached_queries:.1f}", f"{uncached_ms:.3f}"),
+        ("versioned cache", f"{cached_queries:.1f}", f"{cached_ms:.3f}"),
+    ])
+    print(f"\nexam cache: {exam_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.calls))
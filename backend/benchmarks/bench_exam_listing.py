@@ -0,0 +1,97 @@
+"""
+Benchmark: exam listing with question/attempt counts.
+
+Compares the old per-exam COUNT loop with the single-query
+``ExamRepository.get_all_with_counts`` for several page sizes and checks
+that both return the same data.
+
+Usage (from the backend directory):
+    python benchmarks/bench_exam_listing.py [--exams 2000]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from common import count_queries, timer, reset_database, print_table
+
+from sqlalchemy import select, func, insert
+
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import Exam, Question, ExamAttempt
+from app.repositories.exam import ExamRepository
+
+
+async def legacy_get_all_with_counts(db, skip: int, limit: int):
+    """The previous implementation: two COUNT queries per exam"""
+    exams = (await db.execute(select(Exam).offset(skip).limit(limit))).scalars().all()
+    result = []
+    for exam in exams:
+        question_count = (await db.execute(
+            select(func.count(Question.id)).where(Question.exam_id == exam.id)
+        )).scalar() or 0
+        attempt_count = (await db.execute(
+            select(func.count(ExamAttempt.id)).where(ExamAttempt.exam_id == exam.id)
+        )).scalar() or 0
+        result.append({"exam": exam, "question_count": question_count, "attempt_count": attempt_count})
+    return result
+
+
+async def seed(exam_count: int, questions_per_exam: int = 10, attempts_per_exam: int = 5):
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Exam), [
+            {"title": f"Exam {i}", "description": "x" * 200, "is_published": i % 2 == 0,
+             "created_at": now, "updated_at": now}
+            for i in range(exam_count)
+        ])
+        exam_ids = (await db.execute(select(Exam.id))).scalars().all()
+        await db.execute(insert(Question), [
+            {"exam_id": exam_id, "question_text": f"Q{n}", "question_type": "mcq", "marks": 1.0,
+             "order": n, "correct_answer": "a", "created_at": now, "updated_at": now}
+            for exam_id in exam_ids for n in range(questions_per_exam)
+        ])
+        await db.execute(insert(ExamAttempt), [
+            {"exam_id": exam_id, "student_name": f"S{n}", "status": "completed",
+             "created_at": now, "updated_at": now}
+            for exam_id in exam_ids for n in range(attempts_per_exam)
+        ])
+        await db.commit()
+
+
+def as_tuples(rows):
+    return [(r["exam"].id, r["question_count"], r["attempt_count"]) for r in rows]
+
+
+def row_tuples(rows):
+    return [(r.id, r.question_count, r.attempt_count) for r in rows]
+
+
+async def main(exam_count: int):
+    await reset_database()
+    await seed(exam_count)
+    
+    rows = []
+    for limit in (10, 100, 1000):
+        async with AsyncSessionLocal() as db:
+            with count_queries() as legacy_queries, timer() as legacy_time:
+                legacy = await legacy_get_all_with_counts(db, 0, limit)
+        async with AsyncSessionLocal() as db:
+            with count_queries() as new_queries, timer() as new_time:
+                current = (await ExamRepository(db).get_all_with_counts(0, limit)).items
+        
+        assert as_tuples(legacy) == row_tuples(current), "results differ"
+        rows.append((
+            limit,
+            legacy_queries.count, f"{legacy_time['ms']:.1f}",
+            new_queries.count, f"{new_time['ms']:.1f}",
+        ))
+    
+    print(f"\nExam listing, {exam_count} exams in the database\n")
+    print_table(["page size", "legacy queries", "legacy ms", "queries", "ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exams", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.exams))
@@ -0,0 +1,100 @@
+"""
+Benchmark: the student view of a published exam, GET /api/exams/{id}.
+
+Compares building the response from ORM objects on every request (the
+previous path, used here by removing the stored paper) with serving the
+pre-rendered paper bytes, plain and gzip-compressed, through the ASGI
+app. Checks that every path returns the same body.
+
+Usage (from the backend directory):
+    python benchmarks/bench_exam_paper.py [--questions 100] [--requests 2000]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+
+from common import reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete
+
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import ExamPaper
+from main import app
+
+CONCURRENCY = 50
+
+
+async def create_exam(client, question_count: int) -> int:
+    response = await client.post("/api/exams", json={
+        "title": "Final exam",
+        "description": "Answer every question. " * 10,
+        "is_published": True,
+        "total_marks": question_count,
+        "questions": [
+            {"question_text": f"Question {n}: " + "lorem ipsum dolor sit amet " * 8,
+             "question_type": "mcq", "options": [f"Option {c}" for c in "ABCD"],
+             "correct_answer": "Option A", "marks": 1}
+            for n in range(question_count)
+        ],
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def measure(client, url: str, request_count: int, headers: dict):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    
+    async def fetch():
+        async with semaphore:
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(request_count)))
+    return request_count / (time.perf_counter() - start)
+
+
+async def main(question_count: int, request_count: int):
+    await reset_database()
+    rows = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        exam_id = await create_exam(client, question_count)
+        url = f"/api/exams/{exam_id}"
+        plain = {"Accept-Encoding": "identity"}
+        
+        paper = await client.get(url, headers=plain)
+        compressed = await client.get(url, headers={"Accept-Encoding": "gzip"})
+        paper_rps = await measure(client, url, request_count, plain)
+        gzip_rps = await measure(client, url, request_count, {"Accept-Encoding": "gzip"})
+        
+        # Without a stored paper the endpoint builds the response per request
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ExamPaper))
+            await db.commit()
+        built = await client.get(url, headers=plain)
+        built_rps = await measure(client, url, request_count, plain)
+    
+    assert compressed.headers.get("content-encoding") == "gzip"
+    assert paper.content == built.content
+    assert json.loads(compressed.content) == json.loads(built.content)
+    body_size = len(paper.content)
+    gzip_size = len(gzip.compress(paper.content, compresslevel=9))
+    
+    rows.append(("build from ORM (previous)", f"{built_rps:.0f}", body_size))
+    rows.append(("stored paper", f"{paper_rps:.0f}", body_size))
+    rows.append(("stored paper, gzip", f"{gzip_rps:.0f}", gzip_size))
+    
+    print(f"\nGET /api/exams/{{id}}, {question_count} questions, {request_count} requests, "
+          f"{CONCURRENCY} concurrent\n")
+    print_table(["path", "requests/s", "body bytes"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions, args.requests))
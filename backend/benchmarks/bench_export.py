@@ -0,0 +1,134 @@
+"""
+Benchmark: streaming export of an exam's attempts and answers.
+
+Seeds one exam with a tenth of the answers and one with all of them
+(1M by default), then streams GET /api/exams/{id}/attempts/export in
+both formats through the ASGI app without buffering the body. Reports
+answers per second, output size, and how far the process's resident
+memory rose above its starting point during each export, which should
+not depend on the size of the export.
+
+Usage (from the backend directory):
+    python benchmarks/bench_export.py [--answers 1000000] [--answers-per-attempt 50]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from common import reset_database, print_table
+
+from sqlalchemy import insert, select, func
+
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import Exam, Question, ExamAttempt, Answer
+from main import app
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+INSERT_BATCH = 50_000
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+async def seed_exam(db, answer_count: int, answers_per_attempt: int) -> int:
+    now = datetime.utcnow()
+    exam_id = (await db.execute(
+        insert(Exam).values(title="Export", is_published=True, created_at=now, updated_at=now).returning(Exam.id)
+    )).scalar_one()
+    await db.execute(insert(Question), [
+        {"exam_id": exam_id, "question_text": f"Question {n}", "question_type": "mcq", "marks": 1.0,
+         "order": n, "correct_answer": "a", "created_at": now, "updated_at": now}
+        for n in range(answers_per_attempt)
+    ])
+    question_ids = (await db.execute(select(Question.id).where(Question.exam_id == exam_id))).scalars().all()
+    
+    attempt_count = answer_count // answers_per_attempt
+    await db.execute(insert(ExamAttempt), [
+        {"exam_id": exam_id, "student_name": f"Student {n}", "student_email": f"student{n}@example.com",
+         "status": "completed", "score": 40.0, "percentage": 80.0, "passed": True,
+         "started_at": now.isoformat(), "completed_at": now.isoformat(), "created_at": now, "updated_at": now}
+        for n in range(attempt_count)
+    ])
+    first_attempt = (await db.execute(
+        select(func.min(ExamAttempt.id)).where(ExamAttempt.exam_id == exam_id)
+    )).scalar_one()
+    
+    for offset in range(0, answer_count, INSERT_BATCH):
+        await db.execute(insert(Answer), [
+            {"attempt_id": first_attempt + n // answers_per_attempt,
+             "question_id": question_ids[n % answers_per_attempt],
+             "answer_text": "a" if n % 5 else "b", "is_correct": n % 5 != 0,
+             "marks_obtained": 1.0 if n % 5 else 0.0, "created_at": now, "updated_at": now}
+            for n in range(offset, min(offset + INSERT_BATCH, answer_count))
+        ])
+    await db.commit()
+    return exam_id
+
+
+async def export(exam_id: int, format: str) -> dict:
+    """Stream one export through the app, keeping only counters"""
+    path = f"/api/exams/{exam_id}/attempts/export"
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": f"format={format}".encode(), "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    stats = {"status": None, "bytes": 0, "peak_rss": 0}
+    request_sent = False
+    
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Future()  # the client never disconnects
+    
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            stats["bytes"] += len(message.get("body", b""))
+            stats["peak_rss"] = max(stats["peak_rss"], rss_bytes())
+    
+    start_rss = rss_bytes()
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    stats["seconds"] = time.perf_counter() - start
+    stats["rss_growth"] = max(stats["peak_rss"] - start_rss, 0)
+    assert stats["status"] == 200, stats
+    return stats
+
+
+async def main(answer_count: int, answers_per_attempt: int):
+    await reset_database()
+    sizes = [answer_count // 10, answer_count]
+    async with AsyncSessionLocal() as db:
+        exams = [(size, await seed_exam(db, size, answers_per_attempt)) for size in sizes]
+    
+    rows = []
+    for format in ("ndjson", "csv"):
+        for size, exam_id in exams:
+            stats = await export(exam_id, format)
+            rows.append((
+                format, f"{size:,}",
+                f"{size / stats['seconds']:,.0f}",
+                f"{stats['bytes'] / 2**20:.1f}",
+                f"{stats['bytes'] / 2**20 / stats['seconds']:.1f}",
+                f"{stats['rss_growth'] / 2**20:.1f}",
+            ))
+    
+    print(f"\nExport of attempts with answers, {answers_per_attempt} answers per attempt\n")
+    print_table(["format", "answers", "answers/s", "MiB out", "MiB/s", "RSS growth MiB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--answers", type=int, default=1_000_000)
+    parser.add_argument("--answers-per-attempt", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.answers, args.answers_per_attempt))
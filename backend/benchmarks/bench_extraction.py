@@ -0,0 +1,165 @@
+"""
+Benchmark: background text extraction of uploaded documents.
+
+Uploads a set of generated DOCX, PPTX and PDF documents (60 by default,
+with a few hundred paragraphs, slides or pages each) through the batch
+endpoint and waits for the pipeline to extract them. Reports how long
+the uploads took to answer, how long extraction took overall and per
+document, and the longest stall of the event loop meanwhile. The same
+documents are then extracted inline on the event loop, as an upload
+handler doing the work itself would, for comparison.
+
+Usage (from the backend directory):
+    python benchmarks/bench_extraction.py [--documents 60] [--size 300]
+"""
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import time
+import zipfile
+
+from common import reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+
+from app.core.config import settings
+from app.services.document_text import extract_text
+from app.services.text_extraction import extraction_queue
+from main import app
+
+WORD = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+DRAWING = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+SENTENCE = "The mitochondria is the powerhouse of the cell, question {n}. "
+
+
+def make_docx(n: int, size: int) -> bytes:
+    body = "".join(
+        f"<w:p><w:r><w:t>{SENTENCE.format(n=n * size + p) * 4}</w:t></w:r></w:p>" for p in range(size * 4)
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", f"<w:document {WORD}><w:body>{body}</w:body></w:document>")
+    return buffer.getvalue()
+
+
+def make_pptx(n: int, size: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for slide in range(size // 3):
+            body = "".join(f"<a:p><a:r><a:t>{SENTENCE.format(n=n * size + slide + line)}</a:t></a:r></a:p>"
+                           for line in range(6))
+            archive.writestr(f"ppt/slides/slide{slide + 1}.xml", f"<p:sld xmlns:p=\"p\" {DRAWING}>{body}</p:sld>")
+    return buffer.getvalue()
+
+
+def make_pdf(n: int, size: int) -> bytes:
+    pages = size // 3
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * p} 0 R' for p in range(pages))}] /Count {pages} >>"]
+    font = 3 + 2 * pages
+    for page in range(pages):
+        lines = " ".join(f"({SENTENCE.format(n=n * size + page + line)}) Tj 0 -14 Td" for line in range(40))
+        stream = f"BT /F1 10 Tf 40 780 Td {lines} ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * page} 0 R "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    
+    data, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return data
+
+
+MAKERS = {"docx": make_docx, "pptx": make_pptx, "pdf": make_pdf}
+
+
+async def monitor(stats: dict, stop: asyncio.Event):
+    """Measure how late the event loop wakes this task up"""
+    interval = 0.005
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats["max_stall"] = max(stats["max_stall"], time.perf_counter() - before - interval)
+
+
+async def wait_for_extraction():
+    while extraction_queue.stats()["queued"] or extraction_queue.running:
+        await asyncio.sleep(0.01)
+
+
+async def run(documents: list, inline: bool) -> tuple:
+    stats = {"max_stall": 0.0}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(monitor(stats, stop))
+    start = time.perf_counter()
+    upload_seconds = 0.0
+    if inline:
+        for name, data in documents:
+            path = os.path.join(settings.UPLOAD_DIR, name)
+            with open(path, "wb") as file:
+                file.write(data)
+            extract_text(path, name.rsplit(".", 1)[1], settings.EXTRACTION_MAX_CHARS)
+            await asyncio.sleep(0)  # let other requests in between documents
+        upload_seconds = time.perf_counter() - start
+    else:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            for batch in range(0, len(documents), 20):
+                upload_start = time.perf_counter()
+                response = await client.post(
+                    "/api/upload/batch", files=[("files", document) for document in documents[batch:batch + 20]]
+                )
+                upload_seconds += time.perf_counter() - upload_start
+                assert response.status_code == 201, response.text
+        await wait_for_extraction()
+    seconds = time.perf_counter() - start
+    stop.set()
+    await sampler
+    return seconds, upload_seconds, stats["max_stall"]
+
+
+async def main(count: int, size: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    types = list(MAKERS)
+    documents = [(f"notes-{n}.{types[n % 3]}", MAKERS[types[n % 3]](n, size)) for n in range(count)]
+    rows = []
+    try:
+        extraction_queue.start()
+        # Start the worker processes, as they would be long before any upload
+        await run([(f"warm-up-{n}.docx", make_docx(-1 - n, 1)) for n in range(extraction_queue.workers)], False)
+        warm_seconds, warm_count = extraction_queue.total_seconds, extraction_queue.extracted
+        
+        seconds, upload_seconds, max_stall = await run(documents, inline=False)
+        extracted = extraction_queue.extracted - warm_count
+        assert extracted == count, extraction_queue.stats()
+        per_document = (extraction_queue.total_seconds - warm_seconds) / count
+        rows.append((f"process pool ({extraction_queue.workers} workers)", f"{upload_seconds * 1000:.0f}",
+                     f"{seconds:.2f}", f"{per_document * 1000:.0f}", f"{max_stall * 1000:.0f}"))
+        await extraction_queue.stop()
+        
+        seconds, upload_seconds, max_stall = await run(documents, inline=True)
+        rows.append(("inline, on the event loop", f"{upload_seconds * 1000:.0f}", f"{seconds:.2f}",
+                     f"{seconds / count * 1000:.0f}", f"{max_stall * 1000:.0f}"))
+    finally:
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    megabytes = sum(len(data) for _, data in documents) / 2**20
+    print(f"\n{count} documents, {megabytes:.1f} MiB, {os.cpu_count()} CPU(s)\n")
+    print_table(["extraction", "uploads answered in ms", "all extracted s", "ms per document",
+                 "max loop stall ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=60)
+    parser.add_argument("--size", type=int, default=300, help="paragraphs, or three times the slides and pages")
+    args = parser.parse_args()
+    asyncio.run(main(args.documents, args.size))
@@ -0,0 +1,112 @@
+"""
+Benchmark: grading a submission against a large exam.
+
+Compares the previous grading loop (a linear scan of the exam's questions
+per answer, normalizing the correct answer every time) with a compiled
+``CompiledAnswerKey`` lookup, and reports the one-off cost of compiling
+the key. Pure Python; no database involved.
+
+Usage (from the backend directory):
+    python benchmarks/bench_grading.py [--questions 500]
+"""
+import argparse
+import random
+from types import SimpleNamespace
+
+from common import timer, print_table
+
+from app.services.answer_key import compile_answer_key
+
+REPEATS = 20
+QUESTION_TYPES = ("mcq", "mcq", "mcq", "true_false", "short_answer")
+
+
+def make_exam(question_count: int):
+    questions = [
+        SimpleNamespace(
+            id=n + 1,
+            question_type=QUESTION_TYPES[n % len(QUESTION_TYPES)],
+            correct_answer=random.choice(("  Option A", "option b ", "True", "Paris")),
+            marks=1.0,
+        )
+        for n in range(question_count)
+    ]
+    return SimpleNamespace(id=1, version=1, questions=questions)
+
+
+def make_submission(exam):
+    return [
+        SimpleNamespace(question_id=q.id, answer_text=random.choice(("option a", "Option B", "true", "")))
+        for q in exam.questions
+    ]
+
+
+def legacy_grade(exam, answers):
+    """The previous implementation from ExamService.submit_attempt"""
+    results = []
+    for answer_data in answers:
+        question = next((q for q in exam.questions if q.id == answer_data.question_id), None)
+        if not question:
+            continue
+        
+        is_correct = False
+        marks_obtained = 0.0
+        if question.correct_answer and answer_data.answer_text:
+            if question.question_type == "mcq" or question.question_type == "true_false":
+                is_correct = answer_data.answer_text.strip().lower() == question.correct_answer.strip().lower()
+                marks_obtained = question.marks if is_correct else 0.0
+            else:
+                is_correct = True
+                marks_obtained = question.marks
+        results.append((is_correct, marks_obtained))
+    return results
+
+
+def compiled_grade(answer_key, answers):
+    results = []
+    for answer_data in answers:
+        graded = answer_key.grade(answer_data.question_id, answer_data.answer_text)
+        if graded is None:
+            continue
+        results.append(graded)
+    return results
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        with timer() as elapsed:
+            fn()
+        best = min(best, elapsed["ms"])
+    return best
+
+
+def main(question_count: int):
+    random.seed(0)
+    rows = []
+    for count in sorted({50, question_count // 2, question_count}):
+        exam = make_exam(count)
+        answers = make_submission(exam)
+        answer_key = compile_answer_key(exam, exam.questions)
+        assert legacy_grade(exam, answers) == compiled_grade(answer_key, answers), "results differ"
+        
+        legacy_ms = best_of(lambda: legacy_grade(exam, answers))
+        compile_ms = best_of(lambda: compile_answer_key(exam, exam.questions))
+        compiled_ms = best_of(lambda: compiled_grade(answer_key, answers))
+        rows.append((
+            count,
+            f"{legacy_ms:.3f}",
+            f"{compile_ms:.3f}",
+            f"{compiled_ms:.3f}",
+            f"{legacy_ms / compiled_ms:.0f}x",
+        ))
+    
+    print(f"\nGrading one full submission (best of {REPEATS})\n")
+    print_table(["questions", "legacy ms", "compile ms", "cached key ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=500)
+    args = parser.parse_args()
+    main(args.questions)
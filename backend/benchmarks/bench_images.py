@@ -0,0 +1,147 @@
+"""
+Benchmark: image processing, app/services/image_processing.py.
+
+Recolours icons (the 512x512 dark-mode icons in frontend/public/icons,
+plus generated ones of other sizes) with the per-pixel loop the icon
+script used to run and with the vectorized recolor(), checking that both
+give the same pixels.
+
+Then uploads photos (12 of 3000x2000 by default) and fetches their WebP
+thumbnail and preview through GET /api/upload/{id}/images/{variant}: the
+first time, when each copy is made on demand in the process pool, and
+again once cached by content hash. Reports latency and bytes sent
+against serving the full-size file.
+
+Usage (from the backend directory):
+    python benchmarks/bench_images.py [--photos 12] [--rounds 3]
+"""
+import argparse
+import asyncio
+import io
+import os
+import shutil
+import time
+from pathlib import Path
+
+from common import reset_database, print_table
+
+import numpy as np
+from httpx import AsyncClient, ASGITransport
+from PIL import Image
+
+from app.core.config import settings
+from app.services.image_derivatives import derivative_queue
+from app.services.image_processing import recolor
+from main import app
+
+ICON_DIR = Path(__file__).resolve().parents[2] / "frontend" / "public" / "icons"
+
+
+def recolor_per_pixel(image: Image.Image, color=(255, 255, 255)) -> Image.Image:
+    """What convert-icons-to-white.py did before recolor()"""
+    image = image.convert("RGBA")
+    pixels = image.load()
+    width, height = image.size
+    for y in range(height):
+        for x in range(width):
+            r, g, b, a = pixels[x, y]
+            if a > 0:
+                pixels[x, y] = color + (a,)
+    return image
+
+
+def make_icon(side: int) -> Image.Image:
+    """A dark glyph on a transparent background, with soft edges"""
+    y, x = np.mgrid[:side, :side]
+    distance = np.hypot(x - side / 2, y - side / 2) / (side / 2)
+    alpha = np.clip((0.8 - distance) * 10, 0, 1) * 255
+    pixels = np.zeros((side, side, 4), dtype=np.uint8)
+    pixels[..., :3] = 30
+    pixels[..., 3] = alpha.astype(np.uint8)
+    return Image.fromarray(pixels, "RGBA")
+
+
+def make_photo(n: int, width: int, height: int) -> bytes:
+    """A noisy gradient, which JPEG cannot shrink to nothing"""
+    rng = np.random.default_rng(n)
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    pixels = np.clip(gradient + rng.normal(0, 25, (height, width, 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def best_ms(function, rounds: int) -> float:
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = min(best or seconds, seconds)
+    return best * 1000
+
+
+def bench_recolor(rounds: int):
+    icons = [(path.name, Image.open(path)) for path in sorted(ICON_DIR.glob("*.png")) if "-white" not in path.name]
+    icons += [(f"generated {side}x{side}", make_icon(side)) for side in (64, 2048)]
+    rows = []
+    for name, icon in icons:
+        assert recolor(icon).tobytes() == recolor_per_pixel(icon).tobytes(), name
+        loop_ms = best_ms(lambda: recolor_per_pixel(icon), rounds)
+        numpy_ms = best_ms(lambda: recolor(icon), rounds)
+        rows.append((name, f"{icon.width}x{icon.height}", f"{loop_ms:.1f}", f"{numpy_ms:.2f}",
+                     f"{loop_ms / numpy_ms:.0f}x"))
+    print("\nRecolouring icons, best of", rounds, "\n")
+    print_table(["icon", "size", "per-pixel ms", "numpy ms", "speedup"], rows)
+
+
+async def bench_derivatives(count: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    photos = [make_photo(n, 3000, 2000) for n in range(count)]
+    rows = []
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            file_ids = []
+            for n, photo in enumerate(photos):
+                response = await client.post("/api/upload", files={"file": (f"photo-{n}.jpg", photo)})
+                assert response.status_code == 201, response.text
+                file_ids.append(response.json()["file"]["id"])
+            
+            async def fetch(url: str) -> tuple:
+                start = time.perf_counter()
+                response = await client.get(url)
+                assert response.status_code == 200, response.text
+                return time.perf_counter() - start, len(response.content)
+            
+            async def measure(label: str, urls: list):
+                results = [await fetch(url) for url in urls]
+                rows.append((label, f"{sum(s for s, _ in results) / len(results) * 1000:.1f}",
+                             f"{sum(size for _, size in results) / len(results) / 1024:.1f}"))
+            
+            await measure("full-size file", [f"/api/upload/{file_id}/content" for file_id in file_ids])
+            # Start the worker process first, as at server startup
+            await fetch(f"/api/upload/{file_ids[0]}/images/thumbnail")
+            for variant in settings.IMAGE_VARIANTS:
+                urls = [f"/api/upload/{file_id}/images/{variant}" for file_id in file_ids[1:]]
+                await measure(f"{variant}, made on request", urls)
+                await measure(f"{variant}, cached", urls)
+    finally:
+        await derivative_queue.stop()
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    print(f"\n{count} JPEG photos of 3000x2000, {os.cpu_count()} CPU(s)\n")
+    print_table(["GET", "ms per image", "KiB per image"], rows)
+
+
+async def main(count: int, rounds: int):
+    bench_recolor(rounds)
+    await bench_derivatives(count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.photos, args.rounds))
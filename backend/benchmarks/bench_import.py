@@ -0,0 +1,121 @@
+"""
+Benchmark: streaming import of question banks.
+
+Generates NDJSON and CSV question banks on the fly (a tenth of the rows
+and all of them, 100k by default, spread over 100 new exams with 1% of
+the rows invalid) and feeds them to ExamService.import_questions in 64
+KiB chunks, as the import endpoint receives a request body. Reports rows
+per second, the import's own report, and how far the process's resident
+memory rose during each import, which should not depend on file size.
+
+Usage (from the backend directory):
+    python benchmarks/bench_import.py [--rows 100000] [--exams 100]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+
+from common import reset_database, print_table
+
+import orjson
+
+from app.core.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.services.exam_service import ExamService
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+CHUNK_SIZE = 64 * 1024
+CSV_FIELDS = ["exam_title", "question_text", "question_type", "options", "correct_answer", "marks"]
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def make_row(n: int, exam_count: int, prefix: str) -> dict:
+    row = {
+        "exam_title": f"{prefix} bank {n // 10 % exam_count}",
+        "question_text": f"Question {n}: " + "lorem ipsum dolor sit amet " * 4,
+        "question_type": "mcq",
+        "options": ["Option A", "Option B", "Option C", "Option D"],
+        "correct_answer": "Option A",
+        "marks": 1 + n % 3,
+    }
+    if n % 100 == 99:
+        row["question_type"] = "multiple choice"  # invalid
+    return row
+
+
+def encode_rows(format: str, rows):
+    """Encode rows one at a time; nothing but the current row is kept"""
+    if format == "ndjson":
+        for row in rows:
+            yield orjson.dumps(row) + b"\n"
+        return
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for row in rows:
+        row = {**row, "options": "|".join(row["options"])}
+        writer.writerow([row[name] for name in CSV_FIELDS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def chunks(format: str, row_count: int, exam_count: int, stats: dict):
+    prefix = f"{format} {row_count}"
+    pending = []
+    size = 0
+    for data in encode_rows(format, (make_row(n, exam_count, prefix) for n in range(row_count))):
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            stats["bytes"] += size
+            yield b"".join(pending)
+            pending, size = [], 0
+            stats["peak_rss"] = max(stats["peak_rss"], rss_bytes())
+    stats["bytes"] += size
+    yield b"".join(pending)
+
+
+async def run(format: str, row_count: int, exam_count: int) -> tuple:
+    stats = {"bytes": 0, "peak_rss": 0}
+    start_rss = rss_bytes()
+    async with AsyncSessionLocal() as db:
+        report = await ExamService(db).import_questions(chunks(format, row_count, exam_count, stats), format)
+    counts = (report.rows, report.imported, report.exams_created)
+    assert counts == (row_count, row_count - row_count // 100, exam_count), counts
+    return (
+        format, f"{row_count:,}",
+        f"{stats['bytes'] / 2**20:.1f}",
+        f"{report.rows_per_second:,.0f}",
+        f"{report.imported:,}", f"{report.failed:,}",
+        f"{max(stats['peak_rss'] - start_rss, 0) / 2**20:.1f}",
+        f"{report.peak_memory_bytes / 2**20:.0f}",
+    )
+
+
+async def main(row_count: int, exam_count: int):
+    await reset_database()
+    rows = []
+    for format in ("ndjson", "csv"):
+        for size in (row_count // 10, row_count):
+            rows.append(await run(format, size, exam_count))
+    
+    print(f"\nQuestion import, {exam_count} new exams per file, "
+          f"{settings.IMPORT_BATCH_SIZE} rows per transaction\n")
+    print_table(["format", "rows", "MiB in", "rows/s", "imported", "rejected",
+                 "RSS growth MiB", "peak RSS MiB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--exams", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.exams))
@@ -0,0 +1,92 @@
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination of an exam's attempts.
+
+Seeds one exam with many attempts and times fetching a 100-row page at
+increasing depths with ``skip`` and with a cursor.
+
+Usage (from the backend directory):
+    python benchmarks/bench_pagination.py [--attempts 200000]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from common import timer, reset_database, print_table
+
+from sqlalchemy import select, insert
+
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import Exam, ExamAttempt
+from app.repositories.base import encode_cursor
+from app.repositories.exam import ExamAttemptRepository
+
+PAGE_SIZE = 100
+REPEATS = 5
+
+
+async def seed(attempt_count: int) -> int:
+    start = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        exam = Exam(title="Large exam", is_published=True)
+        db.add(exam)
+        await db.flush()
+        batch = 10_000
+        for offset in range(0, attempt_count, batch):
+            await db.execute(insert(ExamAttempt), [
+                {"exam_id": exam.id, "student_name": f"Student {n}", "status": "completed",
+                 "created_at": start + timedelta(milliseconds=n), "updated_at": start}
+                for n in range(offset, min(offset + batch, attempt_count))
+            ])
+        await db.commit()
+        return exam.id
+
+
+async def cursor_at(db, exam_id: int, depth: int) -> str:
+    """Cursor pointing at the row just before ``depth``"""
+    row = (await db.execute(
+        select(ExamAttempt.created_at, ExamAttempt.id)
+        .where(ExamAttempt.exam_id == exam_id)
+        .order_by(ExamAttempt.created_at, ExamAttempt.id)
+        .offset(depth - 1)
+        .limit(1)
+    )).one()
+    return encode_cursor("created_at", "asc", row.created_at, row.id)
+
+
+async def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        with timer() as elapsed:
+            await fn()
+        best = min(best, elapsed["ms"])
+    return best
+
+
+async def main(attempt_count: int):
+    await reset_database()
+    exam_id = await seed(attempt_count)
+    
+    depths = [d for d in (PAGE_SIZE, 1_000, 10_000, 50_000, 100_000, 190_000) if d < attempt_count]
+    rows = []
+    async with AsyncSessionLocal() as db:
+        repo = ExamAttemptRepository(db)
+        for depth in depths:
+            cursor = await cursor_at(db, exam_id, depth)
+            offset_page = await repo.get_by_exam(exam_id, skip=depth, limit=PAGE_SIZE)
+            cursor_page = await repo.get_by_exam(exam_id, limit=PAGE_SIZE, cursor=cursor)
+            assert [a.id for a in offset_page.items] == [a.id for a in cursor_page.items]
+            
+            offset_ms = await best_of(lambda: repo.get_by_exam(exam_id, skip=depth, limit=PAGE_SIZE))
+            cursor_ms = await best_of(lambda: repo.get_by_exam(exam_id, limit=PAGE_SIZE, cursor=cursor))
+            db.expunge_all()
+            rows.append((depth, f"{offset_ms:.2f}", f"{cursor_ms:.2f}"))
+    
+    print(f"\nAttempt pages of {PAGE_SIZE}, {attempt_count} attempts on one exam (best of {REPEATS})\n")
+    print_table(["depth", "offset ms", "cursor ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.attempts))
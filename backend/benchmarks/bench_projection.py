@@ -0,0 +1,159 @@
+"""
+Benchmark: list pages loaded as ORM entities versus column projections.
+
+For a 1,000-row page of exams (with counts), an exam's attempts and a
+folder's files, compares loading full ORM entities (the previous path)
+with the repositories' projection queries, including validation into
+the response schema. Reports time and peak Python memory per page, and
+checks that both paths produce the same response items.
+
+Usage (from the backend directory):
+    python benchmarks/bench_projection.py [--rows 1000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from datetime import datetime
+
+from common import timer, reset_database, print_table
+
+from sqlalchemy import select, func, insert
+
+from app.core.serialization import list_adapter, validate_list
+from app.database.connection import AsyncSessionLocal, ReadSessionLocal
+from app.models.exam import Exam, Question, ExamAttempt
+from app.models.file import File
+from app.models.folder import Folder
+from app.repositories.exam import ExamRepository, ExamAttemptRepository
+from app.repositories.file import FileRepository
+from app.schemas.exam import ExamListResponse, ExamAttemptListResponse
+from app.schemas.file import FileResponse
+
+
+async def seed(row_count: int):
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        folder_id = (await db.execute(
+            insert(Folder).values(name="Folder", created_at=now, updated_at=now).returning(Folder.id)
+        )).scalar_one()
+        await db.execute(insert(Exam), [
+            {"title": f"Exam {i}", "description": "Covers chapters one to five. " * 40,
+             "duration": 60, "total_marks": 100, "passing_marks": 50, "is_published": True,
+             "created_at": now, "updated_at": now}
+            for i in range(row_count)
+        ])
+        exam_id = (await db.execute(select(func.min(Exam.id)))).scalar_one()
+        await db.execute(insert(ExamAttempt), [
+            {"exam_id": exam_id, "student_name": f"Student {n}", "student_email": f"student{n}@example.com",
+             "status": "completed", "score": n % 100, "percentage": n % 100, "passed": n % 100 >= 50,
+             "started_at": now.isoformat(), "completed_at": now.isoformat(),
+             "created_at": now, "updated_at": now}
+            for n in range(row_count)
+        ])
+        await db.execute(insert(File), [
+            {"filename": f"{n}.pdf", "original_filename": f"Lecture notes {n}.pdf",
+             "file_path": f"uploads/{n}.pdf", "file_type": "pdf", "file_size": 1024 * n,
+             "mime_type": "application/pdf", "folder_id": folder_id, "created_at": now, "updated_at": now}
+            for n in range(row_count)
+        ])
+        await db.commit()
+    return exam_id, folder_id
+
+
+async def legacy_exams(db, limit: int):
+    """The previous exam listing: Exam entities joined with the counts"""
+    question_totals = (
+        select(Question.exam_id, func.count(Question.id).label("total")).group_by(Question.exam_id).subquery()
+    )
+    attempt_totals = (
+        select(ExamAttempt.exam_id, func.count(ExamAttempt.id).label("total")).group_by(ExamAttempt.exam_id).subquery()
+    )
+    result = await db.execute(
+        select(Exam, func.coalesce(question_totals.c.total, 0), func.coalesce(attempt_totals.c.total, 0))
+        .outerjoin(question_totals, question_totals.c.exam_id == Exam.id)
+        .outerjoin(attempt_totals, attempt_totals.c.exam_id == Exam.id)
+        .order_by(Exam.created_at, Exam.id)
+        .limit(limit + 1)
+    )
+    return list_adapter(ExamListResponse).validate_python([
+        {**exam.__dict__, "question_count": questions, "attempt_count": attempts}
+        for exam, questions, attempts in result.all()[:limit]
+    ])
+
+
+async def legacy_entities(db, model, schema, condition, limit: int):
+    """The previous attempt and file listings: full entities"""
+    result = await db.execute(
+        select(model).where(condition).order_by(model.created_at, model.id).limit(limit + 1)
+    )
+    return validate_list(schema, result.scalars().all()[:limit])
+
+
+async def _page(page, schema):
+    """Validate the items of a repository page"""
+    return validate_list(schema, (await page).items)
+
+
+async def measure(repeat: int, load) -> tuple:
+    """Best time over ``repeat`` fresh sessions, and the peak memory of one"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        async with ReadSessionLocal() as db:
+            with timer() as elapsed:
+                items = await load(db)
+        best = elapsed["ms"] if best is None else min(best, elapsed["ms"])
+    
+    gc.collect()
+    tracemalloc.start()
+    async with ReadSessionLocal() as db:
+        await load(db)
+        _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, best, peak
+
+
+async def main(row_count: int, repeat: int):
+    await reset_database()
+    exam_id, folder_id = await seed(row_count)
+    
+    cases = [
+        (
+            "exams",
+            lambda db: legacy_exams(db, row_count),
+            lambda db: _page(ExamRepository(db).get_all_with_counts(limit=row_count), ExamListResponse),
+        ),
+        (
+            "attempts",
+            lambda db: legacy_entities(db, ExamAttempt, ExamAttemptListResponse, ExamAttempt.exam_id == exam_id, row_count),
+            lambda db: _page(ExamAttemptRepository(db).get_by_exam(exam_id, limit=row_count), ExamAttemptListResponse),
+        ),
+        (
+            "files",
+            lambda db: legacy_entities(db, File, FileResponse, File.folder_id == folder_id, row_count),
+            lambda db: _page(FileRepository(db).get_by_folder(folder_id, limit=row_count), FileResponse),
+        ),
+    ]
+    
+    rows = []
+    for label, legacy, current in cases:
+        legacy_items, legacy_ms, legacy_peak = await measure(repeat, legacy)
+        current_items, current_ms, current_peak = await measure(repeat, current)
+        assert legacy_items == current_items, f"{label}: results differ"
+        rows.append((
+            label,
+            f"{legacy_ms:.1f}", f"{current_ms:.1f}",
+            f"{legacy_peak / 1024:.0f}", f"{current_peak / 1024:.0f}",
+        ))
+    
+    print(f"\n{row_count}-row page, loaded and validated, best of {repeat}\n")
+    print_table(["list", "entities ms", "projection ms", "entities peak KiB", "projection peak KiB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,117 @@
+"""
+Benchmark: a large upload over a connection that keeps dropping.
+
+Uploads one file (200 MiB by default) through the resumable session
+endpoints in 8 MiB chunks, with the connection cut partway through every
+fifth chunk, and resumes from the offset the server reports each time.
+Reports throughput, how much data had to be sent again, compared with
+restarting a single-request upload from zero after every drop, and how
+far the process's resident memory rose.
+
+Usage (from the backend directory):
+    python benchmarks/bench_resumable.py [--size-mb 200] [--chunk-mb 8]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+
+from common import reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+
+from app.core.config import settings
+from main import app
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+BLOCK = os.urandom(64 * 1024)
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+async def patch(session_id: int, offset: int, length: int, drop_after: int) -> int:
+    """Send ``length`` bytes at ``offset`` straight to the app, as a server would
+    
+    The client disconnects after ``drop_after`` bytes if that is less
+    than ``length``. Returns the bytes sent.
+    """
+    sent = 0
+    
+    async def receive():
+        nonlocal sent
+        if sent >= min(length, drop_after):
+            return {"type": "http.disconnect"}
+        body = BLOCK[:min(len(BLOCK), length - sent, drop_after - sent)]
+        sent += len(body)
+        return {"type": "http.request", "body": body, "more_body": sent < length}
+    
+    status = []
+    
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+    
+    await app({
+        "type": "http", "method": "PATCH", "path": f"/api/upload/sessions/{session_id}",
+        "raw_path": b"", "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+        "server": ("bench", 80), "client": ("client", 1),
+        "headers": [(b"upload-offset", str(offset).encode()), (b"content-length", str(length).encode())],
+    }, receive, send)
+    assert drop_after < length or status == [200], status
+    return sent
+
+
+async def main(size: int, chunk: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            start_rss = rss_bytes()
+            peak_rss = start_rss
+            response = await client.post("/api/upload/sessions", json={"filename": "lecture.mp4", "size": size})
+            session_id = response.json()["id"]
+            
+            start = time.perf_counter()
+            sent = drops = restart_sent = 0
+            offset = 0
+            chunk_number = 0
+            while offset < size:
+                length = min(chunk, size - offset)
+                chunk_number += 1
+                dropping = chunk_number % 5 == 0
+                sent += await patch(session_id, offset, length, length // 2 if dropping else length)
+                if dropping:
+                    drops += 1
+                    # A single-request upload would start again from zero
+                    restart_sent += offset + length // 2
+                response = await client.get(f"/api/upload/sessions/{session_id}")
+                offset = response.json()["offset"]
+                peak_rss = max(peak_rss, rss_bytes())
+            
+            response = await client.post(f"/api/upload/sessions/{session_id}/complete")
+            assert response.status_code == 201, response.text
+            seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    print(f"\n{size / 2**20:.0f} MiB in {chunk / 2**20:.0f} MiB chunks, {drops} dropped connections\n")
+    print_table(["MiB/s", "MiB sent", "MiB resent", "MiB resent restarting", "RSS growth MiB"], [(
+        f"{size / 2**20 / seconds:.0f}",
+        f"{sent / 2**20:.0f}",
+        f"{(sent - size) / 2**20:.0f}",
+        f"{restart_sent / 2**20:.0f}",
+        f"{(peak_rss - start_rss) / 2**20:.0f}",
+    )])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=200)
+    parser.add_argument("--chunk-mb", type=float, default=8)
+    args = parser.parse_args()
+    size = min(int(args.size_mb * 2**20), settings.MAX_RESUMABLE_UPLOAD_SIZE)
+    asyncio.run(main(size, int(args.chunk_mb * 2**20)))
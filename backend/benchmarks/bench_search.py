@@ -0,0 +1,150 @@
+"""
+Benchmark: full-text search, GET /api/search.
+
+Fills the database with a question bank (1,000,000 questions in 10,000
+exams by default) whose words follow a Zipf distribution, as in real
+text, builds the FTS5 index and times searches for rare, common and
+several words, a prefix, and a deep page. A word searched "as typed" is
+also matched as a prefix, which for a word in most of the bank costs a
+merge of its whole posting list; a trailing space searches the whole
+word only. For comparison the questions
+containing a word are counted with LIKE '%word%', the only way to find
+text without the index: a full scan, which ranking the matches would
+need. Also reports the index build time and what keeping the index in
+step adds to adding a question.
+
+Usage (from the backend directory):
+    python benchmarks/bench_search.py [--questions 1000000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import shutil
+import sqlite3
+import time
+
+from common import BENCH_DIR, reset_database, print_table
+
+from httpx import AsyncClient, ASGITransport
+
+from app.database.connection import AsyncSessionLocal
+from app.repositories.search import SearchRepository
+from main import app
+
+VOCABULARY_SIZE = 20000
+QUESTIONS_PER_EXAM = 100
+SYLLABLES = ["ba", "ke", "lo", "mi", "nu", "ra", "si", "to", "ve", "zu", "che", "dra", "phi", "qua", "tri"]
+
+
+def make_words(count: int) -> list:
+    rng = random.Random(1)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def fill(questions: int):
+    """Insert the bank straight into SQLite, bypassing the index"""
+    words = make_words(VOCABULARY_SIZE)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    rng = random.Random(2)
+    connection = sqlite3.connect(BENCH_DIR / "bench.db")
+    now = "2024-01-01 00:00:00"
+    exams = (questions + QUESTIONS_PER_EXAM - 1) // QUESTIONS_PER_EXAM
+    connection.executemany(
+        "INSERT INTO exams (id, title, description, total_marks, passing_marks, is_published, version, "
+        "created_at, updated_at) VALUES (?, ?, ?, 100, 50, 1, 1, ?, ?)",
+        ((n + 1, " ".join(rng.choices(words[:2000], k=3)).title(), " ".join(rng.choices(words, cum_weights=weights, k=12)),
+          now, now) for n in range(exams))
+    )
+    
+    def rows():
+        for n in range(questions):
+            text = " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(8, 20))).capitalize() + "?"
+            options = json.dumps([" ".join(rng.choices(words, cum_weights=weights, k=3)) for _ in range(4)])
+            yield n // QUESTIONS_PER_EXAM + 1, text, "mcq", 1.0, n % QUESTIONS_PER_EXAM, options, "A", now, now
+    
+    connection.executemany(
+        "INSERT INTO questions (exam_id, question_text, question_type, marks, \"order\", options, "
+        "correct_answer, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows()
+    )
+    connection.commit()
+    connection.close()
+    return words
+
+
+def like_scan(word: str) -> float:
+    connection = sqlite3.connect(BENCH_DIR / "bench.db")
+    start = time.perf_counter()
+    connection.execute(
+        "SELECT count(*) FROM questions WHERE question_text LIKE ? OR options LIKE ?",
+        (f"%{word}%", f"%{word}%")
+    ).fetchone()
+    seconds = time.perf_counter() - start
+    connection.close()
+    return seconds
+
+
+async def main(questions: int, rounds: int):
+    await reset_database()
+    start = time.perf_counter()
+    words = fill(questions)
+    fill_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        await SearchRepository(session).rebuild()
+    index_seconds = time.perf_counter() - start
+    print(f"\n{questions} questions inserted in {fill_seconds:.1f}s, indexed in {index_seconds:.1f}s\n")
+    
+    rare, common, middle = words[15000], words[0], words[300]
+    searches = [
+        ("rare word, as typed", {"q": rare}, rare),
+        ("common word, as typed", {"q": common}, common),
+        ("common word, whole word", {"q": f"{common} "}, None),
+        ("two words", {"q": f"{words[50]} {words[60]} "}, None),
+        ("three letters, as typed", {"q": middle[:3]}, None),
+        ("common word, questions only", {"q": f"{common} ", "type": "question"}, None),
+        ("common word, page 40", {"q": f"{common} ", "skip": 780}, None),
+    ]
+    rows = []
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for label, params, like_word in searches:
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                response = await client.get("/api/search", params=params)
+                seconds = time.perf_counter() - start
+                assert response.status_code == 200 and response.json()["results"], response.text
+                best = min(best or seconds, seconds)
+            like = f"{like_scan(like_word) * 1000:.0f}" if like_word else "-"
+            rows.append((label, f"{best * 1000:.1f}", like))
+        print_table(["search", "FTS5 ms", "LIKE scan ms"], rows)
+        
+        exam_id = 1
+        start = time.perf_counter()
+        for n in range(rounds * 10):
+            response = await client.post(
+                f"/api/exams/{exam_id}/questions",
+                json={"question_text": f"{rare} {common} added {n}", "question_type": "essay"}
+            )
+            assert response.status_code == 201, response.text
+        add_ms = (time.perf_counter() - start) / (rounds * 10) * 1000
+        response = await client.get("/api/search", params={"q": f"{rare} added"})
+        assert len(response.json()["results"]) == 20
+    print(f"\nAdding a question, indexed in the same transaction: {add_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.questions, args.rounds))
+    finally:
+        shutil.rmtree(BENCH_DIR, ignore_errors=True)  # about 1 GB for the default bank
@@ -0,0 +1,118 @@
+"""
+Benchmark: turning loaded rows into a JSON list response.
+
+Times the previous path, ``Schema(**obj.__dict__)`` per row followed by
+FastAPI's response_model validation and JSONResponse rendering, against
+one TypeAdapter validation from attributes and one dump_json call, for
+1,000 exams (with counts) and 10,000 attempts. Checks that both paths
+produce the same JSON.
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py [--exams 1000] [--attempts 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import gc
+import json
+from datetime import datetime
+from typing import List
+
+from common import timer, reset_database, print_table
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select, insert
+
+from app.api.responses import SchemaListResponse
+from app.core.serialization import validate_list
+from app.database.connection import AsyncSessionLocal, ReadSessionLocal
+from app.models.exam import Exam, ExamAttempt
+from app.repositories.exam import ExamRepository
+from app.schemas.exam import ExamListResponse, ExamAttemptListResponse
+
+
+async def seed(exam_count: int, attempt_count: int):
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Exam), [
+            {"title": f"Exam {i}", "description": "Covers chapters one to five. " * 10,
+             "duration": 60, "total_marks": 100, "is_published": i % 2 == 0,
+             "created_at": now, "updated_at": now}
+            for i in range(exam_count)
+        ])
+        exam_ids = (await db.execute(select(Exam.id))).scalars().all()
+        await db.execute(insert(ExamAttempt), [
+            {"exam_id": exam_ids[n % len(exam_ids)], "student_name": f"Student {n}",
+             "status": "completed", "score": n % 100, "percentage": n % 100, "passed": n % 100 >= 50,
+             "created_at": now, "updated_at": now}
+            for n in range(attempt_count)
+        ])
+        await db.commit()
+
+
+async def legacy_exams(rows) -> bytes:
+    """The previous path for GET /api/exams"""
+    exams = [ExamListResponse(**row._asdict()) for row in rows]
+    field = create_response_field(name="Response_exams", type_=List[ExamListResponse])
+    return JSONResponse(await serialize_response(field=field, response_content=exams)).body
+
+
+def current_exams(rows) -> bytes:
+    """The current path for GET /api/exams"""
+    return SchemaListResponse(ExamListResponse, validate_list(ExamListResponse, rows)).body
+
+
+async def legacy_attempts(attempts) -> bytes:
+    """The previous path for GET /api/exams/{id}/attempts"""
+    items = [ExamAttemptListResponse(**a.__dict__) for a in attempts]
+    field = create_response_field(name="Response_attempts", type_=List[ExamAttemptListResponse])
+    return JSONResponse(await serialize_response(field=field, response_content=items)).body
+
+
+def current_attempts(attempts) -> bytes:
+    """The current path for GET /api/exams/{id}/attempts"""
+    return SchemaListResponse(ExamAttemptListResponse, validate_list(ExamAttemptListResponse, attempts)).body
+
+
+async def best_of(repeat: int, fn, *args) -> tuple:
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        with timer() as elapsed:
+            body = fn(*args)
+            if asyncio.iscoroutine(body):
+                body = await body
+        best = elapsed["ms"] if best is None else min(best, elapsed["ms"])
+    return body, best
+
+
+async def main(exam_count: int, attempt_count: int, repeat: int):
+    await reset_database()
+    await seed(exam_count, attempt_count)
+    
+    async with ReadSessionLocal() as db:
+        exam_rows = (await ExamRepository(db).get_all_with_counts(limit=exam_count)).items
+        attempts = (await db.execute(select(ExamAttempt))).scalars().all()
+        
+        rows = []
+        for label, count, legacy, current, data in (
+            ("exams", exam_count, legacy_exams, current_exams, exam_rows),
+            ("attempts", attempt_count, legacy_attempts, current_attempts, attempts),
+        ):
+            legacy_body, legacy_ms = await best_of(repeat, legacy, data)
+            current_body, current_ms = await best_of(repeat, current, data)
+            assert json.loads(legacy_body) == json.loads(current_body), f"{label}: results differ"
+            rows.append((f"{count} {label}", f"{legacy_ms:.1f}", f"{current_ms:.1f}", f"{legacy_ms / current_ms:.1f}x"))
+    
+    print(f"\nRows to JSON response body, best of {repeat}\n")
+    print_table(["list", "previous ms", "current ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--exams", type=int, default=1000)
+    parser.add_argument("--attempts", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.exams, args.attempts, args.repeat))
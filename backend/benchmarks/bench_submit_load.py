@@ -0,0 +1,120 @@
+"""
+Benchmark: many students starting and submitting attempts at once.
+
+Runs the same load twice through ``ExamService``: first the previous path,
+where every request reads and writes in its own write transaction, then
+the current one, with reads on the read pool and writes coalesced by the
+group-commit scheduler. Reports throughput and the latency of the start
+and submit requests.
+
+Usage (from the backend directory):
+    python benchmarks/bench_submit_load.py [--students 2000] [--concurrency 200]
+        [--questions 50] [--synchronous NORMAL]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    args = parser.parse_args()
+    os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+
+from common import count_queries, reset_database, print_table  # noqa: E402
+
+from app.database.connection import AsyncSessionLocal, ReadSessionLocal  # noqa: E402
+from app.database.write_queue import write_scheduler  # noqa: E402
+from app.schemas.exam import ExamCreate, ExamAttemptCreate, ExamAttemptSubmit  # noqa: E402
+from app.services.exam_service import ExamService  # noqa: E402
+
+group_commit_write = ExamService._run_write
+
+
+async def run_inline(self, job):
+    """The previous write path: run in the request's own session and commit"""
+    result = await job(self.db)
+    await self.db.commit()
+    return result
+
+
+async def start_and_submit(session_factory, exam_id: int, n: int, submission, latencies: list):
+    """Start and submit one attempt, recording each request's latency in ms"""
+    start = time.perf_counter()
+    async with session_factory() as db:
+        attempt = await ExamService(db).start_attempt(exam_id, ExamAttemptCreate(student_name=f"Student {n}"))
+    latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    async with session_factory() as db:
+        await ExamService(db).submit_attempt(attempt.id, submission)
+    latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run(label: str, students: int, concurrency: int, question_count: int, group_commit: bool):
+    await reset_database()
+    async with AsyncSessionLocal() as db:
+        exam = await ExamService(db).create_exam(ExamCreate(
+            title="Load test",
+            is_published=True,
+            total_marks=question_count,
+            passing_marks=question_count // 2,
+            questions=[
+                {"question_text": f"Q{n}", "question_type": "mcq", "options": ["a", "b"],
+                 "correct_answer": "a", "marks": 1}
+                for n in range(question_count)
+            ],
+        ))
+    submission = ExamAttemptSubmit(answers=[
+        {"question_id": q.id, "answer_text": "a" if i % 3 else "b"}
+        for i, q in enumerate(exam.questions)
+    ])
+    
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    # Previously every request read and wrote in its own write transaction
+    session_factory = ReadSessionLocal if group_commit else AsyncSessionLocal
+    ExamService._run_write = group_commit_write if group_commit else run_inline
+    
+    async def student(n):
+        async with semaphore:
+            await start_and_submit(session_factory, exam.id, n, submission, latencies)
+    
+    with count_queries() as queries:
+        start = time.perf_counter()
+        await asyncio.gather(*(student(n) for n in range(students)))
+        elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return (
+        label,
+        f"{students / elapsed:.0f}",
+        f"{len(latencies) / elapsed:.0f}",
+        f"{statistics.median(latencies):.1f}",
+        f"{latencies[int(len(latencies) * 0.99) - 1]:.1f}",
+        queries.commits,
+    )
+
+
+async def main(students: int, concurrency: int, question_count: int, synchronous: str):
+    rows = [
+        await run("per-request transactions", students, concurrency, question_count, group_commit=False),
+        await run("group commit", students, concurrency, question_count, group_commit=True),
+    ]
+    stats = write_scheduler.stats()
+    await write_scheduler.stop()
+    
+    print(f"\n{students} students, {concurrency} concurrent, {question_count} answers each, "
+          f"synchronous={synchronous}\n")
+    print_table(["path", "students/s", "writes/s", "p50 ms", "p99 ms", "commits"], rows)
+    print(f"\ngroup commit: {stats['avg_batch_size']} writes per batch")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(args.students, args.concurrency, args.questions, args.synchronous))
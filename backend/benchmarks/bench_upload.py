@@ -0,0 +1,137 @@
+"""
+Benchmark: many large uploads at once, POST /api/upload.
+
+Sends 50 concurrent uploads of just under 10 MB each through the ASGI
+app, with request bodies generated on the fly in 64 KiB chunks, once to
+the current streaming endpoint and once to a copy of the previous one
+(FastAPI's UploadFile, read whole into memory, written with a blocking
+write on the event loop). Samples the process's resident memory while
+the uploads run and reports its peak growth, throughput, and the
+longest stall of the event loop.
+
+Usage (from the backend directory):
+    python benchmarks/bench_upload.py [--uploads 50] [--size-mb 10]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from typing import Optional
+
+from common import reset_database, print_table
+
+from fastapi import Depends, File as FormFile, Query, UploadFile
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.connection import get_db
+from app.models.file import File
+from app.repositories.file import FileRepository
+from main import app
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+CHUNK = os.urandom(64 * 1024)
+BOUNDARY = "bench-boundary"
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+@app.post("/bench/legacy-upload", status_code=201, include_in_schema=False)
+async def legacy_upload(
+    file: UploadFile = FormFile(...),
+    folder_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """The previous upload endpoint"""
+    contents = await file.read()
+    file_ext = file.filename.split(".")[-1].lower()
+    unique_filename = f"{uuid.uuid4()}.{file_ext}"
+    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
+    with open(file_path, "wb") as f:
+        f.write(contents)
+    await FileRepository(db).create(File(
+        filename=unique_filename, original_filename=file.filename, file_path=file_path,
+        file_type=file_ext, file_size=len(contents), mime_type=file.content_type, folder_id=folder_id
+    ))
+    return {"size": len(contents)}
+
+
+async def body(n: int, size: int):
+    yield (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; "
+           f"filename=\"lecture-{n}.pdf\"\r\nContent-Type: application/pdf\r\n\r\n").encode()
+    yield n.to_bytes(8, "big")  # distinct contents, so no upload is deduplicated
+    size -= 8
+    for _ in range(size // len(CHUNK)):
+        yield CHUNK
+        await asyncio.sleep(0)  # let the other uploads interleave, as on a network
+    yield CHUNK[:size % len(CHUNK)]
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def monitor(stats: dict, stop: asyncio.Event):
+    """Sample RSS and measure how late the event loop wakes this task up"""
+    interval = 0.002
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats["max_stall"] = max(stats["max_stall"], time.perf_counter() - before - interval)
+        stats["peak_rss"] = max(stats["peak_rss"], rss_bytes())
+
+
+async def run(client, url: str, uploads: int, size: int) -> dict:
+    stats = {"peak_rss": 0, "max_stall": 0.0}
+    stop = asyncio.Event()
+    start_rss = rss_bytes()
+    sampler = asyncio.create_task(monitor(stats, stop))
+    
+    async def upload(n: int):
+        response = await client.post(
+            url, content=body(n, size),
+            headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+        )
+        assert response.status_code == 201, response.text
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(n) for n in range(uploads)))
+    stats["seconds"] = time.perf_counter() - start
+    stop.set()
+    await sampler
+    stats["rss_growth"] = max(stats["peak_rss"] - start_rss, 0)
+    return stats
+
+
+async def main(uploads: int, size: int):
+    await reset_database()
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    rows = []
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            for label, url in (("streaming (current)", "/api/upload"), ("read into memory (previous)", "/bench/legacy-upload")):
+                stats = await run(client, url, uploads, size)
+                rows.append((
+                    label,
+                    f"{uploads * size / 2**20 / stats['seconds']:.0f}",
+                    f"{stats['rss_growth'] / 2**20:.0f}",
+                    f"{stats['max_stall'] * 1000:.0f}",
+                ))
+    finally:
+        shutil.rmtree(settings.UPLOAD_DIR, ignore_errors=True)
+    
+    print(f"\n{uploads} concurrent uploads of {size / 2**20:.1f} MiB\n")
+    print_table(["endpoint", "MiB/s", "peak RSS growth MiB", "max loop stall ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size-mb", type=float, default=10)
+    args = parser.parse_args()
+    # Stay under MAX_UPLOAD_SIZE
+    size = min(int(args.size_mb * 2**20), settings.MAX_UPLOAD_SIZE)
+    asyncio.run(main(args.uploads, size))
@@ -0,0 +1,88 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Import this module before anything from ``app`` so the benchmarks run
+against a throwaway SQLite database instead of ``exam_hub.db``.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+BENCH_DIR = Path(tempfile.mkdtemp(prefix="exam_hub_bench_"))
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{BENCH_DIR}/bench.db")
+os.environ.setdefault("UPLOAD_DIR", str(BENCH_DIR / "uploads"))
+os.environ.setdefault("DEBUG", "false")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database.connection import engine, read_engine, init_db  # noqa: E402
+
+
+class QueryCounter:
+    """Counts SQL statements and commits sent to the database"""
+    
+    def __init__(self):
+        self.count = 0
+        self.commits = 0
+    
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+    
+    def on_commit(self, conn):
+        self.commits += 1
+
+
+@contextmanager
+def count_queries():
+    """Count statements and commits on the engines inside the block"""
+    counter = QueryCounter()
+    engines = {engine.sync_engine, read_engine.sync_engine}
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", counter.on_execute)
+        event.listen(sync_engine, "commit", counter.on_commit)
+    try:
+        yield counter
+    finally:
+        for sync_engine in engines:
+            event.remove(sync_engine, "before_cursor_execute", counter.on_execute)
+            event.remove(sync_engine, "commit", counter.on_commit)
+
+
+@contextmanager
+def timer():
+    """Measure wall-clock time of the block in milliseconds"""
+    result = {"ms": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["ms"] = (time.perf_counter() - start) * 1000
+
+
+async def reset_database():
+    """Drop and recreate every table"""
+    from sqlalchemy import text
+    from app.database.connection import Base
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS search_index"))
+    await init_db()
+
+
+def print_table(headers, rows):
+    """Print rows as an aligned text table"""
+    widths = [
+        max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h))
+        for i, h in enumerate(headers)
+    ]
+    line = "  ".join(str(h).ljust(w) for h, w in zip(headers, widths))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
@@ -3,12 +3,18 @@ Main FastAPI application entry point
 Simplified version without authentication, email, and notifications
 """
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.database.connection import init_db
-from app.api import exam, folder, upload, health, dashboard, chatbot
+from app.database.connection import init_db, close_db
+from app.database.write_queue import write_scheduler
+from app.api import exam, folder, upload, health, dashboard, chatbot, search
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.services.image_derivatives import derivative_queue
+from app.services.text_extraction import extraction_queue
+from app.services.upload_session_service import session_collector
 
 
 @asynccontextmanager
@@ -18,9 +24,18 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting application...")
     await init_db()
     print("✅ Database initialized")
+    write_scheduler.start()
+    session_collector.start()
+    extraction_queue.start()
+    derivative_queue.start()
     yield
     # Shutdown
     print("👋 Shutting down application...")
+    await derivative_queue.stop()
+    await extraction_queue.stop()
+    await session_collector.stop()
+    await write_scheduler.stop()
+    await close_db()
 
 
 # Create FastAPI app
@@ -28,6 +43,7 @@ app = FastAPI(
     title="Exam Hub API",
     description="Simplified exam management system for easy demo",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -38,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Location", "Upload-Offset"],
 )
 
 # Include routers
@@ -46,6 +63,7 @@ app.include_router(exam.router, prefix="/api/exams", tags=["Exams"])
 app.include_router(folder.router, prefix="/api/folders", tags=["Folders"])
 app.include_router(upload.router, prefix="/api/upload", tags=["Upload"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 app.include_router(chatbot.router, prefix="/api/chatbot", tags=["Chatbot"])
 
 
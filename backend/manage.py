@@ -0,0 +1,157 @@
+"""
+Management commands
+
+Usage:
+    python manage.py migrate
+    python manage.py rebuild-counters
+    python manage.py rebuild-search
+    python manage.py render-papers
+    python manage.py import-questions FILE [--format ndjson|csv] [--folder-id ID]
+    python manage.py dedupe-files
+    python manage.py clean-uploads
+    python manage.py extract-text [--retry-failed]
+"""
+import argparse
+import asyncio
+import os
+
+from app.database.connection import AsyncSessionLocal, init_db
+from app.database.write_queue import write_scheduler
+from app.repositories.search import SearchRepository
+from app.services.exam_service import ExamService
+from app.services.folder_service import FolderService
+from app.services.upload_service import UploadService
+from app.services.text_extraction import extraction_queue
+from app.services.upload_session_service import UploadSessionService
+
+
+async def migrate(args: argparse.Namespace):
+    """Add missing tables, columns and indexes to the database"""
+    changes = await init_db()
+    for column in changes["columns"]:
+        print(f"  + column {column}")
+    for index in changes["indexes"]:
+        print(f"  + index {index}")
+    if changes["columns"] or changes["indexes"]:
+        print(f"✅ Database migrated ({len(changes['columns'])} column(s), {len(changes['indexes'])} index(es) added)")
+    else:
+        print("✅ Database is up to date")
+
+
+async def rebuild_counters(args: argparse.Namespace):
+    """Recompute the denormalized exam/file counters on folders"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        repaired = await FolderService(session).rebuild_counts()
+    print(f"✅ Folder counters rebuilt ({repaired} folder(s) repaired)")
+
+
+async def rebuild_search(args: argparse.Namespace):
+    """Re-index every exam and question for search"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        await SearchRepository(session).rebuild()
+    print("✅ Search index rebuilt")
+
+
+async def render_papers(args: argparse.Namespace):
+    """Pre-render the public paper of every published exam"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        rendered = await ExamService(session).render_papers()
+    print(f"✅ Exam papers rendered ({rendered} published exam(s))")
+
+
+async def read_chunks(path: str, size: int = 64 * 1024):
+    """Read a file in chunks, as the import endpoint receives a request body"""
+    with open(path, "rb") as file:
+        while chunk := file.read(size):
+            yield chunk
+
+
+async def import_questions(args: argparse.Namespace):
+    """Import a question bank from an NDJSON or CSV file"""
+    format = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        report = await ExamService(session).import_questions(read_chunks(args.file), format, args.folder_id)
+    
+    for error in report.errors:
+        print(f"  ✗ line {error.line}: {'; '.join(error.errors)}")
+    if report.errors_truncated:
+        print(f"  … {report.failed - len(report.errors)} more rejected row(s)")
+    status = "✅" if not report.failed else "⚠️ "
+    print(f"{status} Imported {report.imported}/{report.rows} row(s) from {os.path.basename(args.file)} "
+          f"({report.exams_created} exam(s) created, {report.exams_updated} updated, {report.failed} rejected)")
+    print(f"⏱️  {report.seconds}s, {report.rows_per_second:.0f} rows/s, "
+          f"peak memory {report.peak_memory_bytes / 1024 / 1024:.1f} MB")
+
+
+async def dedupe_files(args: argparse.Namespace):
+    """Move files uploaded before the blob store into it, sharing duplicates"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        service = UploadService(session)
+        moved = await service.migrate_legacy_files()
+        report = await service.get_storage_report()
+    print(f"✅ {moved} file(s) moved into the blob store")
+    print(f"💾 {report.files} file(s) in {report.blobs} blob(s): {report.stored_bytes} of "
+          f"{report.logical_bytes} bytes on disk, {report.saved_bytes} saved")
+
+
+async def clean_uploads(args: argparse.Namespace):
+    """Remove resumable uploads left idle for longer than UPLOAD_SESSION_TTL"""
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        removed = await UploadSessionService(session).collect_stale_sessions()
+    print(f"✅ {removed} stale partial upload(s) removed")
+
+
+async def extract_text(args: argparse.Namespace):
+    """Extract the text of uploaded documents that have none yet"""
+    await init_db()
+    try:
+        processed = await extraction_queue.run_backlog(args.retry_failed)
+    finally:
+        await write_scheduler.stop()
+    stats = extraction_queue.stats()
+    print(f"✅ {processed} document(s) processed: {stats['extracted']} extracted, "
+          f"{stats['failed']} failed, {stats['unsupported']} unsupported")
+    if processed:
+        print(f"⏱️  {stats['avg_seconds']}s per document on average, {stats['max_seconds']}s at most")
+
+
+COMMANDS = {
+    "migrate": migrate,
+    "rebuild-counters": rebuild_counters,
+    "rebuild-search": rebuild_search,
+    "render-papers": render_papers,
+    "import-questions": import_questions,
+    "dedupe-files": dedupe_files,
+    "clean-uploads": clean_uploads,
+    "extract-text": extract_text,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exam Hub management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help=migrate.__doc__)
+    subparsers.add_parser("rebuild-counters", help=rebuild_counters.__doc__)
+    subparsers.add_parser("rebuild-search", help=rebuild_search.__doc__)
+    subparsers.add_parser("render-papers", help=render_papers.__doc__)
+    importer = subparsers.add_parser("import-questions", help=import_questions.__doc__)
+    importer.add_argument("file")
+    importer.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    importer.add_argument("--folder-id", type=int, help="folder for the exams the import creates")
+    subparsers.add_parser("dedupe-files", help=dedupe_files.__doc__)
+    subparsers.add_parser("clean-uploads", help=clean_uploads.__doc__)
+    extractor = subparsers.add_parser("extract-text", help=extract_text.__doc__)
+    extractor.add_argument("--retry-failed", action="store_true", help="also retry documents that failed")
+    
+    args = parser.parse_args()
+    asyncio.run(COMMANDS[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
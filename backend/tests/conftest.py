@@ -0,0 +1,65 @@
+"""
+Shared fixtures for the test suite.
+
+Every test gets an empty throwaway SQLite database and upload directory,
+set up before anything from ``app`` is imported, and a client that calls
+the application in-process.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+TEST_DIR = Path(tempfile.mkdtemp(prefix="exam_hub_test_"))
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DIR}/test.db"
+os.environ["UPLOAD_DIR"] = str(TEST_DIR / "uploads")
+os.environ["DEBUG"] = "false"
+
+from httpx import AsyncClient, ASGITransport  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.database.connection import Base, close_db, engine, init_db  # noqa: E402
+from app.database.write_queue import write_scheduler  # noqa: E402
+from app.services.answer_key import answer_key_cache  # noqa: E402
+from app.services.dashboard_service import dashboard_cache  # noqa: E402
+from app.services.exam_cache import exam_cache  # noqa: E402
+from app.services.image_derivatives import derivative_queue  # noqa: E402
+from app.services.text_extraction import extraction_queue  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """Client of the application, on an empty database"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS search_index"))
+    await init_db()
+    shutil.rmtree(TEST_DIR / "uploads", ignore_errors=True)
+    exam_cache.clear()
+    answer_key_cache.clear()
+    dashboard_cache.invalidate()
+    
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    
+    # Background work belongs to this test's event loop
+    await derivative_queue.stop()
+    await extraction_queue.stop()
+    await write_scheduler.stop()
+    await close_db()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
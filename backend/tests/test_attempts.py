@@ -0,0 +1,42 @@
+"""Starting and submitting exam attempts"""
+import pytest
+
+from app.services.exam_service import ExamService
+
+pytestmark = pytest.mark.anyio
+
+
+async def start_attempt(client) -> dict:
+    exam = (await client.post("/api/exams", json={
+        "title": "Quiz",
+        "is_published": True,
+        "questions": [{"question_text": "2 + 2?", "question_type": "mcq", "options": ["3", "4"], "correct_answer": "4"}],
+    })).json()
+    response = await client.post(f"/api/exams/{exam['id']}/attempts", json={"student_name": "Ada"})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def test_submit_is_graded(client):
+    attempt = await start_attempt(client)
+    exam = (await client.get(f"/api/exams/{attempt['exam_id']}")).json()
+    response = await client.post(
+        f"/api/exams/attempts/{attempt['id']}/submit",
+        json={"answers": [{"question_id": exam["questions"][0]["id"], "answer_text": "4"}]}
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["score"] == 1
+
+
+async def test_submit_after_exam_is_gone_is_not_found(client, monkeypatch):
+    attempt = await start_attempt(client)
+    
+    # The exam is deleted between loading the attempt and grading it
+    async def deleted(self, exam_id):
+        return None
+    monkeypatch.setattr(ExamService, "_get_snapshot", deleted)
+    
+    response = await client.post(f"/api/exams/attempts/{attempt['id']}/submit", json={"answers": []})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Exam not found"
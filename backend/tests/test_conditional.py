@@ -0,0 +1,72 @@
+"""ETags and 304 Not Modified on read endpoints"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def revalidate(client, url: str, etag: str, **params):
+    return await client.get(url, params=params, headers={"If-None-Match": etag})
+
+
+@pytest.mark.parametrize("params", [{}, {"include_answers": True}])
+async def test_exam_is_not_modified_until_edited(client, params):
+    exam = (await client.post("/api/exams", json={"title": "Optics", "is_published": True})).json()
+    url = f"/api/exams/{exam['id']}"
+    response = await client.get(url, params=params)
+    etag = response.headers["ETag"]
+    
+    response = await revalidate(client, url, etag, **params)
+    assert response.status_code == 304
+    assert response.content == b""
+    
+    await client.put(url, json={"title": "Wave optics"})
+    response = await revalidate(client, url, etag, **params)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["title"] == "Wave optics"
+
+
+async def test_exam_listing_changes_with_new_exams(client):
+    await client.post("/api/exams", json={"title": "First"})
+    etag = (await client.get("/api/exams")).headers["ETag"]
+    assert (await revalidate(client, "/api/exams", etag)).status_code == 304
+    
+    await client.post("/api/exams", json={"title": "Second"})
+    response = await revalidate(client, "/api/exams", etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+async def test_folder_is_not_modified_until_edited(client):
+    folder = (await client.post("/api/folders", json={"name": "Maths"})).json()
+    url = f"/api/folders/{folder['id']}"
+    etag = (await client.get(url)).headers["ETag"]
+    assert (await revalidate(client, url, etag)).status_code == 304
+    
+    await client.put(url, json={"name": "Mathematics"})
+    assert (await revalidate(client, url, etag)).status_code == 200
+
+
+async def test_deleting_folder_changes_listing_and_exam_etags(client):
+    folder = (await client.post("/api/folders", json={"name": "Physics"})).json()
+    exam = (await client.post("/api/exams", json={"title": "Kinematics", "folder_id": folder["id"]})).json()
+    exam_url = f"/api/exams/{exam['id']}"
+    listing_etag = (await client.get("/api/exams")).headers["ETag"]
+    exam_etag = (await client.get(exam_url)).headers["ETag"]
+    
+    assert (await client.delete(f"/api/folders/{folder['id']}")).status_code == 204
+    
+    response = await revalidate(client, "/api/exams", listing_etag)
+    assert response.status_code == 200
+    assert response.json()[0]["folder_id"] is None
+    response = await revalidate(client, exam_url, exam_etag)
+    assert response.status_code == 200
+    assert response.json()["folder_id"] is None
+
+
+async def test_dashboard_is_not_modified_until_a_write(client):
+    etag = (await client.get("/api/dashboard")).headers["ETag"]
+    assert (await revalidate(client, "/api/dashboard", etag)).status_code == 304
+    
+    await client.post("/api/exams", json={"title": "New"})
+    assert (await revalidate(client, "/api/dashboard", etag)).status_code == 200
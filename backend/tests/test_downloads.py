@@ -0,0 +1,85 @@
+"""Downloading file contents: Range, If-Range, HEAD and ETags"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+async def url(client):
+    response = await client.post("/api/upload", files={"file": ("data.txt", CONTENT)})
+    return f"/api/upload/{response.json()['file']['id']}/content"
+
+
+async def test_whole_file(client, url):
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=10-19", 10, 19),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-5", 1019, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+async def test_single_range(client, url, header, start, end):
+    response = await client.get(url, headers={"Range": header})
+    assert response.status_code == 206
+    assert response.content == CONTENT[start:end + 1]
+    assert response.headers["Content-Range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.headers["Content-Length"] == str(end - start + 1)
+
+
+async def test_range_past_the_end_is_unsatisfiable(client, url):
+    response = await client.get(url, headers={"Range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "bytes=x", "items=0-1"])
+async def test_unsupported_ranges_get_the_whole_file(client, url, header):
+    response = await client.get(url, headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_if_range(client, url):
+    etag = (await client.head(url)).headers["ETag"]
+    response = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+    
+    # The file changed since the client's copy: send all of it
+    response = await client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_head_and_not_modified(client, url):
+    response = await client.head(url)
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    
+    response = await client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+async def test_reused_id_is_revalidated(client, url):
+    response = await client.get(url)
+    assert response.headers["Cache-Control"] == "no-cache"
+    etag = response.headers["ETag"]
+    
+    # SQLite hands the deleted file's id to the next upload
+    await client.delete(url.removesuffix("/content"))
+    response = await client.post("/api/upload", files={"file": ("other.txt", b"other contents")})
+    assert f"/api/upload/{response.json()['file']['id']}/content" == url
+    
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.content == b"other contents"
@@ -0,0 +1,81 @@
+"""Exam snapshot and answer key caches when exams are deleted and their IDs reused"""
+import pytest
+
+from app.services.answer_key import answer_key_cache
+from app.services.exam_cache import exam_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def exam_with_answer(answer: str) -> dict:
+    return {
+        "title": f"Answer is {answer}",
+        "is_published": True,
+        "total_marks": 1,
+        "questions": [{
+            "question_text": "Pick one",
+            "question_type": "mcq",
+            "options": ["a", "b"],
+            "correct_answer": answer,
+        }],
+    }
+
+
+async def submit(client, exam: dict, answer: str) -> dict:
+    response = await client.post(f"/api/exams/{exam['id']}/attempts", json={"student_name": "Ada"})
+    assert response.status_code == 201
+    response = await client.post(
+        f"/api/exams/attempts/{response.json()['id']}/submit",
+        json={"answers": [{"question_id": exam["questions"][0]["id"], "answer_text": answer}]}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_stale_answer_key_of_deleted_exam_is_not_used(client):
+    old = (await client.post("/api/exams", json=exam_with_answer("a"))).json()
+    assert (await submit(client, old, "a"))["score"] == 1
+    stale_key = answer_key_cache.get(old["id"])
+    
+    assert (await client.delete(f"/api/exams/{old['id']}")).status_code == 204
+    new = (await client.post("/api/exams", json=exam_with_answer("b"))).json()
+    assert new["id"] == old["id"]
+    
+    # As held by another worker that graded the deleted exam
+    answer_key_cache.set(new["id"], stale_key)
+    exam_cache.clear()
+    assert (await submit(client, new, "b"))["score"] == 1
+
+
+async def test_recreated_exam_is_not_served_from_deleted_exams_cache(client):
+    old = (await client.post("/api/exams", json=exam_with_answer("a"))).json()
+    # Cache both views of the exam and its answer key
+    await client.get(f"/api/exams/{old['id']}")
+    await client.get(f"/api/exams/{old['id']}", params={"include_answers": True})
+    assert (await submit(client, old, "a"))["score"] == 1
+    
+    assert (await client.delete(f"/api/exams/{old['id']}")).status_code == 204
+    new = (await client.post("/api/exams", json={**exam_with_answer("b"), "title": "Replacement"})).json()
+    assert new["id"] == old["id"]
+    
+    for params in ({}, {"include_answers": True}):
+        response = await client.get(f"/api/exams/{new['id']}", params=params)
+        assert response.json()["title"] == "Replacement"
+        assert response.json()["questions"][0]["id"] == new["questions"][0]["id"]
+    assert response.json()["questions"][0]["correct_answer"] == "b"
+    assert (await submit(client, new, "b"))["score"] == 1
+
+
+async def test_cache_entries_of_deleted_exam_do_not_match_recreated_exam(client):
+    old = (await client.post("/api/exams", json={"title": "Draft"})).json()
+    await client.get(f"/api/exams/{old['id']}")
+    stale_entries = list(exam_cache._data.items())
+    assert stale_entries
+    await client.delete(f"/api/exams/{old['id']}")
+    
+    new = (await client.post("/api/exams", json={"title": "Other draft"})).json()
+    assert new["id"] == old["id"]
+    # As held by another worker that read the deleted exam
+    for key, snapshot in stale_entries:
+        exam_cache.set(key, snapshot)
+    assert (await client.get(f"/api/exams/{new['id']}")).json()["title"] == "Other draft"
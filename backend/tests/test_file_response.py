@@ -0,0 +1,43 @@
+"""Sending files from disk with FileRangeResponse"""
+import pytest
+
+from app.api.responses import FileRangeResponse
+
+pytestmark = pytest.mark.anyio
+
+
+async def call(response: FileRangeResponse, messages: list) -> None:
+    """Run the response as a server without sendfile support would"""
+    async def send(message):
+        messages.append(message)
+    
+    await response({"type": "http", "method": "GET", "extensions": {}}, None, send)
+
+
+async def test_sends_range_in_blocks(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 4096)
+    response = FileRangeResponse(str(path), 1000, 600_000, status_code=206)
+    response.chunk_size = 64 * 1024
+    
+    messages = []
+    await call(response, messages)
+    body = b"".join(message["body"] for message in messages[1:])
+    assert body == path.read_bytes()[1000:601_000]
+    assert messages[-1]["more_body"] is False
+    assert all(message["more_body"] for message in messages[1:-1])
+
+
+async def test_file_shrinking_mid_response_fails(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 300_000)
+    response = FileRangeResponse(str(path), 0, 300_000)
+    response.chunk_size = 64 * 1024
+    path.write_bytes(b"x" * 100_000)
+    
+    messages = []
+    with pytest.raises(OSError):
+        await call(response, messages)
+    # The body is never completed, so the server drops the connection
+    assert all(message.get("more_body", True) for message in messages[1:])
+    assert sum(len(message["body"]) for message in messages[1:]) < 300_000
@@ -0,0 +1,32 @@
+"""Deleting folders and what it does to their exams"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def exam_in_folder(client, published: bool = True) -> tuple:
+    folder = (await client.post("/api/folders", json={"name": "Physics"})).json()
+    exam = (await client.post("/api/exams", json={
+        "title": "Kinematics",
+        "folder_id": folder["id"],
+        "is_published": published,
+        "questions": [{"question_text": "Speed of light?", "question_type": "short_answer", "correct_answer": "c"}],
+    })).json()
+    return folder, exam
+
+
+async def test_deleting_folder_moves_exams_out_of_it(client):
+    folder, exam = await exam_in_folder(client)
+    # Cache the exam and its paper first
+    assert (await client.get(f"/api/exams/{exam['id']}")).json()["folder_id"] == folder["id"]
+    assert (await client.get(f"/api/exams/{exam['id']}", params={"include_answers": True})).json()["folder_id"] == folder["id"]
+    
+    assert (await client.delete(f"/api/folders/{folder['id']}")).status_code == 204
+    
+    paper = await client.get(f"/api/exams/{exam['id']}")
+    assert paper.status_code == 200
+    assert paper.json()["folder_id"] is None
+    full = await client.get(f"/api/exams/{exam['id']}", params={"include_answers": True})
+    assert full.json()["folder_id"] is None
+    listed = (await client.get("/api/exams")).json()
+    assert [row["folder_id"] for row in listed] == [None]
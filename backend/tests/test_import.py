@@ -0,0 +1,133 @@
+"""Streamed question bank imports"""
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.repositories.exam import ExamRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_import_creates_exams_and_questions(client):
+    rows = [
+        {"exam_title": "Imported", "question_text": f"Question {n}", "question_type": "essay"} for n in range(3)
+    ] + [{"question_text": "No exam", "question_type": "essay"}]
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    response = await client.post("/api/exams/import", content=body)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["exams_created"], report["failed"]) == (3, 1, 1)
+    assert report["errors"][0]["line"] == 4
+
+
+
+async def test_csv_quoted_fields_span_lines(client):
+    body = 'exam_title,question_text,question_type\nBank,"Two\nlines, one cell",essay\n\nBank,After,essay\n'
+    response = await client.post("/api/exams/import", params={"format": "csv"}, content=body.encode())
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 0)
+    
+    exam = (await client.get("/api/exams/1")).json()
+    assert [q["question_text"] for q in exam["questions"]] == ["Two\nlines, one cell", "After"]
+
+
+async def test_csv_unclosed_quote_costs_one_row(client, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_ROW_CHARS", 100)
+    lines = ["exam_title,question_text,question_type", 'Bank,"Unclosed,essay']
+    lines += [f"Bank,Question {n},essay" for n in range(20)]
+    response = await client.post("/api/exams/import", params={"format": "csv"}, content="\n".join(lines).encode())
+    report = response.json()
+    assert report["failed"] == 1
+    assert report["errors"] == [{"line": 2, "errors": ["Row longer than 100 characters"]}]
+    # Questions 0 to 3 took the unclosed record over the limit; reading resumes after them
+    assert report["imported"] == 16
+
+
+async def test_overlong_line_is_a_row_error(client, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_MAX_ROW_CHARS", 100)
+    rows = [
+        {"exam_title": "Bank", "question_text": "Short", "question_type": "essay"},
+        {"exam_title": "Bank", "question_text": "Long " * 50, "question_type": "essay"},
+        {"exam_title": "Bank", "question_text": "Short again", "question_type": "essay"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows).encode()
+    # Sent in small chunks, so the long line is dropped as it arrives
+    chunks = [body[i:i + 16] for i in range(0, len(body), 16)]
+    
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    
+    report = (await client.post("/api/exams/import", content=stream())).json()
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"] == [{"line": 2, "errors": ["Row longer than 100 characters"]}]
+
+async def test_other_writes_go_through_while_import_body_streams(client):
+    folder = (await client.post("/api/folders", json={"name": "Bank"})).json()
+    other_write_done = asyncio.Event()
+    
+    async def body():
+        await other_write_done.wait()
+        yield json.dumps({"exam_title": "Slow", "question_text": "Q", "question_type": "essay"}).encode()
+    
+    importing = asyncio.create_task(
+        client.post("/api/exams/import", params={"folder_id": folder["id"]}, content=body())
+    )
+    await asyncio.sleep(0.2)  # the import has checked its folder and waits for the body
+    try:
+        response = await asyncio.wait_for(client.post("/api/exams", json={"title": "Meanwhile"}), 5)
+        assert response.status_code == 201
+    finally:
+        other_write_done.set()
+    response = await importing
+    assert response.json()["imported"] == 1
+
+
+async def test_batch_of_missing_exams_releases_the_writer(client, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    other_write_done = asyncio.Event()
+    
+    async def body():
+        # A whole batch naming an exam that does not exist
+        for n in range(2):
+            yield (json.dumps({"exam_id": 999, "question_text": f"Q{n}", "question_type": "essay"}) + "\n").encode()
+        await other_write_done.wait()
+        yield json.dumps({"exam_title": "Later", "question_text": "Q", "question_type": "essay"}).encode()
+    
+    importing = asyncio.create_task(client.post("/api/exams/import", content=body()))
+    await asyncio.sleep(0.2)  # the first batch has been rejected and the import waits for more
+    try:
+        response = await asyncio.wait_for(client.post("/api/folders", json={"name": "Meanwhile"}), 5)
+        assert response.status_code == 201
+    finally:
+        other_write_done.set()
+    report = (await importing).json()
+    assert (report["imported"], report["failed"]) == (1, 2)
+
+
+async def test_exam_deleted_before_its_paper_releases_the_writer(client, monkeypatch):
+    exam = (await client.post("/api/exams", json={"title": "Bank", "is_published": True})).json()
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 1)
+    
+    # The exam is gone by the time its paper is rendered after the batch
+    get_revision = ExamRepository.get_revision
+    async def deleted(self, exam_id):
+        return await get_revision(self, 0)
+    monkeypatch.setattr(ExamRepository, "get_revision", deleted)
+    
+    other_write_done = asyncio.Event()
+    
+    async def body():
+        yield (json.dumps({"exam_id": exam["id"], "question_text": "Q", "question_type": "essay"}) + "\n").encode()
+        await other_write_done.wait()
+    
+    importing = asyncio.create_task(client.post("/api/exams/import", content=body()))
+    await asyncio.sleep(0.2)  # the first batch is written and the import waits for more
+    try:
+        response = await asyncio.wait_for(client.post("/api/folders", json={"name": "Meanwhile"}), 5)
+        assert response.status_code == 201
+    finally:
+        other_write_done.set()
+    assert (await importing).json()["imported"] == 1
@@ -0,0 +1,68 @@
+"""Cursor pagination of list endpoints"""
+import pytest
+
+from app.api.pagination import NEXT_CURSOR_HEADER
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_exams(client, count: int) -> list:
+    ids = []
+    for n in range(count):
+        response = await client.post("/api/exams", json={"title": f"Exam {n}"})
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def collect(client, url: str, params: dict) -> list:
+    """Follow the cursor header through every page"""
+    ids = []
+    response = await client.get(url, params=params)
+    while True:
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        response = await client.get(url, params={**params, "cursor": cursor})
+
+
+async def test_cursor_walks_every_exam_once(client):
+    ids = await create_exams(client, 7)
+    
+    assert await collect(client, "/api/exams", {"limit": 3}) == ids
+    assert await collect(client, "/api/exams", {"limit": 3, "order": "desc"}) == ids[::-1]
+
+
+async def test_cursor_is_not_shifted_by_deletes(client):
+    ids = await create_exams(client, 6)
+    response = await client.get("/api/exams", params={"limit": 3})
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    
+    # Rows before the cursor going away must not skip rows after it
+    assert (await client.delete(f"/api/exams/{ids[0]}")).status_code == 204
+    response = await client.get("/api/exams", params={"limit": 3, "cursor": cursor})
+    assert [row["id"] for row in response.json()] == ids[3:]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_last_page_has_no_cursor(client):
+    await create_exams(client, 2)
+    response = await client.get("/api/exams", params={"limit": 2})
+    assert len(response.json()) == 2
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_folders_paginate_by_cursor(client):
+    ids = []
+    for n in range(5):
+        response = await client.post("/api/folders", json={"name": f"Folder {n}"})
+        ids.append(response.json()["id"])
+    
+    assert await collect(client, "/api/folders", {"limit": 2}) == ids
+
+
+async def test_invalid_cursor_is_rejected(client):
+    response = await client.get("/api/exams", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,81 @@
+"""Resumable uploads sent in chunks"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = b"0123456789" * 1000
+
+
+async def start(client, size: int = len(CONTENT), filename: str = "lecture.mp4") -> str:
+    response = await client.post("/api/upload/sessions", json={"filename": filename, "size": size})
+    assert response.status_code == 201
+    assert response.headers["Upload-Offset"] == "0"
+    return response.headers["Location"]
+
+
+async def send(client, url: str, offset: int, chunk: bytes):
+    return await client.patch(url, content=chunk, headers={"Upload-Offset": str(offset)})
+
+
+async def test_upload_in_chunks_and_resume(client):
+    url = await start(client)
+    assert (await send(client, url, 0, CONTENT[:3000])).headers["Upload-Offset"] == "3000"
+    
+    # After a failure the client asks where to resume from
+    response = await client.get(url)
+    assert response.headers["Upload-Offset"] == "3000"
+    assert response.json()["offset"] == 3000
+    
+    assert (await send(client, url, 3000, CONTENT[3000:])).headers["Upload-Offset"] == str(len(CONTENT))
+    response = await client.post(f"{url}/complete")
+    assert response.status_code == 201
+    file = response.json()["file"]
+    assert file["file_size"] == len(CONTENT)
+    assert (await client.get(f"/api/upload/{file['id']}/content")).content == CONTENT
+    assert (await client.get(url)).status_code == 404
+
+
+async def test_chunk_at_wrong_offset_gets_the_right_one(client):
+    url = await start(client)
+    await send(client, url, 0, CONTENT[:100])
+    
+    response = await send(client, url, 0, CONTENT[:100])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+
+
+async def test_chunk_past_declared_size_is_rejected(client):
+    url = await start(client, size=10)
+    response = await send(client, url, 0, b"x" * 11)
+    assert response.status_code == 413
+    assert (await client.get(url)).json()["offset"] == 0
+
+
+async def test_incomplete_upload_cannot_complete(client):
+    url = await start(client)
+    await send(client, url, 0, CONTENT[:10])
+    response = await client.post(f"{url}/complete")
+    assert response.status_code == 409
+    assert (await client.get("/api/upload")).json() == []
+
+
+async def test_abandoned_upload_is_gone(client):
+    url = await start(client)
+    await send(client, url, 0, CONTENT[:10])
+    assert (await client.delete(url)).status_code == 204
+    assert (await client.get(url)).status_code == 404
+
+
+async def test_disallowed_extension_is_rejected_up_front(client):
+    response = await client.post("/api/upload/sessions", json={"filename": "setup.exe", "size": 10})
+    assert response.status_code == 400
+
+
+async def test_recordings_only_come_in_chunks(client):
+    await start(client, filename="lecture.mp4")
+    
+    response = await client.post("/api/upload", files={"file": ("lecture.mp4", CONTENT)})
+    assert response.status_code == 400
+    response = await client.post("/api/upload/batch", files=[("files", ("lecture.mp4", CONTENT))])
+    assert response.status_code == 400
+    assert response.json()["results"][0]["error"].startswith("File type not allowed")
@@ -0,0 +1,96 @@
+"""Full-text search, kept in step with exam and question edits"""
+import json
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def search(client, q: str, **params) -> list:
+    response = await client.get("/api/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [(result["type"], result["id"]) for result in response.json()["results"]]
+
+
+@pytest.fixture
+async def exam(client):
+    response = await client.post("/api/exams", json={
+        "title": "Cell biology",
+        "description": "Organelles & <membranes>",
+        "questions": [
+            {"question_text": "What is the powerhouse of the cell?", "question_type": "mcq",
+             "options": ["Nucleus", "Mitochondria"], "correct_answer": "Mitochondria"},
+            {"question_text": "Describe osmosis", "question_type": "essay"},
+        ],
+    })
+    return response.json()
+
+
+async def test_new_exam_and_questions_are_found(client, exam):
+    first, second = (q["id"] for q in exam["questions"])
+    assert await search(client, "biology") == [("exam", exam["id"])]
+    assert await search(client, "mitochondria") == [("question", first)]
+    assert await search(client, "osmo") == [("question", second)]  # as typed
+    assert await search(client, "osmo ") == []  # whole word only
+    assert await search(client, "cell", type="exam") == [("exam", exam["id"])]
+
+
+async def test_snippets_are_escaped(client, exam):
+    response = await client.get("/api/search", params={"q": "membranes"})
+    assert response.json()["results"][0]["snippet"] == "Organelles &amp; &lt;<mark>membranes</mark>&gt;"
+
+
+async def test_edits_are_reindexed(client, exam):
+    question = exam["questions"][1]
+    await client.put(f"/api/exams/{exam['id']}", json={"title": "Plant physiology"})
+    assert await search(client, "biology") == []
+    assert await search(client, "physiology") == [("exam", exam["id"])]
+    
+    await client.put(f"/api/exams/{exam['id']}/questions/{question['id']}", json={"question_text": "Explain diffusion"})
+    assert await search(client, "osmosis") == []
+    assert await search(client, "diffusion") == [("question", question["id"])]
+    
+    response = await client.post(f"/api/exams/{exam['id']}/questions", json={"question_text": "Define turgor", "question_type": "essay"})
+    assert await search(client, "turgor") == [("question", response.json()["id"])]
+
+
+async def test_deletes_are_unindexed(client, exam):
+    first, second = (q["id"] for q in exam["questions"])
+    await client.delete(f"/api/exams/{exam['id']}/questions/{second}")
+    assert await search(client, "osmosis") == []
+    
+    await client.delete(f"/api/exams/{exam['id']}")
+    assert await search(client, "mitochondria") == []
+    assert await search(client, "biology") == []
+    
+    # The next exam reuses the deleted exam's ID
+    response = await client.post("/api/exams", json={"title": "Genetics"})
+    assert response.json()["id"] == exam["id"]
+    assert await search(client, "biology") == []
+
+
+async def test_imports_are_indexed(client):
+    rows = [{"exam_title": "Imported chemistry", "question_text": f"Avogadro question {n}", "question_type": "essay"}
+            for n in range(3)]
+    response = await client.post("/api/exams/import", content="\n".join(map(json.dumps, rows)).encode())
+    assert response.json()["imported"] == 3
+    assert len(await search(client, "avogadro")) == 3
+    assert await search(client, "chemistry", type="exam") != []
+
+
+async def test_pages(client):
+    await client.post("/api/exams", json={
+        "title": "Quiz",
+        "questions": [{"question_text": f"Enzyme question {n}", "question_type": "essay"} for n in range(5)],
+    })
+    response = (await client.get("/api/search", params={"q": "enzyme", "limit": 3})).json()
+    assert len(response["results"]) == 3 and response["next_skip"] == 3
+    rest = (await client.get("/api/search", params={"q": "enzyme", "limit": 3, "skip": 3})).json()
+    assert len(rest["results"]) == 2 and rest["next_skip"] is None
+    seen = {r["id"] for r in response["results"]} | {r["id"] for r in rest["results"]}
+    assert len(seen) == 5
+
+
+async def test_query_without_words_is_rejected(client):
+    response = await client.get("/api/search", params={"q": "?!"})
+    assert response.status_code == 400
@@ -0,0 +1,48 @@
+"""Validating ORM objects and rows in batch"""
+import pytest
+from sqlalchemy import select
+
+from app.core.serialization import validate_list
+from app.database.connection import AsyncSessionLocal
+from app.models.exam import ExamAttempt
+from app.schemas.exam import ExamAttemptListResponse
+
+pytestmark = pytest.mark.anyio
+
+
+async def start_attempt(client) -> dict:
+    """Start an attempt by Ada and return its exam"""
+    exam = (await client.post("/api/exams", json={
+        "title": "Quiz",
+        "is_published": True,
+        "questions": [{"question_text": "2 + 2?", "question_type": "mcq", "options": ["3", "4"], "correct_answer": "4"}],
+    })).json()
+    response = await client.post(f"/api/exams/{exam['id']}/attempts", json={"student_name": "Ada"})
+    assert response.status_code == 201
+    return exam
+
+
+async def test_expired_attributes_are_loaded(client):
+    await start_attempt(client)
+    
+    async with AsyncSessionLocal() as db:
+        attempt = (await db.execute(select(ExamAttempt))).scalar_one()
+        # Expired attributes are absent from __dict__ and must be reloaded
+        db.expire(attempt, ["student_name", "status"])
+        items = await db.run_sync(lambda _: validate_list(ExamAttemptListResponse, [attempt]))
+    
+    assert items[0].student_name == "Ada"
+    assert items[0].status == "in_progress"
+
+
+async def test_rows_are_validated(client):
+    exam = await start_attempt(client)
+    
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(
+            ExamAttempt.id, ExamAttempt.exam_id, ExamAttempt.student_name, ExamAttempt.status,
+            ExamAttempt.score, ExamAttempt.percentage, ExamAttempt.passed, ExamAttempt.created_at,
+        ))).all()
+    
+    items = validate_list(ExamAttemptListResponse, rows)
+    assert [(item.exam_id, item.student_name) for item in items] == [(exam["id"], "Ada")]
@@ -0,0 +1,71 @@
+"""Uploads stored once per content in the blob store"""
+import os
+
+import pytest
+from sqlalchemy import select
+
+from app.database.connection import AsyncSessionLocal
+from app.models.file import Blob
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = b"Lecture notes\n" * 1000
+
+
+async def upload(client, name: str, content: bytes = CONTENT, folder_id=None) -> dict:
+    params = {"folder_id": folder_id} if folder_id is not None else {}
+    response = await client.post("/api/upload", params=params, files={"file": (name, content)})
+    assert response.status_code == 201, response.text
+    return response.json()["file"]
+
+
+async def blobs() -> list:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(select(Blob.sha256, Blob.path, Blob.ref_count))
+        return result.all()
+
+
+async def test_identical_files_share_one_blob(client):
+    first = await upload(client, "notes.txt")
+    folder = (await client.post("/api/folders", json={"name": "Copies"})).json()
+    second = await upload(client, "notes-copy.txt", folder_id=folder["id"])
+    await upload(client, "other.txt", b"Something else")
+    
+    stored = await blobs()
+    assert sorted(blob.ref_count for blob in stored) == [1, 2]
+    assert first["file_path"] == second["file_path"]
+    assert len({blob.path for blob in stored}) == 2
+    
+    report = (await client.get("/api/upload/storage")).json()
+    assert (report["files"], report["blobs"]) == (3, 2)
+    assert report["saved_bytes"] == len(CONTENT)
+    
+    for file in (first, second):
+        response = await client.get(f"/api/upload/{file['id']}/content")
+        assert response.content == CONTENT
+
+
+async def test_blob_is_removed_with_its_last_file(client):
+    first = await upload(client, "notes.txt")
+    second = await upload(client, "again.txt")
+    [blob] = await blobs()
+    
+    assert (await client.delete(f"/api/upload/{first['id']}")).status_code == 204
+    assert [b.ref_count for b in await blobs()] == [1]
+    assert os.path.exists(blob.path)
+    assert (await client.get(f"/api/upload/{second['id']}/content")).content == CONTENT
+    
+    assert (await client.delete(f"/api/upload/{second['id']}")).status_code == 204
+    assert await blobs() == []
+    assert not os.path.exists(blob.path)
+
+
+async def test_deleting_folder_releases_its_files_blobs(client):
+    folder = (await client.post("/api/folders", json={"name": "Temporary"})).json()
+    await upload(client, "in-folder.txt", folder_id=folder["id"])
+    kept = await upload(client, "outside.txt")
+    
+    assert (await client.delete(f"/api/folders/{folder['id']}")).status_code == 204
+    [blob] = await blobs()
+    assert blob.ref_count == 1
+    assert (await client.get(f"/api/upload/{kept['id']}/content")).content == CONTENT
@@ -1,35 +1,25 @@
 #!/usr/bin/env python3
 """
 Convert black icons to white icons for dark mode
-Requires: Pillow (pip install Pillow)
+Requires: the backend's Pillow and NumPy (pip install -r backend/requirements.txt)
 """
 
-from PIL import Image
 import os
+import sys
+
+# The recolouring is shared with the backend's image processing
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'backend')
+sys.path.insert(0, os.path.normpath(BACKEND_DIR))
+
+from app.services.image_processing import recolor_file
 
 def convert_to_white(input_path, output_path):
     """
     Convert a black/dark icon to white while preserving alpha channel
     """
     try:
-        # Open the image
-        img = Image.open(input_path).convert('RGBA')
-        
-        # Get image data
-        pixels = img.load()
-        width, height = img.size
-        
-        # Convert all non-transparent pixels to white
-        for y in range(height):
-            for x in range(width):
-                r, g, b, a = pixels[x, y]
-                
-                # If pixel has any opacity, make it white
-                if a > 0:
-                    pixels[x, y] = (255, 255, 255, a)
-        
-        # Save the result
-        img.save(output_path)
+        # Every pixel with any opacity becomes white
+        recolor_file(input_path, output_path, (255, 255, 255))
         print(f"✅ Converted: {os.path.basename(input_path)} -> {os.path.basename(output_path)}")
         
     except Exception as e: